@@ -1,17 +1,30 @@
 from datetime import datetime, timedelta
-from jose import JWTError, jwt
+import hashlib
+import secrets
+import time
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 import logging
 from secure_storage import key_manager
-from clipboard_crypto import SecureMemory
+from clipboard_crypto import SecureMemory, scrub_scheduler
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = 30
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 logger = logging.getLogger(__name__)
 
+_jose = None
+
+def load_jose():
+    """python-jose (jwt module, JWTError); imported on first token operation to keep it off the startup path"""
+    global _jose
+    if _jose is None:
+        from jose import JWTError, jwt
+        _jose = (jwt, JWTError)
+    return _jose
+
 def _get_secret_key() -> str:
     """Get JWT secret key from secure storage"""
     secret = key_manager.get_jwt_secret()
@@ -23,6 +36,7 @@ def _get_secret_key() -> str:
 def create_access_token(data: dict, expires_delta: timedelta = None):
     """Create JWT access token using secure key from storage"""
     try:
+        jwt, _ = load_jose()
         secret_key = _get_secret_key()
         to_encode = data.copy()
         expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
@@ -39,6 +53,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
 
 def get_current_user(token: str = Depends(oauth2_scheme)):
     """Validate JWT token using secure key from storage"""
+    jwt, JWTError = load_jose()
     try:
         secret_key = _get_secret_key()
         payload = jwt.decode(token, secret_key, algorithms=[ALGORITHM])
@@ -57,11 +72,46 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         logger.error(f"Token validation error: {e}")
         raise HTTPException(status_code=500, detail="Authentication error")
 
-def rotate_jwt_secret():
+def _hash_refresh_token(token: str) -> str:
+    """Hash refresh token for storage (tokens are random, so a fast hash is enough)"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def create_refresh_token(db, username: str, expires_delta: timedelta = None) -> str:
+    """Create a long-lived refresh token and store its hash"""
+    try:
+        token = secrets.token_urlsafe(32)
+        expires_at = time.time() + (expires_delta or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)).total_seconds()
+        db.store_refresh_token(_hash_refresh_token(token), username, expires_at)
+        return token
+    except Exception as e:
+        logger.error(f"Failed to create refresh token: {e}")
+        raise HTTPException(status_code=500, detail="Token creation failed")
+
+def refresh_access_token(db, refresh_token: str) -> dict:
+    """Issue a new access token from a valid refresh token"""
+    if not refresh_token:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    record = db.get_refresh_token(_hash_refresh_token(refresh_token))
+    if record is None or record["revoked"] or record["expires_at"] < time.time():
+        logger.warning("Refresh token rejected (unknown, revoked or expired)")
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    access_token = create_access_token({"sub": record["username"]})
+    return {"access_token": access_token, "token_type": "bearer", "username": record["username"]}
+
+def revoke_refresh_token(db, refresh_token: str) -> bool:
+    """Revoke a single refresh token"""
+    if not refresh_token:
+        return False
+    return db.revoke_refresh_token(_hash_refresh_token(refresh_token))
+
+def rotate_jwt_secret(db=None):
     """Rotate JWT secret key (will invalidate all existing tokens)"""
     try:
         logger.warning("Rotating JWT secret key - all existing tokens will be invalidated")
         key_manager.rotate_jwt_secret()
+        scrub_scheduler.collect_now()
+        if db is not None:
+            db.revoke_all_refresh_tokens()
         return {"message": "JWT secret key rotated successfully", "warning": "All existing tokens are now invalid"}
     except Exception as e:
         logger.error(f"Failed to rotate JWT secret: {e}")
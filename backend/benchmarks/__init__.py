@@ -0,0 +1,5 @@
+"""
+ClipVault benchmark suite (crypto, database, secure memory and API hot paths)
+
+Run from the backend folder:  python -m benchmarks --help
+"""
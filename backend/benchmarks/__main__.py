@@ -0,0 +1,83 @@
+"""
+Benchmark runner
+
+    python -m benchmarks                      # full run: 1k/100k/1M rows, 10 B .. 10 MB payloads
+    python -m benchmarks --quick              # 1k rows, payloads up to 1 MB
+    python -m benchmarks --only crypto,db --output results.json --baseline baseline.json
+"""
+
+import argparse
+import importlib
+import json
+import sys
+
+from .common import setup_environment, write_results, compare_results
+
+SUITES = ("crypto", "cipher", "db", "storage", "secure_memory", "api", "scrub", "batch")
+
+FULL_CONFIG = {
+    "payload_sizes": [10, 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024],
+    "row_counts": [1000, 100000, 1000000],
+    "heap_objects": 1000000,
+    "batch_size": 100,
+    "min_time": 1.0,
+}
+QUICK_CONFIG = {
+    "payload_sizes": [10, 1024, 100 * 1024, 1024 * 1024],
+    "row_counts": [1000],
+    "heap_objects": 100000,
+    "batch_size": 50,
+    "min_time": 0.2,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="ClipVault hot path benchmarks")
+    parser.add_argument("--quick", action="store_true", help="small sizes for a fast smoke run")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"comma separated subset of {', '.join(SUITES)}")
+    parser.add_argument("--rows", help="override row counts, e.g. 1000,100000")
+    parser.add_argument("--sizes", help="override payload sizes in bytes, e.g. 10,1024")
+    parser.add_argument("--min-time", type=float, help="minimum seconds spent per benchmark")
+    parser.add_argument("--output", default="benchmark_results.json", help="where to write JSON results")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative slowdown reported as regression")
+    args = parser.parse_args(argv)
+
+    config = dict(QUICK_CONFIG if args.quick else FULL_CONFIG)
+    if args.rows:
+        config["row_counts"] = [int(r) for r in args.rows.split(",")]
+    if args.sizes:
+        config["payload_sizes"] = [int(s) for s in args.sizes.split(",")]
+    if args.min_time is not None:
+        config["min_time"] = args.min_time
+
+    setup_environment()
+    results = {}
+    for suite in [s.strip() for s in args.only.split(",") if s.strip()]:
+        if suite not in SUITES:
+            parser.error(f"unknown suite: {suite}")
+        module = importlib.import_module(f".bench_{suite}", __package__)
+        print(f"== {suite}", flush=True)
+        suite_results = module.run(config)
+        for name, result in suite_results.items():
+            extra = f"  {result['mb_per_s']:.1f} MB/s" if "mb_per_s" in result else ""
+            print(f"{name:50s} mean {result['mean_s'] * 1000:10.3f} ms  p95 {result['p95_s'] * 1000:10.3f} ms{extra}")
+        results.update(suite_results)
+
+    write_results(results, args.output)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        comparison = compare_results(results, args.baseline, args.threshold)
+        regressions = {k: v for k, v in comparison.items() if v["regression"]}
+        for name, row in sorted(comparison.items()):
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(f"{name:50s} {row['change'] * 100:+7.1f}%{flag}")
+        if regressions:
+            print(json.dumps(sorted(regressions)), file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+End-to-end /clipboard/history latency through the ASGI test client, with and without the response cache
+"""
+
+import time
+
+from .bench_db import seeded_database
+from .common import measure
+
+
+def run(config: dict) -> dict:
+    from fastapi.testclient import TestClient
+    import main
+
+    results = {}
+    original_db = main.db
+    try:
+        for rows in config["row_counts"]:
+            with seeded_database(rows) as db:
+                main.db = db
+                client = TestClient(main.app)
+                username, password = f"bench_{time.time_ns()}", "BenchPass123!"
+                form = {"Content-Type": "application/x-www-form-urlencoded"}
+                client.post("/register", data={"username": username, "password": password}, headers=form)
+                token = client.post("/login", data={"username": username, "password": password},
+                                    headers=form).json()["access_token"]
+                headers = {"Authorization": f"Bearer {token}"}
+
+                for limit in (10, 100):
+                    def fetch():
+                        response = client.get(f"/clipboard/history?limit={limit}", headers=headers)
+                        assert response.status_code == 200
+
+                    def fetch_uncached():
+                        # A new history version misses the response cache, as after a clipboard write
+                        db.bump_history_version()
+                        fetch()
+
+                    results[f"api.history.limit_{limit}.{rows}_rows"] = measure(
+                        fetch_uncached, min_time=config["min_time"])
+                    results[f"api.history.limit_{limit}.cached.{rows}_rows"] = measure(
+                        fetch, min_time=config["min_time"])
+    finally:
+        main.db = original_db
+    return results
@@ -0,0 +1,33 @@
+"""
+Per-item vs batched (encrypt_many / decrypt_many) crypto over a history-sized page
+"""
+
+import os
+
+from .common import measure, size_label
+
+
+def run(config: dict) -> dict:
+    from clipboard_crypto import clipboard_crypto
+
+    results = {}
+    count = config["batch_size"]
+    # A page of history entries; multi-MB payloads are covered per item by the crypto suite
+    for size in [s for s in config["payload_sizes"] if s <= 100 * 1024]:
+        contents = [os.urandom(size // 2 + 1).hex()[:size] for _ in range(count)]
+        encrypted = [clipboard_crypto.encrypt_content(c) for c in contents]
+        label = f"{count}x{size_label(size)}"
+
+        results[f"batch.encrypt_each.{label}"] = measure(
+            lambda: [clipboard_crypto.encrypt_content(c) for c in contents],
+            min_time=config["min_time"], bytes_per_op=size * count)
+        results[f"batch.encrypt_many.{label}"] = measure(
+            lambda: [r.value for r in clipboard_crypto.encrypt_many(contents)],
+            min_time=config["min_time"], bytes_per_op=size * count)
+        results[f"batch.decrypt_each.{label}"] = measure(
+            lambda: [clipboard_crypto.decrypt_content(e) for e in encrypted],
+            min_time=config["min_time"], bytes_per_op=size * count)
+        results[f"batch.decrypt_many.{label}"] = measure(
+            lambda: [r.value for r in clipboard_crypto.decrypt_many(encrypted)],
+            min_time=config["min_time"], bytes_per_op=size * count)
+    return results
@@ -0,0 +1,27 @@
+"""
+Fernet vs AES-256-GCM engine: throughput and stored bytes per payload size
+"""
+
+import os
+
+from .common import measure, size_label
+
+
+def run(config: dict) -> dict:
+    from clipboard_crypto import ClipboardCrypto
+
+    results = {}
+    engines = {name: ClipboardCrypto(cipher=name) for name in ("fernet", "aes-gcm")}
+    for size in config["payload_sizes"]:
+        content = os.urandom(size // 2 + 1).hex()[:size]
+        label = size_label(size)
+        for name, crypto in engines.items():
+            encrypted = crypto.encrypt_content(content)
+            encrypt = measure(lambda: crypto.encrypt_content(content),
+                              min_time=config["min_time"], bytes_per_op=size)
+            encrypt["stored_bytes"] = len(encrypted)
+            encrypt["expansion"] = len(encrypted) / size
+            results[f"cipher.{name}.encrypt.{label}"] = encrypt
+            results[f"cipher.{name}.decrypt.{label}"] = measure(
+                lambda: crypto.decrypt_content(encrypted), min_time=config["min_time"], bytes_per_op=size)
+    return results
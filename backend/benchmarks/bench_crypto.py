@@ -0,0 +1,27 @@
+"""
+ClipboardCrypto encrypt/decrypt throughput across payload sizes
+"""
+
+import os
+
+from .common import measure, size_label
+
+
+def run(config: dict) -> dict:
+    from clipboard_crypto import clipboard_crypto
+
+    results = {}
+    for size in config["payload_sizes"]:
+        # Printable payload so the str round-trip matches real clipboard text
+        content = os.urandom(size // 2 + 1).hex()[:size]
+        encrypted = clipboard_crypto.encrypt_content(content)
+        label = size_label(size)
+
+        results[f"crypto.encrypt.{label}"] = measure(
+            lambda: clipboard_crypto.encrypt_content(content),
+            min_time=config["min_time"], bytes_per_op=size)
+        results[f"crypto.decrypt.{label}"] = measure(
+            lambda: clipboard_crypto.decrypt_content(encrypted),
+            min_time=config["min_time"], bytes_per_op=size)
+        results[f"crypto.encrypt.{label}"]["stored_bytes"] = len(encrypted)
+    return results
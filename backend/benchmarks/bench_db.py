@@ -0,0 +1,49 @@
+"""
+ClipboardDB add_entry / get_history latency at increasing history sizes
+"""
+
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from .common import measure
+
+SEED_BATCH = 10000
+
+
+@contextmanager
+def seeded_database(rows: int, content: str = "benchmark clipboard entry " * 4):
+    """Yield a file-backed ClipboardDB holding `rows` encrypted entries"""
+    from clipboard_crypto import clipboard_crypto
+    from database import ClipboardDB
+
+    tmpdir = tempfile.mkdtemp(prefix="clipvault-bench-")
+    db = ClipboardDB(os.path.join(tmpdir, "bench.db"))
+    try:
+        # One ciphertext reused for every row keeps seeding fast; reads still decrypt each row
+        encrypted = clipboard_crypto.encrypt_content(content)
+        start = datetime(2020, 1, 1)
+        conn = db._connect()
+        for offset in range(0, rows, SEED_BATCH):
+            batch = [(encrypted, (start + timedelta(seconds=i)).isoformat())
+                     for i in range(offset, min(rows, offset + SEED_BATCH))]
+            conn.executemany("INSERT INTO clipboard_history (content, timestamp) VALUES (?, ?)", batch)
+            conn.commit()
+        yield db
+    finally:
+        db.engine.close()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def run(config: dict) -> dict:
+    results = {}
+    for rows in config["row_counts"]:
+        with seeded_database(rows) as db:
+            results[f"db.add_entry.{rows}_rows"] = measure(
+                lambda: db.add_entry("new benchmark entry"), min_time=config["min_time"], max_iterations=2000)
+            for limit in (10, 100):
+                results[f"db.get_history.limit_{limit}.{rows}_rows"] = measure(
+                    lambda: db.get_history(limit), min_time=config["min_time"])
+    return results
@@ -0,0 +1,44 @@
+"""
+Request latency with per-call gc.collect() (immediate scrub) vs the deferred ScrubScheduler
+"""
+
+import time
+
+from .bench_db import seeded_database
+from .common import measure
+
+
+def run(config: dict) -> dict:
+    from fastapi.testclient import TestClient
+    from clipboard_crypto import scrub_scheduler
+    import main
+
+    results = {}
+    original_db, original_mode = main.db, scrub_scheduler.immediate
+    # A realistically busy heap: full collections scale with live container objects
+    ballast = [{"i": i} for i in range(config["heap_objects"])]
+    try:
+        with seeded_database(1000) as db:
+            main.db = db
+            client = TestClient(main.app)
+            username, password = f"scrub_{time.time_ns()}", "ScrubPass123!"
+            form = {"Content-Type": "application/x-www-form-urlencoded"}
+            client.post("/register", data={"username": username, "password": password}, headers=form)
+            token = client.post("/login", data={"username": username, "password": password},
+                                headers=form).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            def fetch_history():
+                assert client.get("/clipboard/history?limit=10", headers=headers).status_code == 200
+
+            for mode, immediate in (("immediate", True), ("deferred", False)):
+                scrub_scheduler.immediate = immediate
+                results[f"scrub.{mode}.api_history"] = measure(fetch_history, min_time=config["min_time"])
+                results[f"scrub.{mode}.add_entry"] = measure(
+                    lambda: db.add_entry("scrub benchmark entry"), min_time=config["min_time"], max_iterations=2000)
+                results[f"scrub.{mode}.api_history"]["heap_objects"] = len(ballast)
+    finally:
+        scrub_scheduler.immediate = original_mode
+        main.db = original_db
+        del ballast
+    return results
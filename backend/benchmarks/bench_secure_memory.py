@@ -0,0 +1,31 @@
+"""
+SecureMemory.clear_string overhead on small and large heaps, SecureBuffer allocate/zero cost
+"""
+
+from .common import measure
+
+
+def run(config: dict) -> dict:
+    from clipboard_crypto import SecureMemory, SecureBuffer
+
+    results = {}
+    text = "x" * 1024
+    results["secure_memory.clear_string.small_heap"] = measure(
+        lambda: SecureMemory.clear_string(text), min_time=config["min_time"])
+
+    # Full collections scale with the number of live container objects
+    ballast = [{"i": i} for i in range(config["heap_objects"])]
+    results["secure_memory.clear_string.large_heap"] = measure(
+        lambda: SecureMemory.clear_string(text), min_time=config["min_time"])
+    results["secure_memory.clear_string.large_heap"]["heap_objects"] = len(ballast)
+    del ballast
+
+    def buffer_round_trip():
+        with SecureBuffer.from_bytes(payload):
+            pass
+
+    for size in (1024, 1024 * 1024):
+        payload = b"x" * size
+        results[f"secure_memory.secure_buffer.{size // 1024}KB"] = measure(
+            buffer_round_trip, min_time=config["min_time"], bytes_per_op=size)
+    return results
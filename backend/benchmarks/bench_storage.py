@@ -0,0 +1,72 @@
+"""
+The same storage workload (append, page, get, scan, delete, preferences) against every storage engine
+"""
+
+import os
+import random
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from .common import measure
+
+SEED_BATCH = 10000
+# Stands in for a stored (encrypted, base64) entry; engines never decrypt
+CONTENT = "gAAAAA" + "x" * 250
+
+
+@contextmanager
+def seeded_engine(name: str, rows: int):
+    """Yield a fresh engine of kind `name` holding `rows` entries (SQLite on a temporary file)"""
+    from storage import STORAGE_ENGINES, SQLiteEngine
+
+    tmpdir = tempfile.mkdtemp(prefix="clipvault-bench-")
+    engine = SQLiteEngine(os.path.join(tmpdir, "bench.db")) if name == SQLiteEngine.name else STORAGE_ENGINES[name]()
+    try:
+        engine.init_schema()
+        start = datetime(2020, 1, 1)
+        timestamps = ((start + timedelta(seconds=i)).isoformat() for i in range(rows))
+        if isinstance(engine, SQLiteEngine):
+            # One transaction per batch; per-row appends would dominate the run at 1M rows
+            for offset in range(0, rows, SEED_BATCH):
+                batch = [(CONTENT, next(timestamps)) for _ in range(min(SEED_BATCH, rows - offset))]
+                engine.conn.executemany("INSERT INTO clipboard_history (content, timestamp) VALUES (?, ?)", batch)
+                engine.conn.commit()
+        else:
+            for timestamp in timestamps:
+                engine.append(CONTENT, timestamp, None)
+        engine.create_user("bench", "hash")
+        yield engine
+    finally:
+        engine.close()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def run(config: dict) -> dict:
+    from storage import STORAGE_ENGINES
+
+    results = {}
+    for name in STORAGE_ENGINES:
+        for rows in config["row_counts"]:
+            with seeded_engine(name, rows) as engine:
+                prefix = f"storage.{name}"
+                min_time = config["min_time"]
+                ids = random.Random(rows).sample(range(1, rows + 1), min(10, rows))
+                results[f"{prefix}.append.{rows}_rows"] = measure(
+                    lambda: engine.append(CONTENT, datetime.now().isoformat(), None),
+                    min_time=min_time, max_iterations=2000)
+                for limit in (10, 100):
+                    results[f"{prefix}.page.limit_{limit}.{rows}_rows"] = measure(
+                        lambda: engine.page(limit), min_time=min_time)
+                results[f"{prefix}.get.10_ids.{rows}_rows"] = measure(lambda: engine.get(ids), min_time=min_time)
+                middle = rows // 2
+                results[f"{prefix}.scan.500.{rows}_rows"] = measure(
+                    lambda: engine.scan(middle, rows, 500), min_time=min_time)
+                results[f"{prefix}.append_delete.{rows}_rows"] = measure(
+                    lambda: engine.delete([engine.append(CONTENT, datetime.now().isoformat(), None)]),
+                    min_time=min_time, max_iterations=2000)
+                results[f"{prefix}.preferences.{rows}_rows"] = measure(
+                    lambda: (engine.set_preferences("bench", {"limit": rows}), engine.get_preferences("bench")),
+                    min_time=min_time)
+    return results
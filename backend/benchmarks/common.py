@@ -0,0 +1,127 @@
+"""
+Shared benchmark helpers: in-process keyring, timing loop and JSON result handling
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+import keyring
+from keyring.backend import KeyringBackend
+
+# Make backend modules importable when run as `python -m benchmarks` from backend/
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+class InMemoryKeyring(KeyringBackend):
+    """Process-local keyring so benchmarks never touch (or wait on) the OS key store"""
+
+    priority = 1
+
+    def __init__(self):
+        super().__init__()
+        self._passwords = {}
+
+    def get_password(self, service, username):
+        return self._passwords.get((service, username))
+
+    def set_password(self, service, username, password):
+        self._passwords[(service, username)] = password
+
+    def delete_password(self, service, username):
+        self._passwords.pop((service, username), None)
+
+
+def setup_environment() -> None:
+    """Install the in-memory keyring and quiet the app; call before importing backend modules"""
+    keyring.set_keyring(InMemoryKeyring())
+    os.environ.setdefault("CLIPVAULT_DISABLE_CLIPBOARD", "1")
+    os.environ.setdefault("CLIPVAULT_RATE_LIMIT", "0")
+    import logging
+    logging.disable(logging.INFO)
+
+
+def measure(fn: Callable[[], object], min_time: float = 0.5, max_iterations: int = 100000,
+            min_iterations: int = 3, bytes_per_op: Optional[int] = None) -> Dict[str, float]:
+    """
+    Call `fn` repeatedly and summarize per-call latency
+
+    Runs until `min_time` seconds have elapsed (at least `min_iterations`
+    calls, at most `max_iterations`).
+    """
+    fn()  # warm-up
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_iterations:
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+        if len(samples) >= min_iterations and start >= deadline:
+            break
+
+    samples.sort()
+    mean = statistics.fmean(samples)
+    result = {
+        "iterations": len(samples),
+        "mean_s": mean,
+        "p50_s": samples[len(samples) // 2],
+        "p95_s": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "min_s": samples[0],
+        "ops_per_s": 1.0 / mean if mean else float("inf"),
+    }
+    if bytes_per_op is not None:
+        result["mb_per_s"] = (bytes_per_op / (1024 * 1024)) / mean if mean else float("inf")
+    return result
+
+
+def size_label(size: int) -> str:
+    for unit, factor in (("MB", 1024 * 1024), ("KB", 1024)):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return f"{size}B"
+
+
+def write_results(results: Dict[str, dict], path: str) -> dict:
+    document = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+    return document
+
+
+def compare_results(results: Dict[str, dict], baseline_path: str, threshold: float = 0.10) -> Dict[str, dict]:
+    """
+    Compare mean latency against a baseline results file
+
+    Returns:
+        {name: {"baseline_s", "current_s", "change"}} for benchmarks present in both runs,
+        where change is the relative slowdown (positive = slower)
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f).get("results", {})
+    comparison = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get("mean_s"):
+            continue
+        change = (current["mean_s"] - previous["mean_s"]) / previous["mean_s"]
+        comparison[name] = {
+            "baseline_s": previous["mean_s"],
+            "current_s": current["mean_s"],
+            "change": change,
+            "regression": change > threshold,
+        }
+    return comparison
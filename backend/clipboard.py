@@ -1,6 +1,10 @@
 import pyperclip
 from threading import Thread, Lock
 import time
+import logging
+from metrics import CLIPBOARD_POLLS, CLIPBOARD_CHANGES
+
+logger = logging.getLogger(__name__)
 
 class ClipboardManager:
     def __init__(self):
@@ -13,21 +17,20 @@ class ClipboardManager:
 
     def _monitor_clipboard(self):
         while self.running:
+            CLIPBOARD_POLLS.inc()
             try:
                 with self.lock:
                     current_content = pyperclip.paste().strip()
-                    if not current_content:
-                        continue
-                    if current_content != self.last_copied:
-                        print("current: ", current_content)
-                        print("last: ", self.last_copied)
+                    # Never log clipboard contents, only that something changed
+                    if current_content and current_content != self.last_copied:
                         self.last_copied = current_content
+                        CLIPBOARD_CHANGES.inc()
+                        logger.debug("Clipboard changed")
                         
                         if self.db:
-                            print("Adding to DB.")
                             self.db.add_entry(current_content)
             except Exception as e:
-                print(f"Error monitoring clipboard: {e}")
+                logger.error(f"Error monitoring clipboard: {e}")
             time.sleep(1)
 
     def get_clipboard_content(self):
@@ -35,7 +38,7 @@ class ClipboardManager:
         try:
             return pyperclip.paste()
         except Exception as e:
-            print(f"Error accessing clipboard: {str(e)}")
+            logger.error(f"Error accessing clipboard: {str(e)}")
             return None
 
     def set_clipboard_content(self, content: str):
@@ -45,7 +48,7 @@ class ClipboardManager:
                 self.last_copied = content.strip()
             return True
         except Exception as e:
-            print(f"Error setting clipboard: {e}")
+            logger.error(f"Error setting clipboard: {e}")
             return False
 
     def start_monitoring(self, db):
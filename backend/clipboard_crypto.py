@@ -6,17 +6,106 @@ Handles encryption/decryption of clipboard content with secure memory management
 import os
 import gc
 import ctypes
+import ctypes.util
+import mmap
+import struct
 import sys
-from typing import Optional, Union
-from cryptography.fernet import Fernet
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Iterable, Iterator, NamedTuple, Optional, Union
+from cryptography.fernet import InvalidToken
+from cryptography.hazmat.primitives import hashes, hmac
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.backends import default_backend
 import base64
 import logging
-from secure_storage import key_manager
+import time
+from secure_storage import key_manager, unlock_mode, UNLOCK_PASSWORD
+from metrics import CRYPTO_LATENCY, CRYPTO_BYTES
+from startup import Lazy
 
 logger = logging.getLogger(__name__)
 
+class VaultLockedError(RuntimeError):
+    """Raised when the vault key is needed while the vault is locked (master-password mode)"""
+
+class ScrubScheduler:
+    """
+    Batches SecureMemory collection requests and runs them off the request path
+
+    Any number of requests within `interval` seconds result in a single
+    young-generation collection on a background thread. `collect_now` is the
+    synchronous full collection for key rotation.
+    """
+
+    def __init__(self, interval: float = 1.0, generation: int = 0, immediate: bool = False):
+        """
+        Args:
+            interval: Minimum seconds between background collections
+            generation: GC generation collected in the background (0 = youngest)
+            immediate: Collect synchronously on every request (legacy behaviour)
+        """
+        self.interval = interval
+        self.generation = generation
+        self.immediate = immediate
+        self.requests = 0
+        self.collections = 0
+        self._pending = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls) -> "ScrubScheduler":
+        """CLIPVAULT_SCRUB_INTERVAL seconds (default 1.0); CLIPVAULT_SCRUB_IMMEDIATE=1 restores per-call gc"""
+        try:
+            interval = float(os.getenv("CLIPVAULT_SCRUB_INTERVAL", "1.0"))
+        except ValueError:
+            interval = 1.0
+        return cls(interval=interval, immediate=os.getenv("CLIPVAULT_SCRUB_IMMEDIATE", "0") == "1")
+
+    def request(self) -> None:
+        """Ask for a collection; returns immediately unless in immediate mode"""
+        self.requests += 1
+        if self.immediate:
+            gc.collect()
+            self.collections += 1
+            return
+        self._pending.set()
+        if self._thread is None:
+            self._start()
+
+    def collect_now(self) -> None:
+        """Full synchronous collection (escape hatch for key rotation)"""
+        self._pending.clear()
+        gc.collect()
+        self.collections += 1
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="clipvault-scrub", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._pending.wait()
+            self._pending.clear()
+            try:
+                gc.collect(self.generation)
+                self.collections += 1
+            except Exception as e:
+                logger.debug(f"Background scrub failed: {e}")
+            # Requests arriving while we sleep are coalesced into the next collection
+            time.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "collections": self.collections, "interval": self.interval}
+
+scrub_scheduler = ScrubScheduler.from_env()
+
 class SecureMemory:
     """Utilities for secure memory management and clearing"""
     
@@ -27,8 +116,8 @@ class SecureMemory:
         Note: This is a best-effort approach as Python strings are immutable
         """
         try:
-            # Force garbage collection
-            gc.collect()
+            # Schedule a (batched, background) collection instead of collecting inline
+            scrub_scheduler.request()
             
             # Avoid risky ctypes memory overwrites by default (can cause access violations on Windows)
             # Enable only if explicitly opted-in for specialized environments.
@@ -51,11 +140,12 @@ class SecureMemory:
         Attempt to clear bytes from memory
         """
         try:
-            if hasattr(b, '__array_interface__'):
-                # If it's a mutable buffer, we can zero it
-                for i in range(len(b)):
-                    b[i] = 0
-            gc.collect()
+            if isinstance(b, SecureBuffer):
+                b.release()
+            elif isinstance(b, (bytearray, memoryview)) and not (isinstance(b, memoryview) and b.readonly):
+                # Mutable buffers can really be zeroed
+                b[:] = bytes(len(b))
+            scrub_scheduler.request()
         except Exception as e:
             logger.debug(f"Bytes clearing attempt failed: {e}")
 
@@ -64,35 +154,495 @@ class SecureMemory:
         """Return True if dangerous ctypes clearing is explicitly enabled via env."""
         return os.getenv("CLIPVAULT_ENABLE_CTYPE_CLEAR", "0") == "1"
 
+_libc = None
+
+def _get_libc():
+    """Load libc once for mlock/munlock (None where unavailable)"""
+    global _libc
+    if _libc is None:
+        try:
+            _libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        except Exception:
+            _libc = False
+    return _libc or None
+
+class SecureBuffer:
+    """
+    Mutable secret buffer backed by an anonymous mmap region
+
+    On Linux/macOS the region is mlock'ed so it is never swapped out. The
+    bytes are zeroed on release(), on context exit and on garbage collection,
+    which (unlike clear_string) really removes the secret from memory.
+    """
+
+    def __init__(self, size: int):
+        self._capacity = max(1, size)
+        self._size = size
+        self._mmap = mmap.mmap(-1, self._capacity)
+        # Take the address without keeping a buffer export alive (exports block close())
+        anchor = (ctypes.c_char * self._capacity).from_buffer(self._mmap)
+        self._address = ctypes.addressof(anchor)
+        del anchor
+        self._view = memoryview(self._mmap)
+        self.locked = self._mlock()
+
+    @classmethod
+    def from_bytes(cls, data) -> "SecureBuffer":
+        buf = cls(len(data))
+        buf._view[:len(data)] = data
+        return buf
+
+    @classmethod
+    def from_str(cls, text: str) -> "SecureBuffer":
+        encoded = text.encode("utf-8")
+        try:
+            return cls.from_bytes(encoded)
+        finally:
+            SecureMemory.clear_bytes(encoded)
+
+    def _mlock(self) -> bool:
+        if not sys.platform.startswith(("linux", "darwin")):
+            return False
+        libc = _get_libc()
+        if libc is None:
+            return False
+        if libc.mlock(ctypes.c_void_p(self._address), ctypes.c_size_t(self._capacity)) != 0:
+            # Typically RLIMIT_MEMLOCK; the buffer is still zeroed on release
+            logger.debug(f"mlock failed (errno {ctypes.get_errno()}), buffer not page-locked")
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def released(self) -> bool:
+        return self._view is None
+
+    def view(self) -> memoryview:
+        """Writable view of the logical contents (no copy)"""
+        if self._view is None:
+            raise ValueError("SecureBuffer already released")
+        return self._view[:self._size]
+
+    def writable(self) -> memoryview:
+        """Writable view of the full capacity, for update_into-style producers"""
+        if self._view is None:
+            raise ValueError("SecureBuffer already released")
+        return self._view
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def reset(self) -> None:
+        """Zero the contents and expose the full capacity again, for reuse as scratch space"""
+        if self._view is None:
+            raise ValueError("SecureBuffer already released")
+        # Bytes past the logical size are already zero (fresh mmap, or zeroed by truncate),
+        # so a reused scratch buffer costs the previous item's length, not the largest one's
+        ctypes.memset(self._address, 0, self._size)
+        self._size = self._capacity
+
+    def truncate(self, size: int) -> None:
+        """Shrink the logical size, zeroing the dropped tail"""
+        if size < self._size:
+            ctypes.memset(self._address + size, 0, self._size - size)
+        self._size = size
+
+    def decode(self, encoding: str = "utf-8") -> str:
+        """Decode into the (single) str copy handed back to callers"""
+        return str(self.view(), encoding)
+
+    def release(self) -> None:
+        """Zero, unlock and unmap the region"""
+        if self._view is None:
+            return
+        ctypes.memset(self._address, 0, self._capacity)
+        self._view.release()
+        self._view = None
+        if self.locked:
+            _get_libc().munlock(ctypes.c_void_p(self._address), ctypes.c_size_t(self._capacity))
+            self.locked = False
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A caller still holds a view; contents are already zeroed
+            pass
+
+    def __enter__(self) -> "SecureBuffer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def __del__(self):
+        try:
+            self.release()
+        except Exception:
+            pass
+
+# Fernet token layout: version | timestamp | IV | ciphertext | HMAC-SHA256
+_FERNET_VERSION = 0x80
+_FERNET_HEADER = 1 + 8 + 16
+_HMAC_SIZE = 32
+_BLOCK_SIZE = 16
+
+# Versioned envelope: version byte | algorithm byte | engine payload (single base64 layer on disk)
+ENVELOPE_VERSION = 0x01
+ALG_AES_256_GCM = 0x01
+
+class CipherEngine(ABC):
+    """Interface for clipboard cipher engines"""
+
+    name = ""
+
+    @abstractmethod
+    def seal(self, data) -> str:
+        """Encrypt bytes-like plaintext and return the stored (base64 text) form"""
+
+    @abstractmethod
+    def open_into(self, payload: bytes, out: Optional[SecureBuffer] = None) -> SecureBuffer:
+        """
+        Authenticate and decrypt a decoded payload
+
+        Plaintext is written into `out` when it is large enough (batch scratch
+        space), otherwise into a new SecureBuffer which the caller releases.
+        """
+
+    def release(self) -> None:
+        """Drop cached key schedules; the engine is unusable afterwards"""
+
+def _output_buffer(out: Optional[SecureBuffer], needed: int) -> SecureBuffer:
+    if out is not None and not out.released and out.capacity >= needed:
+        out.reset()
+        return out
+    return SecureBuffer(needed)
+
+def _discard_output(buf: SecureBuffer, out: Optional[SecureBuffer]) -> None:
+    """Scrub a failed decryption: zero reused scratch space, release fresh buffers"""
+    if buf is out:
+        buf.truncate(0)
+    else:
+        buf.release()
+
+class FernetEngine(CipherEngine):
+    """
+    AES-128-CBC + HMAC-SHA256 in the Fernet token format
+
+    Implemented on cryptography primitives so plaintext is read from and
+    decrypted into caller buffers. Stored as base64(Fernet token), the
+    original row format, so these rows carry no envelope header.
+    """
+
+    name = "fernet"
+
+    def __init__(self, key: SecureBuffer):
+        # Fernet key: 16 byte signing key + 16 byte AES key
+        self._key = key
+        # Built once and reused: the AES key object and an HMAC context copied per token
+        view = key.view()
+        self._aes = algorithms.AES(view[16:])
+        self._signer = hmac.HMAC(view[:16], hashes.SHA256())
+        view.release()
+
+    def seal(self, data) -> str:
+        iv = os.urandom(16)
+        header = struct.pack(">BQ", _FERNET_VERSION, int(time.time())) + iv
+        encryptor = Cipher(self._aes, modes.CBC(iv)).encryptor()
+        pad = _BLOCK_SIZE - (len(data) % _BLOCK_SIZE)
+        # Plaintext is read straight from the caller's buffer; only ciphertext is allocated
+        ciphertext = encryptor.update(data) + encryptor.update(bytes([pad]) * pad) + encryptor.finalize()
+        signer = self._signer.copy()
+        signer.update(header)
+        signer.update(ciphertext)
+        token = header + ciphertext + signer.finalize()
+        # Fernet tokens are url-safe base64, stored with a second base64 layer (existing row format)
+        return base64.b64encode(base64.urlsafe_b64encode(token)).decode('ascii')
+
+    def open_into(self, payload: bytes, out: Optional[SecureBuffer] = None) -> SecureBuffer:
+        token = base64.urlsafe_b64decode(payload)
+        if len(token) < _FERNET_HEADER + _BLOCK_SIZE + _HMAC_SIZE or token[0] != _FERNET_VERSION:
+            raise InvalidToken()
+        verifier = self._signer.copy()
+        verifier.update(token[:-_HMAC_SIZE])
+        try:
+            verifier.verify(token[-_HMAC_SIZE:])
+        except Exception:
+            raise InvalidToken()
+        ciphertext = memoryview(token)[_FERNET_HEADER:-_HMAC_SIZE]
+        decryptor = Cipher(self._aes, modes.CBC(token[9:_FERNET_HEADER])).decryptor()
+        buf = _output_buffer(out, len(ciphertext) + _BLOCK_SIZE - 1)
+        try:
+            written = decryptor.update_into(ciphertext, buf.writable())
+            decryptor.finalize()
+            pad = buf.writable()[written - 1] if written else 0
+            if not 1 <= pad <= _BLOCK_SIZE:
+                raise InvalidToken()
+            buf.truncate(written)
+            buf.truncate(written - pad)
+            return buf
+        except Exception:
+            _discard_output(buf, out)
+            raise
+
+    def release(self) -> None:
+        # The cached AES object holds a view of the key buffer, which would keep it mapped
+        self._aes = None
+        self._signer = None
+
+class AESGCMEngine(CipherEngine):
+    """
+    AES-256-GCM (AES-NI accelerated through cryptography/OpenSSL)
+
+    One pass over the data, no padding, 28 bytes of overhead and a single
+    base64 layer. The 256-bit key is derived with HKDF from the vault key,
+    so no extra key has to be stored.
+    """
+
+    name = "aes-gcm"
+    algorithm_id = ALG_AES_256_GCM
+    NONCE_SIZE = 12
+    TAG_SIZE = 16
+
+    def __init__(self, vault_key: SecureBuffer):
+        derived = HKDF(algorithm=hashes.SHA256(), length=32, salt=None,
+                       info=b"clipvault clipboard aes-256-gcm").derive(vault_key.view())
+        self._key = SecureBuffer.from_bytes(derived)
+        SecureMemory.clear_bytes(derived)
+        self._header = bytes([ENVELOPE_VERSION, self.algorithm_id])
+        # One-shot AEAD for sealing, streaming AES object for decrypting into buffers
+        self._aead = AESGCM(self._key.view())
+        self._aes = algorithms.AES(self._key.view())
+
+    def seal(self, data) -> str:
+        nonce = os.urandom(self.NONCE_SIZE)
+        # The envelope header is authenticated so the algorithm byte can't be swapped
+        sealed = self._aead.encrypt(nonce, data, self._header)
+        return base64.b64encode(self._header + nonce + sealed).decode('ascii')
+
+    def open_into(self, payload: bytes, out: Optional[SecureBuffer] = None) -> SecureBuffer:
+        body = memoryview(payload)[2:]
+        if len(body) < self.NONCE_SIZE + self.TAG_SIZE:
+            raise InvalidToken()
+        nonce = body[:self.NONCE_SIZE]
+        ciphertext = body[self.NONCE_SIZE:-self.TAG_SIZE]
+        decryptor = Cipher(self._aes, modes.GCM(bytes(nonce), bytes(body[-self.TAG_SIZE:]))).decryptor()
+        decryptor.authenticate_additional_data(self._header)
+        buf = _output_buffer(out, len(ciphertext) + _BLOCK_SIZE - 1)
+        try:
+            written = decryptor.update_into(ciphertext, buf.writable())
+            # Tag check; on failure the unauthenticated plaintext is zeroed by release()
+            decryptor.finalize()
+            buf.truncate(written)
+            return buf
+        except Exception:
+            _discard_output(buf, out)
+            raise InvalidToken()
+
+    def release(self) -> None:
+        self._aead = None
+        self._aes = None
+        self._key.release()
+
+CIPHER_ENGINES = {FernetEngine.name: FernetEngine, AESGCMEngine.name: AESGCMEngine}
+
+class _KeySet:
+    """
+    One generation of key material: the vault key, its engines and the fingerprint signer
+
+    The engines keep views onto the key buffer, so zeroing it under a
+    running seal() would silently encrypt with an all-zero key. Users are
+    counted (under ClipboardCrypto's lock) and a retired set is released
+    by whichever of retire() or the last user comes second.
+    """
+
+    def __init__(self, key: SecureBuffer):
+        self.key = key
+        self.fernet = FernetEngine(key)
+        self.gcm = AESGCMEngine(key)
+        fingerprint_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None,
+                               info=b"clipvault entry fingerprint").derive(key.view())
+        self.fingerprinter = hmac.HMAC(fingerprint_key, hashes.SHA256())
+        SecureMemory.clear_bytes(fingerprint_key)
+        self.users = 0
+        self.retired = False
+
+    def engine(self, cipher: str) -> CipherEngine:
+        return self.gcm if cipher == AESGCMEngine.name else self.fernet
+
+    def release(self) -> None:
+        self.fernet.release()
+        self.gcm.release()
+        self.fingerprinter = None
+        self.key.release()
+
+class CryptoResult(NamedTuple):
+    """Per-item outcome of a batch operation: `value` on success, otherwise `error`"""
+
+    value: object
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
 class ClipboardCrypto:
     """Handles encryption and decryption of clipboard content"""
     
-    def __init__(self):
-        """Initialize clipboard encryption with key from secure storage"""
-        self._fernet = None
+    def __init__(self, cipher: Optional[str] = None, locked: bool = False):
+        """
+        Initialize clipboard encryption with key from secure storage
+        
+        Args:
+            cipher: Engine used for new entries ("fernet" or "aes-gcm");
+                defaults to CLIPVAULT_CIPHER, then "fernet". All engines can decrypt.
+            locked: Start without a key; it is loaded by load_key() once the
+                key source (e.g. the master-password vault) is unlocked
+        """
+        self.cipher = (cipher or os.getenv("CLIPVAULT_CIPHER", FernetEngine.name)).lower()
+        if self.cipher not in CIPHER_ENGINES:
+            raise ValueError(f"Unknown cipher engine: {self.cipher}")
+        # Anything with get_clipboard_key()/rotate_clipboard_key(); the vault replaces it in password mode
+        self.key_source = key_manager
+        self.last_used = time.monotonic()
+        # Current _KeySet (None while locked); swapped and counted under _keys_lock
+        self._keys = None
+        self._keys_lock = threading.Lock()
+        if not locked:
+            self._init_encryption()
+
+    @property
+    def locked(self) -> bool:
+        return self._keys is None
+
+    def load_key(self):
+        """(Re)load the vault key from the key source"""
         self._init_encryption()
+
+    def unload_key(self):
+        """
+        Drop the engines and zero the vault key; crypto calls raise VaultLockedError until load_key()
+
+        Calls already running finish with the old key, which is zeroed as the last one returns.
+        """
+        self._swap_keys(None)
+
+    def _swap_keys(self, keys: Optional[_KeySet]) -> None:
+        with self._keys_lock:
+            old, self._keys = self._keys, keys
+            if old is None:
+                return
+            old.retired = True
+            idle = old.users == 0
+        if idle:
+            old.release()
+
+    @contextmanager
+    def _using_keys(self) -> Iterator[_KeySet]:
+        """The current key set, kept from being zeroed until the block exits"""
+        with self._keys_lock:
+            keys = self._keys
+            if keys is None:
+                raise VaultLockedError("Vault is locked")
+            keys.users += 1
+        self.last_used = time.monotonic()
+        try:
+            yield keys
+        finally:
+            with self._keys_lock:
+                keys.users -= 1
+                done = keys.retired and keys.users == 0
+            if done:
+                keys.release()
     
     def _init_encryption(self):
-        """Initialize Fernet encryption with key from secure storage"""
+        """Load the vault key from secure storage into a locked SecureBuffer and build the engines"""
         try:
-            key = key_manager.get_clipboard_key()
+            key = self.key_source.get_clipboard_key()
             if not key:
                 raise ValueError("No clipboard encryption key found in secure storage")
             
-            # Convert key string back to bytes for Fernet
-            key_bytes = key.encode('utf-8')
-            self._fernet = Fernet(key_bytes)
+            # Fernet key: 32 url-safe base64 bytes = 16 byte signing key + 16 byte AES key
+            key_bytes = base64.urlsafe_b64decode(key.encode('utf-8'))
+            if len(key_bytes) != 32:
+                raise ValueError("Clipboard encryption key has an invalid length")
+            self._swap_keys(_KeySet(SecureBuffer.from_bytes(key_bytes)))
             
-            # Clear the key from local memory (after Fernet is initialized)
-            # Note: We clear a copy, not the original variables that Fernet might still reference
-            key_copy = key
-            key_bytes_copy = key_bytes
-            SecureMemory.clear_string(key_copy)
-            SecureMemory.clear_bytes(key_bytes_copy)
+            # Clear the transient copies from secure storage
+            SecureMemory.clear_string(key)
+            SecureMemory.clear_bytes(key_bytes)
             
         except Exception as e:
             logger.error(f"Failed to initialize clipboard encryption: {e}")
             raise
+
+    def fingerprint(self, content: Union[str, bytes, memoryview], timestamp: str) -> str:
+        """
+        Keyed digest of an entry (plaintext + timestamp) for duplicate detection
+
+        HMAC-SHA256 under a key derived from the vault key, so identical
+        entries can be matched without storing a plaintext hash that anyone
+        holding the database could test guesses against.
+        """
+        with self._using_keys() as keys:
+            digest = keys.fingerprinter.copy()
+        digest.update(timestamp.encode("utf-8") + b"\0")
+        digest.update(content.encode("utf-8") if isinstance(content, str) else content)
+        return digest.finalize().hex()
+
+    def _encrypt_view(self, data) -> str:
+        """Encrypt any bytes-like plaintext with the active engine"""
+        with self._using_keys() as keys:
+            return keys.engine(self.cipher).seal(data)
+
+    def _decrypt_into(self, encrypted_content: str, out: Optional[SecureBuffer] = None) -> SecureBuffer:
+        with self._using_keys() as keys:
+            return self._open_with(keys, encrypted_content, out)
+
+    @staticmethod
+    def _open_with(keys: _KeySet, encrypted_content: str, out: Optional[SecureBuffer] = None) -> SecureBuffer:
+        """Dispatch on the envelope header; headerless values are legacy Fernet rows"""
+        payload = base64.b64decode(encrypted_content)
+        if payload[:1] == bytes([ENVELOPE_VERSION]):
+            if payload[1:2] == bytes([ALG_AES_256_GCM]):
+                return keys.gcm.open_into(payload, out)
+            raise InvalidToken()
+        return keys.fernet.open_into(payload, out)
+
+    def encrypt_buffer(self, buf: SecureBuffer) -> str:
+        """
+        Encrypt plaintext held in a SecureBuffer (no intermediate plaintext copies)
+        
+        Returns:
+            Base64 encoded encrypted content
+        """
+        try:
+            start = time.perf_counter()
+            encrypted_b64 = self._encrypt_view(buf.view())
+            CRYPTO_LATENCY.observe(time.perf_counter() - start, "encrypt")
+            CRYPTO_BYTES.inc("encrypt", amount=len(buf))
+            return encrypted_b64
+        except Exception as e:
+            logger.error(f"Failed to encrypt clipboard content: {e}")
+            raise
+
+    def decrypt_to_buffer(self, encrypted_content: str) -> SecureBuffer:
+        """
+        Decrypt stored content into a new SecureBuffer; the caller releases it
+        
+        Args:
+            encrypted_content: Base64 encoded encrypted content
+        """
+        try:
+            start = time.perf_counter()
+            buf = self._decrypt_into(encrypted_content)
+            CRYPTO_LATENCY.observe(time.perf_counter() - start, "decrypt")
+            CRYPTO_BYTES.inc("decrypt", amount=len(buf))
+            return buf
+        except Exception as e:
+            logger.error(f"Failed to decrypt clipboard content: {e}")
+            raise
     
     def encrypt_content(self, content: str) -> str:
         """
@@ -108,15 +658,15 @@ class ClipboardCrypto:
             return ""
         
         try:
+            start = time.perf_counter()
             # Convert content to bytes
             content_bytes = content.encode('utf-8')
             
-            # Encrypt the content
-            encrypted_bytes = self._fernet.encrypt(content_bytes)
-            
-            # Encode to base64 for storage
-            encrypted_b64 = base64.b64encode(encrypted_bytes).decode('utf-8')
+            # Encrypt the content and encode for storage
+            encrypted_b64 = self._encrypt_view(content_bytes)
             
+            CRYPTO_LATENCY.observe(time.perf_counter() - start, "encrypt")
+            CRYPTO_BYTES.inc("encrypt", amount=len(content_bytes))
             return encrypted_b64
             
         except Exception as e:
@@ -137,27 +687,108 @@ class ClipboardCrypto:
             return ""
         
         try:
-            # Decode from base64
-            encrypted_bytes = base64.b64decode(encrypted_content.encode('utf-8'))
-            
-            # Decrypt the content
-            decrypted_bytes = self._fernet.decrypt(encrypted_bytes)
-            
-            # Convert back to string
-            decrypted_content = decrypted_bytes.decode('utf-8')
+            start = time.perf_counter()
+            # Decrypt into a locked buffer, then make the one str copy callers need
+            with self._decrypt_into(encrypted_content) as buf:
+                decrypted_content = buf.decode('utf-8')
+                plaintext_size = len(buf)
             
+            CRYPTO_LATENCY.observe(time.perf_counter() - start, "decrypt")
+            CRYPTO_BYTES.inc("decrypt", amount=plaintext_size)
             return decrypted_content
             
         except Exception as e:
             logger.error(f"Failed to decrypt clipboard content: {e}")
             raise
     
+    def encrypt_many(self, items: Iterable[Union[str, bytes, SecureBuffer]]) -> Iterator["CryptoResult"]:
+        """
+        Encrypt a batch of plaintexts, yielding one CryptoResult per item in order
+
+        Metrics are recorded once when the batch finishes. A failing item
+        yields a result carrying the error instead of aborting the batch; the
+        vault locking mid-batch raises VaultLockedError from the next item.
+        """
+        if self.locked:
+            raise VaultLockedError("Vault is locked")
+        elapsed = 0.0
+        total = 0
+        try:
+            for item in items:
+                start = time.perf_counter()
+                try:
+                    if isinstance(item, SecureBuffer):
+                        data = item.view()
+                    elif isinstance(item, str):
+                        data = item.encode('utf-8')
+                    else:
+                        data = item
+                    result = CryptoResult(self._encrypt_view(data) if len(data) else "")
+                    total += len(data)
+                except VaultLockedError:
+                    raise
+                except Exception as e:
+                    result = CryptoResult(None, e)
+                elapsed += time.perf_counter() - start
+                yield result
+        finally:
+            CRYPTO_LATENCY.observe(elapsed, "encrypt_many")
+            CRYPTO_BYTES.inc("encrypt", amount=total)
+
+    def decrypt_many(self, items: Iterable[str], as_buffer: bool = False) -> Iterator["CryptoResult"]:
+        """
+        Decrypt a batch of stored values, yielding one CryptoResult per item in order
+
+        With as_buffer=False every item is decrypted into one reused locked
+        scratch buffer (grown when an item doesn't fit) and returned as str,
+        so the batch costs a single mmap/mlock instead of one per row. With
+        as_buffer=True each value is a SecureBuffer owned by the caller.
+        Corrupted or foreign items yield a result carrying the error; a locked
+        vault raises VaultLockedError instead.
+        """
+        if self.locked:
+            raise VaultLockedError("Vault is locked")
+        scratch = None
+        elapsed = 0.0
+        total = 0
+        try:
+            for item in items:
+                start = time.perf_counter()
+                try:
+                    if not item:
+                        result = CryptoResult(SecureBuffer(0) if as_buffer else "")
+                    elif as_buffer:
+                        buf = self._decrypt_into(item)
+                        total += len(buf)
+                        result = CryptoResult(buf)
+                    else:
+                        buf = self._decrypt_into(item, scratch)
+                        if buf is not scratch:
+                            if scratch is not None:
+                                scratch.release()
+                            scratch = buf
+                        total += len(buf)
+                        result = CryptoResult(buf.decode('utf-8'))
+                except VaultLockedError:
+                    raise
+                except Exception as e:
+                    result = CryptoResult(None, e)
+                elapsed += time.perf_counter() - start
+                yield result
+        finally:
+            if scratch is not None:
+                scratch.release()
+            CRYPTO_LATENCY.observe(elapsed, "decrypt_many")
+            CRYPTO_BYTES.inc("decrypt", amount=total)
+
     def rotate_key(self):
         """Rotate the encryption key (note: this will invalidate existing encrypted data)"""
         try:
             logger.warning("Rotating clipboard encryption key - existing encrypted data will become inaccessible")
-            key_manager.rotate_clipboard_key()
+            self.key_source.rotate_clipboard_key()
             self._init_encryption()
+            # Don't leave the old key material to the background scrubber
+            scrub_scheduler.collect_now()
         except Exception as e:
             logger.error(f"Failed to rotate encryption key: {e}")
             raise
@@ -208,4 +839,5 @@ class SecureString:
         self.content = None
 
 # Global instance for the application
-clipboard_crypto = ClipboardCrypto()
\ No newline at end of file
+# Built on first use; in master-password mode the key is loaded when the vault is unlocked (see vault.py)
+clipboard_crypto = Lazy("clipboard_crypto", lambda: ClipboardCrypto(locked=unlock_mode() == UNLOCK_PASSWORD))
\ No newline at end of file
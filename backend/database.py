@@ -1,147 +1,414 @@
-import sqlite3
 import threading
+from contextlib import contextmanager
+import time
 from datetime import datetime
 import os
 import logging
-from passlib.context import CryptContext
-from clipboard_crypto import clipboard_crypto, SecureMemory, SecureString
-import json
+from clipboard_crypto import clipboard_crypto, SecureBuffer, SecureMemory, SecureString
+from collections import deque
+from typing import List, Optional, Tuple, Union
+from metrics import DB_OPERATION_LATENCY, DB_LOCK_WAIT, timed
+from storage import SQLiteEngine, StorageEngine, UnsupportedOperation, engine_from_env
 
-from passlib.context import CryptContext
+_pwd_context = None
 
-# Password hashing (pbkdf2_sha256)
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+def get_pwd_context():
+    """Password hashing context (pbkdf2_sha256); passlib is imported on first use"""
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+    return _pwd_context
 logger = logging.getLogger(__name__)
 
 class ClipboardDB:
-    def __init__(self, db_path="clipboard_history.db"):
+    def __init__(self, db_path="clipboard_history.db", engine: Optional[StorageEngine] = None):
         # Test/CI mode?
         self._test_mode = (os.getenv("PYTEST_CURRENT_TEST") is not None) or (os.getenv("CI", "false").lower() == "true")
         self.db_path = db_path
         # Serialize DB access
         self._lock = threading.RLock()
-        # Single shared connection for app lifetime
-        if self._test_mode:
-            # In-memory DB for tests to avoid Windows file locks
-            self._conn = sqlite3.connect(":memory:", timeout=10, check_same_thread=False)
-        else:
-            # Use absolute path to avoid relative path issues in packaged apps
-            abs_db_path = os.path.abspath(self.db_path)
-            self._conn = sqlite3.connect(abs_db_path, timeout=30, check_same_thread=False)
-        try:
-            c = self._conn.cursor()
-            c.execute("PRAGMA journal_mode=WAL;")
-            c.execute("PRAGMA synchronous=NORMAL;")
-            c.execute("PRAGMA busy_timeout=5000;")
-            c.execute("PRAGMA foreign_keys=ON;")
-            self._conn.commit()
-        except Exception:
-            pass
+        self._lock_waiters = 0
+        # Guards _lock_waiters: += from many threads isn't atomic, and admission control sheds on it
+        self._waiters_lock = threading.Lock()
+        # Bumped on every history write; keys the API response cache
+        self.history_version = 0
+        # (version, op, entry id) for recent history writes; lets long-polls return only the delta
+        self.recent_changes = deque(maxlen=1024)
+        # Called with the new version after each history change, outside the DB lock
+        self.change_listeners = []
+        # Bumped on every preferences update; keys the /preferences ETag
+        self.preferences_version = 0
+        # Storage layout (CLIPVAULT_STORAGE); in-memory SQLite for tests to avoid Windows file locks
+        self.engine = engine if engine is not None else engine_from_env(db_path, memory=self._test_mode)
         # Initialize schema
         self.init_db()
 
     def _connect(self):
-        """Return shared SQLite connection."""
-        return self._conn
+        """Return the shared SQLite connection (sync and replication run SQL directly)."""
+        if not isinstance(self.engine, SQLiteEngine):
+            raise UnsupportedOperation(f"Needs the sqlite storage engine, not {self.engine.name}")
+        return self.engine.conn
+
+    @contextmanager
+    def _locked(self):
+        """Hold the DB lock, counting callers queued on it."""
+        with self._waiters_lock:
+            self._lock_waiters += 1
+        start = time.perf_counter()
+        try:
+            self._lock.acquire()
+        finally:
+            with self._waiters_lock:
+                self._lock_waiters -= 1
+            DB_LOCK_WAIT.observe(time.perf_counter() - start)
+        try:
+            yield
+        finally:
+            self._lock.release()
+
+    def snapshot(self):
+        """
+        Hold the DB lock across several reads so they see one consistent state.
+
+        Every access goes through the shared connection under this lock, so
+        no write can land in between. Reentrant for the holding thread.
+        """
+        return self._locked()
+
+    @property
+    def pending_operations(self) -> int:
+        """Callers currently waiting for the DB lock."""
+        return self._lock_waiters
 
+    def _record_change(self, op: str, entry_id: Optional[int] = None) -> int:
+        """Advance history_version for a committed write (caller holds the DB lock)."""
+        self.history_version += 1
+        self.recent_changes.append((self.history_version, op, entry_id))
+        return self.history_version
+
+    def _notify_change(self, version: int) -> None:
+        for listener in self.change_listeners:
+            try:
+                listener(version)
+            except Exception as e:
+                logger.error(f"History change listener failed: {e}")
+
+    def bump_history_version(self) -> int:
+        """Mark history as changed (writes do this; also call after key rotation)."""
+        with self._locked():
+            version = self._record_change("touch")
+        self._notify_change(version)
+        return version
+
+    def changes_since(self, version: int) -> Optional[Tuple[int, List[int], List[int]]]:
+        """
+        (current version, added ids, deleted ids) since `version`, or None when the retained
+        change log doesn't reach back that far (or history was cleared) and
+        the caller has to reload the full history.
+        """
+        with self._locked():
+            current = self.history_version
+            if version >= current:
+                return current, [], []
+            changes = [change for change in self.recent_changes if change[0] > version]
+        if not changes or changes[0][0] != version + 1 or any(op in ("clear", "bulk") for _, op, _ in changes):
+            return None
+        added, deleted = [], []
+        for _, op, entry_id in changes:
+            if op == "add":
+                added.append(entry_id)
+            elif op == "delete":
+                if entry_id in added:
+                    added.remove(entry_id)
+                else:
+                    deleted.append(entry_id)
+        return current, added, deleted
+
+    @timed(DB_OPERATION_LATENCY, "clear_history")
     def clear_history(self):
-        if os.path.exists(self.db_path):
-            with self._lock:
-                conn = self._connect()
-                c = conn.cursor()
-                c.execute('DELETE FROM clipboard_history')
-                conn.commit()
-                return True
+        if not isinstance(self.engine, SQLiteEngine) or os.path.exists(self.db_path):
+            with self._locked():
+                self.engine.clear()
+                version = self._record_change("clear")
+            self._notify_change(version)
+            return True
 
     def init_db(self):
         """Initialize database if it doesn't exist"""
-        with self._lock:
-            conn = self._connect()
-            c = conn.cursor()
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS clipboard_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    content TEXT NOT NULL,
-                    timestamp TEXT NOT NULL
-                )
-            ''')
-
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    preferences TEXT DEFAULT '{}'
-                )
-            ''')
-
-            c.execute("PRAGMA table_info(users)")
-            columns = [row[1] for row in c.fetchall()]
-            if 'preferences' not in columns:
-                c.execute("ALTER TABLE users ADD COLUMN preferences TEXT DEFAULT '{}'")
-            
-            conn.commit()
+        with self._locked():
+            self.engine.init_schema()
 
-    def add_entry(self, content: str):
-        """Add encrypted clipboard entry."""
+    @timed(DB_OPERATION_LATENCY, "add_entry")
+    def add_entry(self, content: Union[str, SecureBuffer]):
+        """Add encrypted clipboard entry (str, or SecureBuffer encrypted without copies)."""
         timestamp = datetime.now().isoformat()
         
         try:
-            # Secure string wrapper
-            with SecureString(content.strip()) as content_clean:
-                # Encrypt before storing
-                encrypted_content = clipboard_crypto.encrypt_content(content_clean)
-                
-                # Write row
-                with self._lock:
-                    conn = self._connect()
-                    c = conn.cursor()
-                    c.execute('INSERT INTO clipboard_history (content, timestamp) VALUES (?, ?)',
-                             (encrypted_content, timestamp))
-                    
-                    logger.info(f"Added encrypted clipboard entry at {timestamp}")
-                    conn.commit()
+            if isinstance(content, SecureBuffer):
+                # Caller owns (and releases) the buffer
+                fingerprint = clipboard_crypto.fingerprint(content.view(), timestamp)
+                encrypted_content = clipboard_crypto.encrypt_buffer(content)
+            else:
+                # Secure string wrapper
+                with SecureString(content.strip()) as content_clean:
+                    # Encrypt before storing
+                    fingerprint = clipboard_crypto.fingerprint(content_clean, timestamp)
+                    encrypted_content = clipboard_crypto.encrypt_content(content_clean)
                 
-                # Clear temp
-                SecureMemory.clear_string(encrypted_content)
+            # Write row
+            with self._locked():
+                entry_id = self.engine.append(encrypted_content, timestamp, fingerprint)
+                logger.info(f"Added encrypted clipboard entry at {timestamp}")
+                version = self._record_change("add", entry_id)
+            self._notify_change(version)
+            
+            # Clear temp
+            SecureMemory.clear_string(encrypted_content)
                 
         except Exception as e:
             logger.error(f"Failed to add encrypted clipboard entry: {e}")
             # Note: Avoiding aggressive memory clearing during development/testing
             raise
 
+    @timed(DB_OPERATION_LATENCY, "import_entries")
+    def import_entries(self, entries: List[Tuple[str, str]]) -> Tuple[int, int, int]:
+        """
+        Insert (content, ISO timestamp) pairs as one transaction, skipping duplicates.
+
+        Duplicates (same content and timestamp, already stored or repeated in
+        the batch) are dropped by fingerprint before anything is encrypted.
+        The rest are encrypted as one batch and written in one engine call.
+
+        Returns:
+            (imported, duplicates, failed)
+        """
+        fingerprints = [clipboard_crypto.fingerprint(content, timestamp) for content, timestamp in entries]
+        with self._locked():
+            existing = self.engine.find_fingerprints(fingerprints)
+        fresh = []
+        for (content, timestamp), fingerprint in zip(entries, fingerprints):
+            if fingerprint not in existing:
+                existing.add(fingerprint)
+                fresh.append((content, timestamp, fingerprint))
+        duplicates = len(entries) - len(fresh)
+
+        rows, failed = [], 0
+        for (content, timestamp, fingerprint), result in zip(
+                fresh, clipboard_crypto.encrypt_many(content for content, _, _ in fresh)):
+            if result.ok:
+                rows.append((result.value, timestamp, fingerprint))
+            else:
+                logger.error(f"Failed to encrypt imported entry: {result.error}")
+                failed += 1
+        if not rows:
+            return 0, duplicates, failed
+
+        try:
+            with self._locked():
+                # A concurrent writer may have stored the same entry since the check above; the engine skips it
+                imported = len(self.engine.append_many(rows))
+                # Too many rows for per-id deltas; long-poll clients reload instead
+                version = self._record_change("bulk")
+            self._notify_change(version)
+            return imported, duplicates + len(rows) - imported, failed
+        except Exception as e:
+            logger.error(f"Failed to import clipboard entries: {e}")
+            raise
+
+    def backfill_fingerprints(self, batch_size: int = 500) -> int:
+        """Fingerprint rows stored before fingerprints existed (undecryptable rows stay NULL); returns rows updated."""
+        updated = 0
+        after_id = 0
+        while True:
+            with self._locked():
+                rows = self.engine.unfingerprinted(after_id, batch_size)
+            if not rows:
+                return updated
+            after_id = rows[-1][0]
+            values = []
+            for r, result in zip(rows, clipboard_crypto.decrypt_many(r[1] for r in rows)):
+                if result.ok:
+                    values.append((clipboard_crypto.fingerprint(result.value, r[2]), r[0]))
+            with self._locked():
+                # Identical legacy rows keep a NULL fingerprint rather than failing the batch
+                self.engine.set_fingerprints(values)
+            updated += len(values)
+
+    @timed(DB_OPERATION_LATENCY, "get_history")
     def get_history(self, limit: int = 10):
         """Get decrypted history list."""
         try:
-            with self._lock:
-                conn = self._connect()
-                c = conn.cursor()
-                c.execute('SELECT * FROM clipboard_history ORDER BY timestamp DESC LIMIT ?', (limit,))
-                rows = c.fetchall()
+            with self._locked():
+                rows = self.engine.page(limit)
             
-            # Decrypt content for each row
-            decrypted_history = []
-            for r in rows:
-                try:
-                    # Decrypt
-                    decrypted_content = clipboard_crypto.decrypt_content(r[1])
-                    decrypted_history.append({
-                        "id": r[0], 
-                        "content": decrypted_content, 
-                        "timestamp": r[2]
-                    })
-                    # Note: keep decrypted_content for response
-                except Exception as e:
-                    logger.error(f"Failed to decrypt clipboard entry {r[0]}: {e}")
-                    # Skip corrupted entries
-                    continue
-            
-            return decrypted_history
+            return self._decrypt_rows(rows)
             
         except Exception as e:
             logger.error(f"Failed to get clipboard history: {e}")
             raise
 
+    def iter_history(self, batch_size: int = 500):
+        """
+        Yield decrypted batches of the whole history, oldest first.
+
+        Keyset pagination on id: each batch is one short query under the DB
+        lock, so a long export never blocks writers, and memory stays at one
+        batch. Rows added after the export started are not included.
+        """
+        with self._locked():
+            last_id = self.engine.max_id()
+        after_id = 0
+        while after_id < last_id:
+            with self._locked():
+                rows = self.engine.scan(after_id, last_id, batch_size)
+            if not rows:
+                return
+            after_id = rows[-1][0]
+            yield self._decrypt_rows(rows)
+
+    def sync_position(self) -> Tuple[int, int]:
+        """(latest change log seq, highest history id), read together: a snapshot up to that id matches that seq."""
+        with self._locked():
+            c = self._connect().cursor()
+            c.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log')
+            seq = c.fetchone()[0]
+            c.execute('SELECT COALESCE(MAX(id), 0) FROM clipboard_history')
+            return seq, c.fetchone()[0]
+
+    def iter_raw_history(self, last_id: int, batch_size: int = 1000):
+        """
+        Yield batches of stored (encrypted) rows with id <= last_id, oldest first.
+
+        Same keyset pagination as iter_history; rows are dicts with id,
+        content, timestamp and fingerprint, as a follower stores them.
+        """
+        after_id = 0
+        while after_id < last_id:
+            with self._locked():
+                c = self._connect().cursor()
+                c.execute('SELECT id, content, timestamp, fingerprint FROM clipboard_history '
+                          'WHERE id > ? AND id <= ? ORDER BY id LIMIT ?', (after_id, last_id, batch_size))
+                rows = c.fetchall()
+            if not rows:
+                return
+            after_id = rows[-1][0]
+            yield [{"id": r[0], "content": r[1], "timestamp": r[2], "fingerprint": r[3]} for r in rows]
+
+    def replica_position(self) -> int:
+        """Primary change log seq this replica has applied up to (0 = never synced)."""
+        with self._locked():
+            c = self._connect().cursor()
+            c.execute("SELECT value FROM replica_state WHERE key = 'seq'")
+            row = c.fetchone()
+            return row[0] if row else 0
+
+    def _set_replica_position(self, c, seq: int) -> None:
+        c.execute("INSERT OR REPLACE INTO replica_state (key, value) VALUES ('seq', ?)", (seq,))
+
+    def load_snapshot(self, batches, seq: int) -> int:
+        """
+        Replace the history with a primary snapshot taken at log position `seq`.
+
+        `batches` yields lists of iter_raw_history rows, typically straight
+        off the network, so each batch is staged in a temporary table under
+        a short lock of its own; readers keep the previous state meanwhile.
+        One final transaction swaps the staged rows in and sets the
+        position, so an interrupted load leaves the replica as it was.
+        """
+        with self._locked():
+            c = self._connect().cursor()
+            c.execute('CREATE TEMP TABLE IF NOT EXISTS replica_snapshot ('
+                      'id INTEGER PRIMARY KEY, content TEXT NOT NULL, timestamp TEXT NOT NULL, fingerprint TEXT)')
+            c.execute('DELETE FROM temp.replica_snapshot')
+            self._connect().commit()
+        count = 0
+        try:
+            for rows in batches:
+                with self._locked():
+                    conn = self._connect()
+                    conn.executemany('INSERT OR REPLACE INTO temp.replica_snapshot (id, content, timestamp, fingerprint) '
+                                     'VALUES (?, ?, ?, ?)',
+                                     [(r["id"], r["content"], r["timestamp"], r["fingerprint"]) for r in rows])
+                    conn.commit()
+                count += len(rows)
+            with self._locked():
+                conn = self._connect()
+                c = conn.cursor()
+                try:
+                    c.execute('DELETE FROM clipboard_history')
+                    c.execute('INSERT INTO clipboard_history (id, content, timestamp, fingerprint) '
+                              'SELECT id, content, timestamp, fingerprint FROM temp.replica_snapshot ORDER BY id')
+                    self._set_replica_position(c, seq)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                version = self._record_change("bulk")
+        finally:
+            with self._locked():
+                self._connect().execute('DELETE FROM temp.replica_snapshot')
+                self._connect().commit()
+        self._notify_change(version)
+        return count
+
+    def apply_changes(self, changes: List[dict], next_seq: int) -> int:
+        """
+        Apply a page of primary changes (get_changes format) and advance the position to `next_seq`.
+
+        One transaction per page, so the replica is always at a position
+        it fully reflects. Replaying a page is harmless: inserts replace by
+        id and deletes of missing rows do nothing.
+        """
+        with self._locked():
+            conn = self._connect()
+            c = conn.cursor()
+            try:
+                for change in changes:
+                    op = change["op"]
+                    if op == "insert":
+                        c.execute('INSERT OR REPLACE INTO clipboard_history (id, content, timestamp, fingerprint) '
+                                  'VALUES (?, ?, ?, ?)',
+                                  (change["id"], change["content"], change["timestamp"], change["fingerprint"]))
+                    elif op == "delete":
+                        c.execute('DELETE FROM clipboard_history WHERE id = ?', (change["id"],))
+                    elif op == "clear":
+                        c.execute('DELETE FROM clipboard_history')
+                self._set_replica_position(c, next_seq)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            version = self._record_change("bulk")
+        self._notify_change(version)
+        return len(changes)
+
+    def get_entries(self, entry_ids: List[int]):
+        """Get decrypted entries by id, oldest first (missing ids are skipped)."""
+        if not entry_ids:
+            return []
+        try:
+            with self._locked():
+                rows = self.engine.get(entry_ids)
+            return self._decrypt_rows(rows)
+        except Exception as e:
+            logger.error(f"Failed to get clipboard entries: {e}")
+            raise
+
+    def _decrypt_rows(self, rows):
+        """Decrypt rows as one batch (one scratch buffer, one metrics update); corrupted rows are skipped."""
+        decrypted = []
+        for r, result in zip(rows, clipboard_crypto.decrypt_many(r[1] for r in rows)):
+            if not result.ok:
+                logger.error(f"Failed to decrypt clipboard entry {r[0]}: {result.error}")
+                continue
+            decrypted.append({
+                "id": r[0],
+                "content": result.value,
+                "timestamp": r[2]
+            })
+        return decrypted
+
     def view_history(self):
         """Print decrypted history (debug)."""
         try:
@@ -169,76 +436,166 @@ class ClipboardDB:
         except Exception as e:
             logger.error(f"Failed to view contents: {e}")
     
+    @timed(DB_OPERATION_LATENCY, "get_raw_history")
     def get_raw_history(self, limit: int = 10):
         """Raw encrypted history (debug/admin)."""
-        with self._lock:
-            conn = self._connect()
-            c = conn.cursor()
-            c.execute('SELECT * FROM clipboard_history ORDER BY timestamp DESC LIMIT ?', (limit,))
-            rows = c.fetchall()
+        with self._locked():
+            rows = self.engine.page(limit)
             return [{"id": r[0], "encrypted_content": r[1], "timestamp": r[2]} for r in rows]
 
+    def get_changes(self, since: int = 0, limit: int = 500) -> dict:
+        """
+        Change log entries after sequence number `since`, oldest first.
+
+        Inserts carry the stored (encrypted) content, timestamp and
+        fingerprint; an insert whose row has since been deleted is skipped,
+        as its tombstone follows. Deletes carry the id and fingerprint. A
+        "clear" means everything before it is gone.
+
+        Returns:
+            {"changes": [...], "next": seq to pass as `since` next time,
+             "latest": newest seq, "more": whether `next` < `latest`,
+             "reset": `since` is ahead of this log (resync from scratch)}
+        """
+        with self._locked():
+            c = self._connect().cursor()
+            c.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log')
+            latest = c.fetchone()[0]
+            if since >= latest:
+                # Up to date (one index lookup, whatever the history size), or ahead of a replaced database
+                return {"changes": [], "next": latest, "latest": latest, "more": False, "reset": since > latest}
+            c.execute('''
+                SELECT l.seq, l.op, l.entry_id, COALESCE(h.fingerprint, l.fingerprint), h.timestamp, h.content
+                FROM change_log l
+                LEFT JOIN clipboard_history h ON l.op = 'insert' AND h.id = l.entry_id
+                WHERE l.seq > ? ORDER BY l.seq LIMIT ?
+            ''', (since, limit))
+            rows = c.fetchall()
+        changes = []
+        for seq, op, entry_id, fingerprint, timestamp, content in rows:
+            if op == "insert":
+                if content is None:
+                    continue
+                changes.append({"seq": seq, "op": op, "id": entry_id, "fingerprint": fingerprint,
+                                "timestamp": timestamp, "content": content})
+            elif op == "delete":
+                changes.append({"seq": seq, "op": op, "id": entry_id, "fingerprint": fingerprint})
+            else:
+                changes.append({"seq": seq, "op": op})
+        next_seq = rows[-1][0] if rows else latest
+        return {"changes": changes, "next": next_seq, "latest": latest, "more": next_seq < latest, "reset": False}
+
+    @timed(DB_OPERATION_LATENCY, "delete_entry")
     def delete_entry(self, entry_id: int) -> bool:
         """Delete one entry by id."""
         try:
-            with self._lock:
-                conn = self._connect()
-                c = conn.cursor()
-                c.execute('DELETE FROM clipboard_history WHERE id = ?', (entry_id,))
-                deleted = (c.rowcount or 0) > 0
-                conn.commit()
+            with self._locked():
+                deleted = bool(self.engine.delete([entry_id]))
+                version = self._record_change("delete", entry_id) if deleted else None
+            if version is not None:
+                self._notify_change(version)
             logger.info(f"Deleted clipboard entry id={entry_id}: {deleted}")
             return deleted
         except Exception as e:
             logger.error(f"Failed to delete clipboard entry {entry_id}: {e}")
             raise
     
+    @timed(DB_OPERATION_LATENCY, "delete_entries")
+    def delete_entries(self, entry_ids: List[int]) -> List[int]:
+        """Delete many entries by id in one transaction; returns the ids that existed."""
+        entry_ids = list(dict.fromkeys(entry_ids))
+        if not entry_ids:
+            return []
+        try:
+            with self._locked():
+                deleted = self.engine.delete(entry_ids)
+                version = None
+                for entry_id in deleted:
+                    version = self._record_change("delete", entry_id)
+            if version is not None:
+                self._notify_change(version)
+            logger.info(f"Deleted {len(deleted)} of {len(entry_ids)} requested clipboard entries")
+            return deleted
+        except Exception as e:
+            logger.error(f"Failed to delete clipboard entries: {e}")
+            raise
+
+    @timed(DB_OPERATION_LATENCY, "delete_range")
+    def delete_range(self, before: Optional[str] = None, after: Optional[str] = None,
+                     chunk_size: int = 500) -> int:
+        """
+        Delete entries with after < timestamp < before (ISO strings; either bound optional).
+
+        Runs as a series of short transactions of at most `chunk_size` rows,
+        releasing the DB lock between them so readers are never held up for
+        the whole range. Returns the number of rows deleted.
+        """
+        total = 0
+        try:
+            while True:
+                with self._locked():
+                    ids = self.engine.ids_in_range(before, after, chunk_size)
+                    if not ids:
+                        break
+                    self.engine.delete(ids)
+                    for entry_id in ids:
+                        version = self._record_change("delete", entry_id)
+                total += len(ids)
+                self._notify_change(version)
+                if len(ids) < chunk_size:
+                    break
+                # Let queued readers take the lock before the next chunk
+                time.sleep(0)
+            logger.info(f"Deleted {total} clipboard entries by time range")
+            return total
+        except Exception as e:
+            logger.error(f"Failed to delete clipboard entries by time range: {e}")
+            raise
+
     def create_user(self, username: str, password: str):
         """Create user (hashed password)."""
-        password_hash = pwd_context.hash(password)
-        with self._lock:
-            conn = self._connect()
-            c = conn.cursor()
-            try:
-                c.execute('INSERT INTO users (username, password_hash) VALUES (?, ?)', (username, password_hash))
-                conn.commit()
-            except sqlite3.IntegrityError as e:
-                if "UNIQUE constraint failed" in str(e):
-                    raise ValueError("Username already exists")
-                else:
-                    raise ValueError(f"Database error: {e}")
+        password_hash = get_pwd_context().hash(password)
+        with self._locked():
+            self.engine.create_user(username, password_hash)
 
     def verify_user(self, username: str, password: str) -> bool:
         """Verify username/password."""
-        with self._lock:
-            conn = self._connect()
-            c = conn.cursor()
-            c.execute('SELECT password_hash FROM users WHERE username = ?', (username,))
-            row = c.fetchone()
-        if row:
-            return pwd_context.verify(password, row[0])
+        with self._locked():
+            password_hash = self.engine.password_hash(username)
+        if password_hash:
+            return get_pwd_context().verify(password, password_hash)
         return False
 
+    def store_refresh_token(self, token_hash: str, username: str, expires_at: float):
+        """Store a hashed refresh token."""
+        with self._locked():
+            self.engine.store_refresh_token(token_hash, username, expires_at)
+
+    def get_refresh_token(self, token_hash: str):
+        """Look up a refresh token by hash (unique index)."""
+        with self._locked():
+            return self.engine.get_refresh_token(token_hash)
+
+    def revoke_refresh_token(self, token_hash: str) -> bool:
+        """Revoke one refresh token."""
+        with self._locked():
+            return self.engine.revoke_refresh_token(token_hash)
+
+    def revoke_all_refresh_tokens(self) -> int:
+        """Revoke every refresh token and drop expired ones."""
+        with self._locked():
+            count = self.engine.revoke_all_refresh_tokens()
+        logger.info(f"Revoked {count} refresh tokens")
+        return count
+
     def get_user_preferences(self, username):
-        with self._lock:
-            conn = self._connect()
-            c = conn.cursor()
-            c.execute("SELECT preferences FROM users WHERE username = ?", (username,))
-            row = c.fetchone()
-            if not row:
-                return {}
-            try:
-                return json.loads(row[0] or "{}")
-            except json.JSONDecodeError:
-                return {}
+        with self._locked():
+            return self.engine.get_preferences(username)
 
     def update_user_preferences(self, username, prefs: dict):
-        with self._lock:
-            conn = self._connect()
-            c = conn.cursor()
-            c.execute("UPDATE users SET preferences = ? WHERE username = ?",
-                    (json.dumps(prefs), username))
-            conn.commit()
+        with self._locked():
+            self.engine.set_preferences(username, prefs)
+            self.preferences_version += 1
 
 if __name__ == "__main__":
     db = ClipboardDB()
@@ -0,0 +1,227 @@
+"""
+Follower Module
+Read replica: tails the primary's change log into a local database and serves read-only endpoints
+"""
+
+import json
+import os
+import threading
+import time
+import logging
+from typing import Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Requests a follower still accepts besides GET/HEAD/OPTIONS: they only read, or only touch this
+# process's own vault state (a password-mode follower starts locked)
+READ_ONLY_POSTS = ("/batch", "/vault/unlock", "/vault/lock")
+# Served by the primary only: a replica's own change log doesn't carry the primary's sequence
+# numbers, and users and preferences aren't replicated
+PRIMARY_ONLY_PREFIXES = ("/sync/", "/preferences")
+# POST /batch operations refused on a follower for the same reason
+PRIMARY_ONLY_BATCH_OPS = ("preferences",)
+
+
+class Follower:
+    """
+    Keeps a replica ClipboardDB in step with a primary backend
+
+    A fresh replica loads /sync/snapshot (rows plus the log position they
+    correspond to); after that it pulls /sync/changes from that position,
+    applying each page and the new position in one transaction, so a
+    restart resumes exactly where it stopped. Content stays encrypted in
+    transit and at rest; reads decrypt with the shared vault key as usual.
+    """
+
+    def __init__(self, primary_url: str, db, token: Optional[str] = None,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 interval: float = 1.0, batch_size: int = 1000, client=None):
+        """
+        Args:
+            primary_url: Base URL of the primary, e.g. http://127.0.0.1:8000
+            db: Replica ClipboardDB (never written by anything else)
+            token: Bearer token for the primary; or give username/password to log in
+            interval: Seconds between polls once caught up
+            batch_size: Changes requested per /sync/changes page
+            client: httpx.Client to use (default: one created on first use)
+        """
+        self.primary_url = primary_url.rstrip("/")
+        self.db = db
+        self.token = token
+        self.username = username
+        self.password = password
+        self.interval = interval
+        self.batch_size = batch_size
+        self.primary_seq = None
+        self.caught_up_at = None
+        self.last_error = None
+        self.errors = 0
+        self.snapshots = 0
+        self._client = client
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls, primary_url: str, db) -> "Follower":
+        """
+        CLIPVAULT_PRIMARY_TOKEN, or CLIPVAULT_PRIMARY_USER and CLIPVAULT_PRIMARY_PASSWORD
+        CLIPVAULT_FOLLOW_INTERVAL seconds between polls (default 1)
+        """
+        try:
+            interval = float(os.getenv("CLIPVAULT_FOLLOW_INTERVAL", "1"))
+        except ValueError:
+            interval = 1.0
+        return cls(primary_url, db,
+                   token=os.getenv("CLIPVAULT_PRIMARY_TOKEN"),
+                   username=os.getenv("CLIPVAULT_PRIMARY_USER"),
+                   password=os.getenv("CLIPVAULT_PRIMARY_PASSWORD"),
+                   interval=max(0.05, interval))
+
+    @property
+    def client(self):
+        if self._client is None:
+            # Imported on first use: only follower processes need an HTTP client
+            import httpx
+            self._client = httpx.Client(base_url=self.primary_url, timeout=30.0)
+        return self._client
+
+    def _login(self) -> None:
+        if not (self.username and self.password):
+            raise RuntimeError("Primary rejected the token and no CLIPVAULT_PRIMARY_USER/PASSWORD is set")
+        response = self.client.post("/login", data={"username": self.username, "password": self.password})
+        response.raise_for_status()
+        self.token = response.json()["access_token"]
+
+    def _get(self, path: str, **kwargs):
+        """GET against the primary, logging in (again) once if the token is missing or expired"""
+        if self.token is None:
+            self._login()
+        response = self.client.get(path, headers={"Authorization": f"Bearer {self.token}"}, **kwargs)
+        if response.status_code == 401 and self.username:
+            self._login()
+            response = self.client.get(path, headers={"Authorization": f"Bearer {self.token}"}, **kwargs)
+        response.raise_for_status()
+        return response
+
+    @property
+    def applied_seq(self) -> int:
+        return self.db.replica_position()
+
+    def load_snapshot(self) -> int:
+        """Replace the replica with the primary's current rows; returns the log position they match"""
+        if self.token is None:
+            self._login()
+        with self.client.stream("GET", "/sync/snapshot",
+                                headers={"Authorization": f"Bearer {self.token}"}) as response:
+            response.raise_for_status()
+            lines = response.iter_lines()
+            header = json.loads(next(lines))
+            seq = header["seq"]
+            self.db.load_snapshot(self._batches(lines), seq)
+        self.snapshots += 1
+        logger.info(f"Replica loaded a snapshot of the primary at seq {seq}")
+        return seq
+
+    def _batches(self, lines: Iterator[str]) -> Iterator[List[dict]]:
+        batch = []
+        for line in lines:
+            if line:
+                batch.append(json.loads(line))
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def poll(self) -> bool:
+        """Apply one page of changes; returns True when more are waiting"""
+        since = self.applied_seq
+        if since == 0 and self.snapshots == 0:
+            self.load_snapshot()
+            since = self.applied_seq
+        page = self._get("/sync/changes", params={"since": since, "limit": self.batch_size}).json()
+        if page.get("reset"):
+            # The primary's log no longer matches our position (e.g. its database was replaced)
+            logger.warning(f"Replica position {since} is ahead of the primary ({page['latest']}); reloading")
+            self.load_snapshot()
+            return True
+        if page["next"] != since:
+            self.db.apply_changes(page["changes"], page["next"])
+        self.primary_seq = page["latest"]
+        if not page["more"]:
+            self.caught_up_at = time.time()
+        return page["more"]
+
+    def sync(self) -> None:
+        """Pull until caught up with the primary"""
+        while self.poll() and not self._stop.is_set():
+            pass
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="clipvault-follower", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sync()
+                self.last_error = None
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                logger.error(f"Replication from {self.primary_url} failed: {e}")
+            self._stop.wait(self.interval)
+
+    def status(self) -> dict:
+        applied = self.applied_seq
+        return {
+            "primary": self.primary_url,
+            "running": self._thread is not None,
+            "applied_seq": applied,
+            "primary_seq": self.primary_seq,
+            "seq_lag": None if self.primary_seq is None else max(0, self.primary_seq - applied),
+            # Upper bound on staleness: the replica matched the primary at caught_up_at
+            "lag_seconds": None if self.caught_up_at is None else round(time.time() - self.caught_up_at, 3),
+            "caught_up_at": self.caught_up_at,
+            "snapshots": self.snapshots,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+class ReadOnlyMiddleware:
+    """ASGI middleware refusing writes (and sync) on a follower with 403; they belong on the primary"""
+
+    def __init__(self, app, primary_url: str):
+        self.app = app
+        self.primary_url = primary_url
+
+    @staticmethod
+    def _refused(method: str, path: str) -> bool:
+        if method == "OPTIONS":
+            return False
+        if path.startswith(PRIMARY_ONLY_PREFIXES):
+            return True
+        if method in ("GET", "HEAD"):
+            return False
+        return not (method == "POST" and path in READ_ONLY_POSTS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self._refused(scope["method"], scope["path"]):
+            body = json.dumps({"detail": "Read-only follower; send writes to the primary",
+                               "primary": self.primary_url}).encode("utf-8")
+            await send({"type": "http.response.start", "status": 403,
+                        "headers": [(b"content-type", b"application/json"),
+                                    (b"content-length", str(len(body)).encode())]})
+            await send({"type": "http.response.body", "body": body})
+            return
+        await self.app(scope, receive, send)
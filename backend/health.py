@@ -0,0 +1,102 @@
+"""
+Health Probe Module
+Background prober keeping a cached health snapshot so status endpoints answer in O(1)
+"""
+
+import os
+import threading
+import time
+import logging
+from typing import Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class HealthProber:
+    """
+    Runs the (expensive) health checks every `interval` seconds on a daemon thread
+
+    Readers get the last snapshot and its age without running anything. When
+    the thread isn't running (e.g. the app was never started through its
+    lifespan) a stale snapshot is refreshed inline on read instead.
+    """
+
+    def __init__(self, check: Callable[[], dict], interval: float = 15.0):
+        """
+        Args:
+            check: Returns the health details; raising marks the snapshot as failed
+            interval: Seconds between background probes
+        """
+        self.check = check
+        self.interval = interval
+        self.probes = 0
+        self.failures = 0
+        self._snapshot: Optional[dict] = None
+        self._checked_at = 0.0
+        self._checked_monotonic = 0.0
+        self._probe_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_env(cls, check: Callable[[], dict]) -> "HealthProber":
+        """CLIPVAULT_HEALTH_INTERVAL seconds between probes (default 15)"""
+        try:
+            interval = float(os.getenv("CLIPVAULT_HEALTH_INTERVAL", "15"))
+        except ValueError:
+            interval = 15.0
+        return cls(check, interval=max(0.1, interval))
+
+    def probe(self) -> dict:
+        """Run the checks now and replace the cached snapshot"""
+        with self._probe_lock:
+            try:
+                snapshot = {"ok": True, "details": self.check()}
+            except Exception as e:
+                logger.error(f"Health probe failed: {e}")
+                self.failures += 1
+                snapshot = {"ok": False, "details": None}
+            self.probes += 1
+            self._checked_at = time.time()
+            self._checked_monotonic = time.monotonic()
+            self._snapshot = snapshot
+            return snapshot
+
+    def snapshot(self) -> Tuple[dict, float, float]:
+        """
+        Returns:
+            (snapshot, checked_at wall time, age in seconds)
+        """
+        if self._snapshot is None or (self._thread is None and self.age() > self.interval):
+            self.probe()
+        return self._snapshot, self._checked_at, self.age()
+
+    def age(self) -> float:
+        return time.monotonic() - self._checked_monotonic if self._snapshot is not None else float("inf")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="clipvault-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "interval": self.interval,
+            "running": self._thread is not None,
+            "probes": self.probes,
+            "failures": self.failures,
+            "age": None if self._snapshot is None else round(self.age(), 3),
+        }
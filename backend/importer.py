@@ -0,0 +1,211 @@
+"""
+Import Module
+Streaming NDJSON history import: line parsing, batching and per-job progress
+"""
+
+import asyncio
+import json
+import re
+import secrets
+import threading
+import time
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Client-chosen job ids (so progress can be polled while the upload is still running)
+JOB_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class ImportStreamError(ValueError):
+    """The import stream itself is unusable (as opposed to a single bad line)"""
+
+
+class ImportJobRunning(ValueError):
+    """A job with the requested id is still in progress"""
+
+
+def normalize_timestamp(value: str) -> str:
+    """ISO 8601 -> the naive local isoformat() stored in clipboard_history (ValueError if invalid)"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed.isoformat()
+
+
+def parse_line(line: bytes) -> Optional[Tuple[str, str]]:
+    """
+    One NDJSON record -> (content, timestamp)
+
+    Records are objects with a string "content" and an optional ISO 8601
+    "timestamp" (default: now), the shape /clipboard/export writes; other
+    keys are ignored. Returns None for blank lines and content that is
+    empty once stripped (never stored, as with /clipboard/set).
+    """
+    line = line.strip()
+    if not line:
+        return None
+    record = json.loads(line)
+    if not isinstance(record, dict) or not isinstance(record.get("content"), str):
+        raise ValueError('expected an object with a string "content"')
+    content = record["content"].strip()
+    if not content:
+        return None
+    timestamp = record.get("timestamp")
+    if timestamp is None:
+        return content, datetime.now().isoformat()
+    if not isinstance(timestamp, str):
+        raise ValueError('"timestamp" must be an ISO 8601 string')
+    return content, normalize_timestamp(timestamp)
+
+
+class ImportJob:
+    """Progress and outcome of one import request"""
+
+    # Bad lines reported back individually; the rest are only counted
+    MAX_ERRORS = 20
+
+    def __init__(self, job_id: str, user: str):
+        self.id = job_id
+        self.user = user
+        self.state = "running"
+        self.lines = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+        self.detail: Optional[str] = None
+        self.started = time.time()
+        self.finished: Optional[float] = None
+
+    def record_error(self, line_number: int, message: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append({"line": line_number, "error": message})
+
+    def finish(self, state: str, detail: Optional[str] = None) -> None:
+        self.state = state
+        self.detail = detail
+        self.finished = time.time()
+
+    def to_dict(self) -> dict:
+        elapsed = (self.finished or time.time()) - self.started
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "lines": self.lines,
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "failed": self.failed,
+            "errors": list(self.errors),
+            "detail": self.detail,
+            "seconds": round(elapsed, 3),
+            "rate": round(self.lines / elapsed, 1) if elapsed > 0 else None,
+        }
+
+
+class ImportJobs:
+    """Recent import jobs by id (bounded; oldest finished jobs are forgotten first)"""
+
+    def __init__(self, keep: int = 50):
+        self.keep = keep
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, user: str, job_id: Optional[str] = None) -> ImportJob:
+        """Raises ValueError for a malformed id, ImportJobRunning if that id is in progress"""
+        job_id = job_id or secrets.token_urlsafe(12)
+        if not JOB_ID_PATTERN.match(job_id):
+            raise ValueError("job_id must be 1-64 letters, digits, '-' or '_'")
+        with self._lock:
+            current = self._jobs.get(job_id)
+            if current is not None and current.state == "running":
+                raise ImportJobRunning(f"Import job {job_id} is already running")
+            job = self._jobs[job_id] = ImportJob(job_id, user)
+            self._jobs.move_to_end(job_id)
+            while len(self._jobs) > self.keep:
+                oldest = next((key for key, old in self._jobs.items() if old.state != "running"), None)
+                if oldest is None:
+                    break
+                del self._jobs[oldest]
+        return job
+
+    def get(self, job_id: str, user: str) -> Optional[ImportJob]:
+        """The job, if it exists and belongs to `user`"""
+        job = self._jobs.get(job_id)
+        return job if job is not None and job.user == user else None
+
+
+async def run_import(job: ImportJob, chunks: AsyncIterator[bytes],
+                     store: Callable[[List[Tuple[str, str]]], Awaitable[Tuple[int, int, int]]],
+                     batch_size: int = 1000, max_line_bytes: int = 16 * 1024 * 1024) -> ImportJob:
+    """
+    Parse NDJSON from `chunks` and hand batches of `batch_size` records to `store`
+
+    One batch is stored while the next is read and parsed, so upload,
+    parsing and encrypt-and-insert overlap. `store` returns (imported,
+    duplicates, failed) for a batch. Malformed lines are counted on the job;
+    an over-long line raises ImportStreamError.
+    """
+    pending: Optional[asyncio.Future] = None
+    batch: List[Tuple[str, str]] = []
+
+    async def settle() -> None:
+        nonlocal pending
+        if pending is not None:
+            imported, duplicates, failed = await pending
+            pending = None
+            job.imported += imported
+            job.duplicates += duplicates
+            job.failed += failed
+
+    async def flush() -> None:
+        nonlocal pending, batch
+        await settle()
+        if batch:
+            pending = asyncio.ensure_future(store(batch))
+            batch = []
+
+    def take(line: bytes) -> None:
+        job.lines += 1
+        try:
+            record = parse_line(line)
+        except (ValueError, UnicodeDecodeError) as e:
+            job.record_error(job.lines, str(e))
+            return
+        if record is not None:
+            batch.append(record)
+
+    # Pieces of the line still being received (joined once, when its newline arrives)
+    partial: List[bytes] = []
+    partial_size = 0
+    try:
+        async for chunk in chunks:
+            if b"\n" not in chunk:
+                partial.append(chunk)
+                partial_size += len(chunk)
+                if partial_size > max_line_bytes:
+                    raise ImportStreamError(f"Line {job.lines + 1} exceeds {max_line_bytes} bytes")
+                continue
+            lines = chunk.split(b"\n")
+            lines[0] = b"".join(partial) + lines[0]
+            last = lines.pop()
+            partial, partial_size = [last], len(last)
+            for line in lines:
+                take(line)
+                if len(batch) >= batch_size:
+                    await flush()
+        if partial_size:
+            take(b"".join(partial))
+        await flush()
+        await settle()
+    finally:
+        if pending is not None:
+            # Don't leave a half-finished batch running past a failed upload
+            await asyncio.gather(pending, return_exceptions=True)
+    return job
@@ -0,0 +1,79 @@
+"""
+Long Poll Module
+Wakes every waiting /clipboard/wait request with a single notification per history change
+"""
+
+import asyncio
+import threading
+import logging
+from typing import Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeNotifier:
+    """
+    Lets any number of coroutines wait for a version counter to pass a value
+
+    Writers call notify() from any thread. Each event loop with waiters gets
+    one call_soon_threadsafe callback setting the Event all its waiters share,
+    so idle waiters cost neither CPU nor queries. Waiters re-read the version
+    after waking, so coalesced or spurious wakeups are harmless.
+    """
+
+    def __init__(self):
+        self.waiting = 0
+        self.notifications = 0
+        self._events: Dict[asyncio.AbstractEventLoop, asyncio.Event] = {}
+        self._lock = threading.Lock()
+
+    def notify(self, version=None) -> None:
+        """Wake every current waiter (signature fits ClipboardDB.change_listeners)"""
+        with self._lock:
+            # Swap in fresh events: later waiters must not see this wakeup as already set
+            events, self._events = self._events, {}
+            self.notifications += 1
+        for loop, event in events.items():
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop already closed; its waiters are gone
+                pass
+
+    def _event(self, loop: asyncio.AbstractEventLoop) -> asyncio.Event:
+        with self._lock:
+            event = self._events.get(loop)
+            if event is None:
+                event = self._events[loop] = asyncio.Event()
+            return event
+
+    async def wait(self, current: Callable[[], int], since: int, timeout: float) -> bool:
+        """
+        Wait until current() > since
+
+        Returns:
+            True when the version moved past `since`, False on timeout
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        with self._lock:
+            self.waiting += 1
+        try:
+            while True:
+                # Register before checking, so a notify in between still wakes us
+                event = self._event(loop)
+                if current() > since:
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+    def stats(self) -> dict:
+        return {"waiting": self.waiting, "notifications": self.notifications}
@@ -1,38 +1,54 @@
+from startup import startup, Lazy, is_initialized, resolve
 from fastapi import FastAPI, Body, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from clipboard import ClipboardManager
-from database import ClipboardDB
+from database import ClipboardDB, get_pwd_context
 from contextlib import asynccontextmanager
 import uvicorn
 import logging
 import time
-from auth import create_access_token, get_current_user, rotate_jwt_secret
-from clipboard_crypto import clipboard_crypto, SecureMemory, SecureString
+from auth import (
+    create_access_token, create_refresh_token, get_current_user, load_jose,
+    refresh_access_token, revoke_refresh_token, rotate_jwt_secret,
+)
+from clipboard_crypto import clipboard_crypto, scrub_scheduler, SecureMemory, SecureString, VaultLockedError
 from secure_storage import key_manager
+from vault import vault_lock, InvalidPasswordError
+from rate_limit import RateLimitMiddleware, limiter_from_env, admission_from_env
+from metrics import REGISTRY, MetricsMiddleware
+from profiling import ProfilingMiddleware, profiler_from_env
+from health import HealthProber
+from long_poll import ChangeNotifier
+from follower import PRIMARY_ONLY_BATCH_OPS, Follower, ReadOnlyMiddleware
+from storage import UnsupportedOperation
+from importer import ImportJobRunning, ImportJobs, ImportStreamError, normalize_timestamp, run_import
+from response_cache import (
+    BOOT_ID, CachedResponse, ResponseCache, NOT_MODIFIED_RESPONSES, compress_stream, encoded_etag, etag_matches, make_etag,
+    negotiate_encoding, serialize_json,
+)
+from structured_logging import configure_logging
+from starlette.concurrency import run_in_threadpool
 import os
+import io
 import json
+import pstats
+import sys
+from typing import List, Optional
 
-# Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+startup.mark("imports_done")
+
+# Logging: JSON records written by a background listener (see structured_logging.py)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
+    # Startup: nothing here blocks binding the port; subsystems warm up in the background
     logger.info("Starting ClipVault backend...")
-
-    # Quick crypto self-test
-    if not clipboard_crypto.verify_encryption():
-        logger.error("Clipboard encryption verification failed!")
-        raise Exception("Encryption system not working properly")
-    
-    logger.info("Encryption verification passed")
+    startup.mark("lifespan_start")
     # Clipboard monitor: disabled in tests/CI or when env says so.
     env_val = os.getenv("CLIPVAULT_DISABLE_CLIPBOARD")
     if env_val is None:
@@ -40,19 +56,47 @@ async def lifespan(app: FastAPI):
     else:
         disable_clipboard = env_val == "1"
 
-    if disable_clipboard:
-        logger.info("Clipboard monitoring disabled (tests/CI or env override)")
-    else:
-        clipboard.start_monitoring(db)
-        logger.info("Clipboard monitoring started")
+    def after_warm_up():
+        if follower is not None:
+            # A replica only mirrors the primary; it never records its own clipboard
+            follower.start()
+            logger.info(f"Following primary {follower.primary_url}")
+        elif startup.ready and not disable_clipboard:
+            clipboard.start_monitoring(db)
+            logger.info("Clipboard monitoring started")
+        elif disable_clipboard:
+            logger.info("Clipboard monitoring disabled (tests/CI or env override)")
+        health_prober.start()
+
+    startup.warm_up(WARM_UP_TASKS, then=after_warm_up)
     
     yield
     
     # Shutdown
     logger.info("Shutting down ClipVault backend...")
+    health_prober.stop()
+    if follower is not None:
+        follower.stop()
     clipboard.stop_monitoring()
     logger.info("Clipboard monitoring stopped")
 
+def _warm_crypto():
+    """Load keys and run the crypto self-test (a locked vault is verified on unlock instead)"""
+    if clipboard_crypto.locked:
+        logger.warning("Vault is locked; unlock it with POST /vault/unlock")
+    elif not clipboard_crypto.verify_encryption():
+        logger.error("Clipboard encryption verification failed!")
+        raise Exception("Encryption system not working properly")
+    else:
+        logger.info("Encryption verification passed")
+
+# Run in parallel after startup; requests arriving earlier initialize what they need on demand
+WARM_UP_TASKS = {
+    "encryption_check": _warm_crypto,
+    "db": lambda: resolve(db),
+    "auth_libraries": lambda: (load_jose(), get_pwd_context()),
+}
+
 # Security headers middleware
 class SecurityHeadersMiddleware:
     def __init__(self, app):
@@ -87,11 +131,126 @@ app = FastAPI(
     version="2.0.0"
 )
 
+# Opt-in request profiling (CLIPVAULT_PROFILE=1); no middleware at all when off
+profiler = profiler_from_env()
+if profiler is not None:
+    app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+# Per-user/per-route rate limiting and load shedding (disable with CLIPVAULT_RATE_LIMIT=0)
+rate_limiter = limiter_from_env()
+admission = admission_from_env(db_pending=lambda: db.pending_operations if is_initialized(db) else 0)
+if os.getenv("CLIPVAULT_RATE_LIMIT", "1") != "0":
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, admission=admission,
+                       jwt_secret=lambda: key_manager.get_jwt_secret())
+
 # Add security headers middleware
 app.add_middleware(SecurityHeadersMiddleware)
 
+# Per-route request counts/latency for /metrics (wraps rate limiting so rejected requests are counted too)
+app.add_middleware(MetricsMiddleware)
+REGISTRY.gauge_callback(
+    "clipvault_rate_limit_rejections_total", "Requests rejected by the rate limiter",
+    lambda: {(route,): n for route, n in rate_limiter.stats()["rejected_by_route"].items()},
+    ("route",), type_name="counter")
+REGISTRY.gauge_callback(
+    "clipvault_load_shed_total", "Requests shed by admission control",
+    lambda: {(reason,): n for reason, n in admission.stats()["rejected"].items()},
+    ("reason",), type_name="counter")
+REGISTRY.gauge_callback(
+    "clipvault_db_pending_operations", "Callers waiting for the ClipboardDB lock",
+    lambda: {(): db.pending_operations if is_initialized(db) else 0})
+REGISTRY.gauge_callback(
+    "clipvault_scrub_collections_total", "Garbage collections run by the SecureMemory scrub scheduler",
+    lambda: {(): scrub_scheduler.collections}, type_name="counter")
+
+# Serialized history pages keyed by (user, params) for the current history version
+response_cache = ResponseCache.from_env()
+if vault_lock is not None:
+    vault_lock.lock_listeners.append(response_cache.clear)
+REGISTRY.gauge_callback(
+    "clipvault_response_cache_bytes", "Bytes held by the response cache",
+    lambda: {(): response_cache.bytes})
+
+
+def _conditional(request: Request, etag: str, endpoint: str):
+    """304 response when If-None-Match already has `etag` (or a compressed variant of it), else None"""
+    matched = etag_matches(request.headers.get("if-none-match"), etag)
+    if matched:
+        NOT_MODIFIED_RESPONSES.inc(endpoint)
+        return Response(status_code=304, headers={"ETag": matched, "Cache-Control": "private, no-cache"})
+    return None
+
+
+def _tagged(body: bytes, etag: str) -> Response:
+    return Response(body, media_type="application/json",
+                    headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+
+def _cached_json(request: Request, entry: CachedResponse, etag: str = None) -> Response:
+    """Send a cached JSON body, gzip/deflate-compressed when accepted and large enough"""
+    body, encoding = response_cache.encode(entry, request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if etag:
+        headers["ETag"] = encoded_etag(etag, encoding)
+        headers["Cache-Control"] = "private, no-cache"
+    return Response(body, media_type="application/json", headers=headers)
+
+# Wakes /clipboard/wait long-polls once per history change
+history_notifier = ChangeNotifier()
+REGISTRY.gauge_callback(
+    "clipvault_long_poll_waiting", "Requests waiting on /clipboard/wait",
+    lambda: {(): history_notifier.waiting})
+# Upper bound for the /clipboard/wait timeout parameter (seconds)
+LONG_POLL_MAX_TIMEOUT = 60.0
+
+
+def _version_token(version: int) -> str:
+    """history_version as given to clients: it restarts at 0 with the process, so the token names the boot"""
+    return f"{BOOT_ID}:{version}"
+
+
+def _token_version(token: str) -> Optional[int]:
+    """Version in a token issued by this process; None for other boots and malformed tokens"""
+    boot, _, number = token.partition(":")
+    return int(number) if boot == BOOT_ID and number.isdigit() else None
+
+
+def _open_db() -> ClipboardDB:
+    if follower is not None:
+        database = ClipboardDB(os.getenv("CLIPVAULT_REPLICA_DB", "clipboard_replica.db"))
+    else:
+        database = ClipboardDB()
+    database.change_listeners.append(history_notifier.notify)
+    return database
+
+# Set by enable_follower(): this process serves reads from a replica of another backend
+follower: Optional[Follower] = None
+
+
+def enable_follower(primary_url: str) -> Follower:
+    """
+    Run as a read-only follower of `primary_url` (call before the app starts serving)
+
+    History lives in a local replica database fed from the primary's
+    change log; writes, /sync/* and preferences (not replicated) are refused with 403.
+    """
+    global follower
+    follower = Follower.from_env(primary_url, db)
+    app.add_middleware(ReadOnlyMiddleware, primary_url=follower.primary_url)
+    REGISTRY.gauge_callback(
+        "clipvault_replica_seq_lag", "Primary change log entries not yet applied to this replica",
+        lambda: {(): follower.status()["seq_lag"] or 0})
+    REGISTRY.gauge_callback(
+        "clipvault_replica_lag_seconds", "Seconds since this replica last matched the primary",
+        lambda: {(): follower.status()["lag_seconds"] or 0})
+    logger.info(f"Follower mode: replicating from {follower.primary_url}")
+    return follower
+
 clipboard = ClipboardManager()
-db = ClipboardDB()
+# Opened (connection + schema DDL) on first use or during warm-up, not at import
+db = Lazy("db", _open_db)
 
 # CORS: default dev-friendly, configurable via env for production
 allowed_origins_env = os.getenv("CORS_ALLOWED_ORIGINS", "")
@@ -127,36 +286,79 @@ async def root():
 async def ping():
     return None
 
+@app.get("/ready")
+async def readiness():
+    """Warm-up progress; 503 until every subsystem is initialized (no auth, never forces initialization)."""
+    report = startup.report()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+@app.get("/startup")
+async def startup_report():
+    """Cold-start timing report: startup phases and per-component initialization times."""
+    return startup.report()
+
 @app.get("/healthz")
 async def healthz():
     # Lightweight health that doesn't touch encryption/secure storage
     return {"status": "ok", "timestamp": time.time()}
 
-@app.get("/health")
-async def health_check():
-    """Health with basic security status."""
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, DB, crypto and keyring metrics."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def _security_checks() -> dict:
+    """Full encryption round-trip and key storage lookups; run by the health prober, not per request"""
+    # Probes must not count as activity, or they would keep an unlocked vault from auto-locking
+    last_used = clipboard_crypto.last_used
     try:
-        logger.info("/health requested")
-        # Check encryption system
-        encryption_ok = clipboard_crypto.verify_encryption()
-        
-        # Check secure storage
-        key_info = key_manager.get_key_info()
-        
-        return {
-            "status": "ok",
-            "timestamp": time.time(),
-            "security": {
-                "encryption_working": encryption_ok,
-                "keys_available": key_info["clipboard_key_exists"] and key_info["jwt_secret_exists"]
-            }
+        encryption_ok = not clipboard_crypto.locked and clipboard_crypto.verify_encryption()
+    finally:
+        clipboard_crypto.last_used = last_used
+    key_info = key_manager.get_key_info()
+    clipboard_key_available = key_info["clipboard_key_exists"] or (vault_lock is not None and vault_lock.initialized)
+    return {
+        "encryption_working": encryption_ok,
+        "keys_available": clipboard_key_available and key_info["jwt_secret_exists"],
+        "key_storage": key_info,
+    }
+
+# Cached health snapshot refreshed every CLIPVAULT_HEALTH_INTERVAL seconds
+health_prober = HealthProber.from_env(_security_checks)
+REGISTRY.gauge_callback(
+    "clipvault_health_snapshot_age_seconds", "Age of the cached health snapshot",
+    lambda: {(): health_prober.age()} if health_prober.probes else {})
+
+async def _health_snapshot(deep: bool):
+    if deep:
+        snapshot = await run_in_threadpool(health_prober.probe)
+        return snapshot, time.time(), 0.0
+    return health_prober.snapshot()
+
+def _health_payload(snapshot: dict, checked_at: float, age: float):
+    """(status code, body) for /health from a probe snapshot"""
+    if not snapshot["ok"]:
+        return 500, {"status": "error", "message": "Health check failed", "checked_at": checked_at}
+    details = snapshot["details"]
+    return 200, {
+        "status": "ok",
+        "timestamp": time.time(),
+        "checked_at": checked_at,
+        "age": round(age, 3),
+        "security": {
+            "encryption_working": details["encryption_working"],
+            "keys_available": details["keys_available"],
+            "vault_locked": clipboard_crypto.locked
         }
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return JSONResponse(
-            status_code=500,
-            content={"status": "error", "message": "Health check failed"}
-        )
+    }
+
+@app.get("/health")
+async def health_check(deep: bool = False):
+    """Health with basic security status from the cached probe; deep=1 runs the checks now."""
+    status, body = _health_payload(*await _health_snapshot(deep))
+    if status != 200:
+        return JSONResponse(status_code=status, content=body)
+    return body
 
 
 #@app.get("/clipboard/current")
@@ -208,21 +410,235 @@ async def set_clipboard(request: Request, user: str = Depends(get_current_user))
             return {"success": success, "user": user}
     except HTTPException:
         raise
+    except VaultLockedError:
+        raise HTTPException(status_code=423, detail="Vault is locked")
     except Exception as e:
         logger.error(f"Failed to set clipboard for user {user}: {e}")
         raise HTTPException(status_code=500, detail="Failed to set clipboard content")
 
-@app.get("/clipboard/history")
-async def get_history(limit: int = 10, user: str = Depends(get_current_user)):
-    """Get decrypted history (auth)."""
-    try:
+def _history_page(user: str, limit: int, version: int) -> CachedResponse:
+    """Serialized history page as of `version`, from the response cache when possible"""
+    cached = response_cache.get(("history", user, limit), version)
+    if cached is None:
         history = db.get_history(limit)
+        cached = response_cache.put(("history", user, limit), version,
+                                    serialize_json({"history": history, "user": user}))
         logger.info(f"User {user} retrieved clipboard history ({len(history)} items)")
-        return {"history": history, "user": user}
+    return cached
+
+@app.get("/clipboard/history")
+async def get_history(request: Request, limit: int = 10, user: str = Depends(get_current_user)):
+    """Get decrypted history (auth). Served from the response cache until history changes."""
+    try:
+        if clipboard_crypto.locked:
+            raise VaultLockedError("Vault is locked")
+        # Version first: a write racing the query leaves the entry under a version never served again
+        version = db.history_version
+        etag = make_etag("history", version, user, limit)
+        not_modified = _conditional(request, etag, "history")
+        if not_modified is not None:
+            return not_modified
+        return _cached_json(request, _history_page(user, limit, version), etag)
+    except VaultLockedError:
+        raise HTTPException(status_code=423, detail="Vault is locked")
     except Exception as e:
         logger.error(f"Failed to get history for user {user}: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve clipboard history")
 
+@app.get("/clipboard/wait")
+async def wait_for_history(request: Request, since: str, timeout: float = 30.0,
+                           user: str = Depends(get_current_user)):
+    """
+    Long-poll (auth): returns once history changes after version token `since`, or after `timeout` seconds.
+
+    The body carries the new `version` token to pass as the next `since`,
+    plus the entries added and ids deleted in between. `reset` means the
+    delta isn't available (history cleared, too far behind, or a token from
+    before a restart or never issued, e.g. `since=0`): reload
+    /clipboard/history, then wait from the returned `version`.
+    """
+    timeout = min(max(timeout, 0.0), LONG_POLL_MAX_TIMEOUT)
+    try:
+        if clipboard_crypto.locked:
+            raise VaultLockedError("Vault is locked")
+        version = db.history_version
+        since_version = _token_version(since)
+        if since_version is None or since_version > version:
+            return {"version": _version_token(version), "reset": True, "timed_out": False,
+                    "entries": [], "deleted": []}
+        since = since_version
+        if not await history_notifier.wait(lambda: db.history_version, since, timeout):
+            return {"version": _version_token(version), "reset": False, "timed_out": True,
+                    "entries": [], "deleted": []}
+
+        # Waiters woken by the same write share one query and decrypt
+        version = db.history_version
+        cached = response_cache.get(("wait", user, since), version)
+        if cached is None:
+            delta = db.changes_since(since)
+            if delta is None:
+                body = {"version": _version_token(version), "reset": True, "timed_out": False,
+                        "entries": [], "deleted": []}
+            else:
+                covered, added, deleted = delta
+                body = {"version": _version_token(covered), "reset": False, "timed_out": False,
+                        "entries": db.get_entries(added), "deleted": deleted}
+            cached = response_cache.put(("wait", user, since), version, serialize_json(body))
+        return _cached_json(request, cached)
+    except VaultLockedError:
+        raise HTTPException(status_code=423, detail="Vault is locked")
+    except Exception as e:
+        logger.error(f"Failed to wait for history changes for user {user}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to wait for clipboard history")
+
+# Rows read, decrypted and sent per chunk by /clipboard/export
+EXPORT_BATCH_SIZE = 500
+
+@app.get("/clipboard/export")
+async def export_history(request: Request, user: str = Depends(get_current_user)):
+    """
+    Stream the whole history as NDJSON, oldest first (auth).
+
+    One {"id", "content", "timestamp"} object per line. Rows are read and
+    decrypted one batch at a time as the client consumes the body, so memory
+    stays flat whatever the history size.
+    """
+    if clipboard_crypto.locked:
+        raise HTTPException(status_code=423, detail="Vault is locked")
+
+    def lines():
+        exported = 0
+        try:
+            for batch in db.iter_history(EXPORT_BATCH_SIZE):
+                exported += len(batch)
+                yield b"".join(serialize_json(entry) + b"\n" for entry in batch)
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated body
+            logger.error(f"Export for user {user} failed after {exported} entries: {e}")
+            raise
+        logger.info(f"User {user} exported {exported} clipboard entries")
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    headers = {"Content-Disposition": 'attachment; filename="clipvault-export.ndjson"',
+               "Vary": "Accept-Encoding"}
+    body = lines()
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        body = compress_stream(body, encoding)
+    # A sync iterator: Starlette pulls it on the threadpool, keeping queries and decryption off the event loop
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+
+# Progress of running and recent imports, polled via /clipboard/import/{job_id}
+import_jobs = ImportJobs()
+# Records encrypted and inserted per transaction by /clipboard/import
+IMPORT_BATCH_SIZE = 1000
+
+@app.post("/clipboard/import")
+async def import_history(request: Request, job_id: Optional[str] = None, user: str = Depends(get_current_user)):
+    """
+    Import NDJSON history (auth), e.g. a /clipboard/export file or another manager's history.
+
+    One {"content", "timestamp"} object per line; original timestamps are
+    kept and entries already stored (same content and timestamp) are
+    skipped. The body is consumed as it streams in: each batch is encrypted
+    and inserted in its own transaction while the next is parsed. Pass a
+    `job_id` to follow progress at /clipboard/import/{job_id} meanwhile.
+    The live clipboard is never touched.
+    """
+    if clipboard_crypto.locked:
+        raise HTTPException(status_code=423, detail="Vault is locked")
+    try:
+        job = import_jobs.create(user, job_id)
+    except ImportJobRunning as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        # Entries written before fingerprints existed would otherwise never match
+        await run_in_threadpool(db.backfill_fingerprints)
+        await run_import(job, request.stream(), lambda batch: run_in_threadpool(db.import_entries, batch),
+                         batch_size=IMPORT_BATCH_SIZE)
+        job.finish("done")
+        logger.info(f"User {user} imported clipboard history",
+                    extra={"job_id": job.id, "imported": job.imported, "duplicates": job.duplicates,
+                           "invalid": job.invalid, "failed": job.failed})
+        return job.to_dict()
+    except ImportStreamError as e:
+        job.finish("failed", str(e))
+        raise HTTPException(status_code=413, detail=str(e))
+    except VaultLockedError:
+        job.finish("failed", "Vault is locked")
+        raise HTTPException(status_code=423, detail="Vault is locked")
+    except Exception as e:
+        job.finish("failed", "Import failed")
+        logger.error(f"Import {job.id} for user {user} failed after {job.lines} lines: {e}")
+        raise HTTPException(status_code=500, detail="Failed to import clipboard history")
+
+@app.get("/clipboard/import/{job_id}")
+async def get_import_job(job_id: str, user: str = Depends(get_current_user)):
+    """Progress or outcome of an import (auth; only the importing user's jobs)."""
+    job = import_jobs.get(job_id, user)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job.to_dict()
+
+def _unsupported() -> HTTPException:
+    """501 for features the configured storage engine doesn't provide (sync)"""
+    return HTTPException(status_code=501, detail=f"Not supported by the {db.engine.name} storage engine")
+
+@app.get("/sync/changes")
+async def get_sync_changes(since: int = 0, limit: int = 500, user: str = Depends(get_current_user)):
+    """
+    Change log after sequence number `since` (auth), for devices keeping their own copy.
+
+    Content stays encrypted; only devices sharing the vault key can read it,
+    and `fingerprint` identifies the same entry across them. Keep `next` and
+    pass it as `since` on the next call; repeat while `more` is true.
+    """
+    limit = min(max(limit, 1), 5000)
+    try:
+        changes = db.get_changes(since, limit)
+        logger.info(f"User {user} pulled {len(changes['changes'])} changes since {since}")
+        return changes
+    except UnsupportedOperation:
+        raise _unsupported()
+    except Exception as e:
+        logger.error(f"Failed to get changes for user {user}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get changes")
+
+@app.get("/sync/snapshot")
+async def get_sync_snapshot(user: str = Depends(get_current_user)):
+    """
+    Every stored entry plus the change log position it matches (auth), to seed a follower.
+
+    NDJSON: a {"seq"} header line, then one {"id", "content", "timestamp",
+    "fingerprint"} object per entry, content still encrypted. Rows are read
+    in batches as the body streams; writes during the stream are all after
+    `seq`, so pulling /sync/changes from `seq` afterwards converges.
+    """
+    try:
+        seq, last_id = db.sync_position()
+    except UnsupportedOperation:
+        raise _unsupported()
+
+    def lines():
+        yield serialize_json({"seq": seq}) + b"\n"
+        sent = 0
+        for batch in db.iter_raw_history(last_id, EXPORT_BATCH_SIZE):
+            sent += len(batch)
+            yield b"".join(serialize_json(row) + b"\n" for row in batch)
+        logger.info(f"User {user} pulled a snapshot of {sent} entries at seq {seq}")
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/replica/status")
+async def replica_status(user: str = Depends(get_current_user)):
+    """Replication position and lag of a follower (auth); 404 on a primary."""
+    if follower is None:
+        raise HTTPException(status_code=404, detail="Not running as a follower")
+    return follower.status()
+
 @app.delete("/clipboard/clear-history")
 async def clear_history(user: str = Depends(get_current_user)):
     """Clear history (auth)."""
@@ -249,6 +665,51 @@ async def delete_history_entry(entry_id: int, user: str = Depends(get_current_us
         logger.error(f"Failed to delete entry {entry_id} for user {user}: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete entry")
 
+# Largest id list accepted by /clipboard/history/delete-batch
+MAX_BATCH_DELETE = 10000
+
+@app.post("/clipboard/history/delete-batch")
+async def delete_history_batch(ids: List[int] = Body(..., embed=True), user: str = Depends(get_current_user)):
+    """Delete many history entries in one transaction (auth)."""
+    if len(ids) > MAX_BATCH_DELETE:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_DELETE} ids per batch")
+    try:
+        deleted = db.delete_entries(ids)
+        missing = sorted(set(ids) - set(deleted))
+        logger.info(f"User {user} deleted {len(deleted)} clipboard entries in a batch")
+        return {"deleted": len(deleted), "ids": deleted, "missing": missing, "user": user}
+    except Exception as e:
+        logger.error(f"Failed to batch delete entries for user {user}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to delete entries")
+
+
+def _history_timestamp(value: Optional[str], name: str) -> Optional[str]:
+    """Normalize an ISO 8601 bound to the naive local form stored in clipboard_history"""
+    if value is None:
+        return None
+    try:
+        return normalize_timestamp(value)
+    except ValueError:
+        raise HTTPException(status_code=422, detail=f"'{name}' must be an ISO 8601 timestamp")
+
+@app.delete("/clipboard/history")
+def delete_history_range(before: Optional[str] = None, after: Optional[str] = None,
+                         user: str = Depends(get_current_user)):
+    """
+    Delete entries with after < timestamp < before (auth). At least one bound is required.
+
+    Sync so the chunked delete runs on the threadpool rather than the event loop.
+    """
+    if before is None and after is None:
+        raise HTTPException(status_code=422, detail="Give 'before' and/or 'after' (use /clipboard/clear-history to delete everything)")
+    before, after = _history_timestamp(before, "before"), _history_timestamp(after, "after")
+    try:
+        deleted = db.delete_range(before=before, after=after)
+        logger.info(f"User {user} deleted {deleted} clipboard entries by time range")
+        return {"deleted": deleted, "before": before, "after": after, "user": user}
+    except Exception as e:
+        logger.error(f"Failed to delete entries by range for user {user}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to delete entries")
 
 @app.post("/register")
 def register(form_data: OAuth2PasswordRequestForm = Depends()):
@@ -285,12 +746,13 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
         token = create_access_token({"sub": form_data.username})
+        refresh_token = create_refresh_token(db, form_data.username)
         logger.info(f"Successful login for user: {form_data.username}")
         
         # Clear password from memory
         SecureMemory.clear_string(form_data.password)
         
-        return {"access_token": token, "token_type": "bearer"}
+        return {"access_token": token, "token_type": "bearer", "refresh_token": refresh_token}
     except HTTPException:
         raise
     except Exception as e:
@@ -298,14 +760,42 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
         SecureMemory.clear_string(form_data.password)
         raise HTTPException(status_code=500, detail="Login failed")
 
+@app.post("/token/refresh")
+def token_refresh(refresh_token: str = Body(..., embed=True)):
+    """Refresh token -> new JWT bearer token (no password check)."""
+    try:
+        result = refresh_access_token(db, refresh_token)
+        logger.info(f"Access token refreshed for user: {result['username']}")
+        return {"access_token": result["access_token"], "token_type": "bearer"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Token refresh error: {e}")
+        raise HTTPException(status_code=500, detail="Token refresh failed")
+
+@app.post("/token/revoke")
+def token_revoke(refresh_token: str = Body(..., embed=True), user: str = Depends(get_current_user)):
+    """Revoke a refresh token (auth)."""
+    try:
+        revoked = revoke_refresh_token(db, refresh_token)
+        logger.info(f"User {user} revoked a refresh token: {revoked}")
+        return {"revoked": revoked, "user": user}
+    except Exception as e:
+        logger.error(f"Token revoke error for user {user}: {e}")
+        raise HTTPException(status_code=500, detail="Token revoke failed")
+
 @app.get("/clipboard/current")
-async def get_clipboard(user: str = Depends(get_current_user)):
-    """Get current clipboard (auth)."""
+async def get_clipboard(request: Request, user: str = Depends(get_current_user)):
+    """Get current clipboard (auth). ETag is a keyed hash of the content."""
     try:
         content = clipboard.get_clipboard_content()
-    
+        etag = make_etag("current", user, content)
+        not_modified = _conditional(request, etag, "current")
+        if not_modified is not None:
+            return not_modified
+
         logger.info(f"User {user} accessed current clipboard content")
-        return {"content": content, "user": user}
+        return _tagged(serialize_json({"content": content, "user": user}), etag)
     except Exception as e:
         logger.error(f"Failed to get clipboard for user {user}: {e}")
         raise HTTPException(status_code=500, detail="Failed to get clipboard content")
@@ -316,12 +806,16 @@ async def rotate_clipboard_key(user: str = Depends(get_current_user)):
     """Rotate clipboard key. Breaks old data."""
     try:
         clipboard_crypto.rotate_key()
+        # Cached pages were decrypted with the old key
+        db.bump_history_version()
         logger.warning(f"User {user} rotated clipboard encryption key")
         return {
             "message": "Clipboard encryption key rotated successfully",
             "warning": "All existing encrypted clipboard data is now inaccessible",
             "user": user
         }
+    except VaultLockedError:
+        raise HTTPException(status_code=423, detail="Vault is locked")
     except Exception as e:
         logger.error(f"Failed to rotate clipboard key for user {user}: {e}")
         raise HTTPException(status_code=500, detail="Key rotation failed")
@@ -330,7 +824,7 @@ async def rotate_clipboard_key(user: str = Depends(get_current_user)):
 async def rotate_jwt_secret_endpoint(user: str = Depends(get_current_user)):
     """Rotate JWT secret. Invalidates tokens."""
     try:
-        result = rotate_jwt_secret()
+        result = rotate_jwt_secret(db)
         logger.warning(f"User {user} rotated JWT secret key")
         result["user"] = user
         return result
@@ -339,15 +833,21 @@ async def rotate_jwt_secret_endpoint(user: str = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail="JWT secret rotation failed")
 
 @app.get("/admin/security-status")
-async def get_security_status(user: str = Depends(get_current_user)):
-    """Security status (auth)."""
+async def get_security_status(deep: bool = False, user: str = Depends(get_current_user)):
+    """Security status from the cached health probe; deep=1 runs the checks now (auth)."""
     try:
-        key_info = key_manager.get_key_info()
-        encryption_ok = clipboard_crypto.verify_encryption()
+        snapshot, checked_at, age = await _health_snapshot(deep)
+        if not snapshot["ok"]:
+            raise Exception("Health probe failed")
+        details = snapshot["details"]
         
         status = {
-            "encryption_working": encryption_ok,
-            "key_storage": key_info,
+            "encryption_working": details["encryption_working"],
+            "key_storage": details["key_storage"],
+            "vault": vault_lock.status() if vault_lock is not None else None,
+            "checked_at": checked_at,
+            "age": round(age, 3),
+            "prober": health_prober.stats(),
             "timestamp": time.time(),
             "user": user
         }
@@ -358,37 +858,224 @@ async def get_security_status(user: str = Depends(get_current_user)):
         logger.error(f"Failed to get security status for user {user}: {e}")
         raise HTTPException(status_code=500, detail="Failed to get security status")
 
+# Master-password vault (CLIPVAULT_UNLOCK_MODE=password)
+@app.get("/vault/status")
+async def get_vault_status(user: str = Depends(get_current_user)):
+    """Vault lock state (auth)."""
+    if vault_lock is None:
+        raise HTTPException(status_code=404, detail="Master-password unlock is disabled")
+    return {**vault_lock.status(), "user": user}
+
+@app.post("/vault/unlock")
+def unlock_vault(password: str = Body(..., embed=True), user: str = Depends(get_current_user)):
+    """Unlock the vault; the first unlock sets the master password (auth). Sync: the KDF runs in the threadpool."""
+    if vault_lock is None:
+        raise HTTPException(status_code=404, detail="Master-password unlock is disabled")
+    try:
+        vault_lock.unlock(password)
+        if not clipboard_crypto.verify_encryption():
+            raise Exception("Encryption verification failed after unlock")
+        logger.warning(f"User {user} unlocked the vault")
+        return {**vault_lock.status(), "user": user}
+    except InvalidPasswordError:
+        logger.warning(f"User {user} failed to unlock the vault")
+        raise HTTPException(status_code=401, detail="Invalid master password")
+    except Exception as e:
+        logger.error(f"Failed to unlock vault for user {user}: {e}")
+        raise HTTPException(status_code=500, detail="Vault unlock failed")
+
+@app.post("/vault/lock")
+async def lock_vault(user: str = Depends(get_current_user)):
+    """Lock the vault now (auth)."""
+    if vault_lock is None:
+        raise HTTPException(status_code=404, detail="Master-password unlock is disabled")
+    vault_lock.lock()
+    logger.warning(f"User {user} locked the vault")
+    return {**vault_lock.status(), "user": user}
+
+@app.get("/admin/rate-limits")
+async def get_rate_limit_stats(user: str = Depends(get_current_user)):
+    """Rate limiter / load shedding counters (auth)."""
+    return {
+        "rate_limiter": rate_limiter.stats(),
+        "admission": admission.stats(),
+        "db_pending": db.pending_operations,
+        "user": user
+    }
+
+@app.get("/admin/profiles")
+async def list_profiles(user: str = Depends(get_current_user)):
+    """List captured request profiles, newest first (auth)."""
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    return {"profiles": profiler.list_profiles(), "directory": profiler.directory, "user": user}
+
+@app.get("/admin/profiles/latest")
+async def get_latest_profile(format: str = "pstats", user: str = Depends(get_current_user)):
+    """Latest profile as a pstats file, or as a text summary with format=text (auth)."""
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    path = profiler.latest_profile()
+    if path is None:
+        raise HTTPException(status_code=404, detail="No profiles captured yet")
+    logger.info(f"User {user} fetched request profile {os.path.basename(path)}")
+    if format == "text":
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).sort_stats("cumulative").print_stats(50)
+        return PlainTextResponse(out.getvalue())
+    return FileResponse(path, media_type="application/octet-stream", filename=os.path.basename(path))
+
 @app.get("/admin/raw-history")
-async def get_raw_history(limit: int = 10, user: str = Depends(get_current_user)):
+async def get_raw_history(request: Request, limit: int = 10, user: str = Depends(get_current_user)):
     """Raw encrypted history (auth)."""
     try:
-        raw_history = db.get_raw_history(limit)
+        version = db.history_version
+        cached = response_cache.get(("raw-history", user, limit), version)
+        if cached is None:
+            raw_history = db.get_raw_history(limit)
+            cached = response_cache.put(("raw-history", user, limit), version,
+                                        serialize_json({"raw_history": raw_history, "user": user}))
         logger.info(f"User {user} accessed raw encrypted history")
-        return {"raw_history": raw_history, "user": user}
+        return _cached_json(request, cached)
     except Exception as e:
         logger.error(f"Failed to get raw history for user {user}: {e}")
         raise HTTPException(status_code=500, detail="Failed to get raw history")
 
 @app.get("/preferences")
-async def get_preferences(user: str = Depends(get_current_user)):
+async def get_preferences(request: Request, user: str = Depends(get_current_user)):
+    etag = make_etag("preferences", db.preferences_version, user)
+    not_modified = _conditional(request, etag, "preferences")
+    if not_modified is not None:
+        return not_modified
     prefs = db.get_user_preferences(user)
-    print(prefs)
-    return prefs
+    return _tagged(serialize_json(prefs), etag)
 
 @app.post("/preferences")
 async def update_preferences(preferences: dict, user: str = Depends(get_current_user)):
-    import json
-    logger.info(f"Updating preferences for {user}: {json.dumps(preferences)}")
+    # Field names only; preference values are user data
+    logger.info(f"Updating preferences for {user}", extra={"fields": sorted(preferences)})
     try:
         result = db.update_user_preferences(user, preferences)
-        logger.info(f"Update result: {result}")
+        logger.debug(f"Preferences update result for {user}: {result}")
         return {"status": "ok", "success": True}
     except Exception as e:
         logger.error(f"Failed to update preferences for {user}: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to update preferences")
 
 
+# /batch: read operations a client can combine into one round-trip.
+# Each returns (status, etag or None, body factory); the body is only built when no ETag matched.
+def _batch_health(user: str, params: dict):
+    status, body = _health_payload(*health_prober.snapshot())
+    return status, None, lambda: serialize_json(body)
+
+def _batch_preferences(user: str, params: dict):
+    return (200, make_etag("preferences", db.preferences_version, user),
+            lambda: serialize_json(db.get_user_preferences(user)))
+
+def _batch_history(user: str, params: dict):
+    if clipboard_crypto.locked:
+        raise VaultLockedError("Vault is locked")
+    limit = int(params.get("limit", 10))
+    version = db.history_version
+    return 200, make_etag("history", version, user, limit), lambda: _history_page(user, limit, version).body
+
+def _batch_current(user: str, params: dict):
+    content = clipboard.get_clipboard_content()
+    return (200, make_etag("current", user, content),
+            lambda: serialize_json({"content": content, "user": user}))
+
+# name -> (handler, reads the database); database reads share one snapshot
+BATCH_OPERATIONS = {
+    "health": (_batch_health, False),
+    "preferences": (_batch_preferences, True),
+    "history": (_batch_history, True),
+    "current": (_batch_current, False),
+}
+MAX_BATCH_OPERATIONS = 20
+
+def _run_batch_op(name: str, op: dict, user: str):
+    """(status, etag, body bytes or None) for one sub-operation; failures become error statuses"""
+    params = op.get("params") or {}
+    if not isinstance(params, dict):
+        return 400, None, serialize_json({"detail": "params must be an object"})
+    if follower is not None and name in PRIMARY_ONLY_BATCH_OPS:
+        return 403, None, serialize_json({"detail": "Not replicated; ask the primary",
+                                          "primary": follower.primary_url})
+    handler, _ = BATCH_OPERATIONS[name]
+    try:
+        status, etag, make_body = handler(user, params)
+        matched = etag and etag_matches(op.get("if_none_match"), etag)
+        if matched:
+            NOT_MODIFIED_RESPONSES.inc(name)
+            return 304, matched, None
+        return status, etag, make_body()
+    except VaultLockedError:
+        return 423, None, serialize_json({"detail": "Vault is locked"})
+    except (TypeError, ValueError):
+        return 400, None, serialize_json({"detail": "Invalid parameters"})
+    except Exception as e:
+        logger.error(f"Batch operation {name} failed for user {user}: {e}")
+        return 500, None, serialize_json({"detail": "Operation failed"})
+
+@app.post("/batch")
+def run_batch(request: Request, ops: List[dict] = Body(..., embed=True), user: str = Depends(get_current_user)):
+    """
+    Run several read operations in one request (auth).
+
+    Body: {"ops": [{"op": "history", "id": "h", "params": {"limit": 20}, "if_none_match": "..."}, ...]}
+    with op one of health, preferences, history, current. Results come back
+    in order as {"id", "op", "status", "etag", "body"}; one failing op doesn't
+    fail the batch. The token is checked once and all database reads run
+    against one snapshot. Sync so that snapshot is held on the threadpool.
+    """
+    if len(ops) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_OPERATIONS} operations per batch")
+    names = []
+    for op in ops:
+        if not isinstance(op.get("op"), str) or op["op"] not in BATCH_OPERATIONS:
+            raise HTTPException(status_code=422, detail=f"Unknown operation: {op.get('op')!r}")
+        names.append(op["op"])
+
+    results = [None] * len(ops)
+    for index, (name, op) in enumerate(zip(names, ops)):
+        if not BATCH_OPERATIONS[name][1]:
+            results[index] = _run_batch_op(name, op, user)
+    with db.snapshot():
+        for index, (name, op) in enumerate(zip(names, ops)):
+            if BATCH_OPERATIONS[name][1]:
+                results[index] = _run_batch_op(name, op, user)
+
+    # Bodies are spliced in as already-serialized JSON (cached history pages are never re-encoded)
+    parts = []
+    for index, (name, op, (status, etag, body)) in enumerate(zip(names, ops, results)):
+        parts.append(b'{"id":' + serialize_json(op.get("id", index)) + b',"op":' + serialize_json(name)
+                     + b',"status":' + str(status).encode() + b',"etag":' + serialize_json(etag)
+                     + b',"body":' + (body if body is not None else b"null") + b"}")
+    logger.info(f"User {user} ran a batch of {len(ops)} operations", extra={"ops": names})
+    return _cached_json(request, CachedResponse(b'{"results":[' + b",".join(parts) + b"]}"))
+
+
+def _print_startup_report() -> int:
+    """--startup-report: warm everything up synchronously, print the timing report and exit"""
+    startup.mark("lifespan_start")
+    startup.warm_up(WARM_UP_TASKS).join()
+    report = startup.report()
+    print(json.dumps(report, indent=2))
+    return 0 if report["ready"] else 1
+
+startup.mark("app_defined")
+
 if __name__ == "__main__":
+    if "--startup-report" in sys.argv[1:]:
+        sys.exit(_print_startup_report())
+    if "--follower" in sys.argv[1:]:
+        index = sys.argv.index("--follower")
+        if index + 1 >= len(sys.argv):
+            sys.exit("usage: main.py --follower PRIMARY_URL")
+        enable_follower(sys.argv[index + 1])
+    elif os.getenv("CLIPVAULT_FOLLOW"):
+        enable_follower(os.environ["CLIPVAULT_FOLLOW"])
     host = os.getenv("HOST", "127.0.0.1")
     try:
         port = int(os.getenv("PORT", "8000"))
@@ -0,0 +1,209 @@
+"""
+Metrics Module
+Low-overhead counters and histograms rendered in the Prometheus text format
+"""
+
+import functools
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Tuple
+
+# Latency buckets in seconds (50us .. 10s)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """
+    Monotonic counter keyed by label values
+
+    Updates take no lock: each one is a dict lookup and an add. Under heavy
+    thread contention an increment can occasionally be lost, which is
+    acceptable for monitoring and keeps metrics out of the profile.
+    """
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self):
+        for labels, value in list(self._values.items()):
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Histogram:
+    """Cumulative histogram keyed by label values (same no-lock update policy as Counter)"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series.setdefault(labels, [[0] * (len(self.buckets) + 1), 0.0, 0])
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def samples(self):
+        for labels, (counts, total, count) in list(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, labels, f'le="{le}"'), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), count
+
+
+class CallbackGauge:
+    """Gauge (or externally owned counter) whose samples are read at scrape time"""
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Dict[Tuple, float]],
+                 labelnames: Iterable[str] = (), type_name: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+        self.type_name = type_name
+
+    def samples(self):
+        for labels, value in self.callback().items():
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them for /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_callback(self, name: str, documentation: str, callback, labelnames: Iterable[str] = (),
+                       type_name: str = "gauge") -> CallbackGauge:
+        # Callbacks are replaced on re-registration so they always point at live objects
+        metric = CallbackGauge(name, documentation, callback, labelnames, type_name)
+        self._metrics[name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for sample_name, labels, value in metric.samples():
+                lines.append(f"{sample_name}{labels} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Shared metric families, instrumented from each layer
+HTTP_REQUESTS = REGISTRY.counter(
+    "clipvault_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "clipvault_http_request_duration_seconds", "HTTP request latency", ("method", "route"))
+DB_OPERATION_LATENCY = REGISTRY.histogram(
+    "clipvault_db_operation_seconds", "ClipboardDB operation latency", ("operation",))
+DB_LOCK_WAIT = REGISTRY.histogram(
+    "clipvault_db_lock_wait_seconds", "Time spent waiting for the ClipboardDB lock")
+CRYPTO_LATENCY = REGISTRY.histogram(
+    "clipvault_crypto_operation_seconds", "ClipboardCrypto operation latency", ("operation",))
+CRYPTO_BYTES = REGISTRY.counter(
+    "clipvault_crypto_bytes_total", "Plaintext bytes processed by ClipboardCrypto", ("operation",))
+KEYRING_LATENCY = REGISTRY.histogram(
+    "clipvault_keyring_call_seconds", "Secure key storage call latency", ("operation",))
+CLIPBOARD_POLLS = REGISTRY.counter(
+    "clipvault_clipboard_polls_total", "ClipboardManager monitor polls")
+CLIPBOARD_CHANGES = REGISTRY.counter(
+    "clipvault_clipboard_changes_total", "Clipboard changes detected by the monitor")
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request counts and latency"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            # Route templates keep label cardinality bounded; unknown paths share one label
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(scope["method"], route_path, status[0])
+            HTTP_LATENCY.observe(elapsed, scope["method"], route_path)
+
+
+def timed(histogram: Histogram, *labels):
+    """Decorator recording the wrapped call's latency in `histogram`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, *labels)
+        return wrapper
+    return decorator
@@ -0,0 +1,141 @@
+"""
+Request Profiling Module
+Opt-in cProfile sampling of API requests, written to a rotating directory of .prof files
+"""
+
+import cProfile
+import itertools
+import os
+import re
+import threading
+import time
+import logging
+from typing import List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-clipvault-profile"
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class RequestProfiler:
+    """
+    Decides which requests to profile and manages the profile directory
+
+    Profiles cover the event loop thread for the duration of the request,
+    which includes async endpoints and middleware; sync endpoints run in the
+    threadpool and show up as the awaited hand-off. Only one request is
+    profiled at a time, others pass through untouched.
+
+    cProfile hooks the whole thread, not one coroutine: requests served
+    concurrently on the event loop while a profile is running show up in
+    it too. Profile an otherwise idle server (or read concurrent frames as
+    noise) when attributing time to a single request.
+    """
+
+    def __init__(self, directory: str, sample_every: int = 0, keep: int = 50):
+        """
+        Args:
+            directory: Where .prof files are written
+            sample_every: Profile 1-in-N requests (0 = only header-selected requests)
+            keep: Number of profiles kept before the oldest are deleted
+        """
+        self.directory = os.path.abspath(directory)
+        self.sample_every = sample_every
+        self.keep = keep
+        self._counter = itertools.count(1)
+        self._busy = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def should_profile(self, scope) -> bool:
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER and value not in (b"", b"0"):
+                return True
+        return self.sample_every > 0 and next(self._counter) % self.sample_every == 0
+
+    def try_acquire(self) -> bool:
+        return self._busy.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._busy.release()
+
+    def save(self, profile: cProfile.Profile, method: str, path: str, elapsed: float) -> str:
+        """Dump stats in pstats format and rotate old profiles"""
+        name = f"{time.time_ns()}_{method}_{_UNSAFE_CHARS.sub('_', path.strip('/')) or 'root'}_{int(elapsed * 1000)}ms.prof"
+        filepath = os.path.join(self.directory, name)
+        profile.dump_stats(filepath)
+        self._rotate()
+        logger.info(f"Wrote request profile {name}")
+        return filepath
+
+    def _rotate(self) -> None:
+        profiles = self.list_profiles()
+        for stale in profiles[self.keep:]:
+            try:
+                os.remove(os.path.join(self.directory, stale["name"]))
+            except OSError:
+                pass
+
+    def list_profiles(self) -> List[dict]:
+        """Profiles newest first"""
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".prof"):
+                    stat = entry.stat()
+                    entries.append({"name": entry.name, "size": stat.st_size, "created": stat.st_mtime})
+        entries.sort(key=lambda e: e["name"], reverse=True)
+        return entries
+
+    def latest_profile(self) -> Optional[str]:
+        profiles = self.list_profiles()
+        return os.path.join(self.directory, profiles[0]["name"]) if profiles else None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling the requests selected by RequestProfiler"""
+
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.profiler.should_profile(scope) or not self.profiler.try_acquire():
+            await self.app(scope, receive, send)
+            return
+
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                profile.disable()
+            # Writing and rotating files is blocking I/O; keep it off the event loop
+            await run_in_threadpool(self.profiler.save, profile, scope["method"], scope["path"],
+                                    time.perf_counter() - start)
+        finally:
+            self.profiler.release()
+
+
+def profiler_from_env() -> Optional[RequestProfiler]:
+    """
+    Build the profiler when CLIPVAULT_PROFILE=1, otherwise None (no middleware, zero cost)
+
+    CLIPVAULT_PROFILE_SAMPLE: profile 1-in-N requests (default 0, header-selected only)
+    CLIPVAULT_PROFILE_DIR: output directory (default ./profiles)
+    CLIPVAULT_PROFILE_KEEP: profiles kept on disk (default 50)
+    """
+    if os.getenv("CLIPVAULT_PROFILE", "0") != "1":
+        return None
+    try:
+        sample_every = int(os.getenv("CLIPVAULT_PROFILE_SAMPLE", "0"))
+        keep = int(os.getenv("CLIPVAULT_PROFILE_KEEP", "50"))
+    except ValueError:
+        sample_every, keep = 0, 50
+    directory = os.getenv("CLIPVAULT_PROFILE_DIR", "profiles")
+    logger.warning(f"Request profiling enabled (1-in-{sample_every or 'header'}), writing to {directory}")
+    return RequestProfiler(directory, sample_every=sample_every, keep=keep)
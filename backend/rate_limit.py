@@ -0,0 +1,324 @@
+"""
+Rate Limiting Module
+Per-user / per-route token buckets and admission control for the ASGI app
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import math
+import os
+import re
+import time
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Seconds the JWT secret is reused before it is read from the keystore again
+SECRET_TTL = 30.0
+# Numeric path segments collapse into one route key ("/clipboard/history/42" -> "/clipboard/history/{id}")
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, at most `capacity` banked"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def consume(self, now: float, amount: float = 1.0) -> float:
+        """
+        Take `amount` tokens if available
+
+        Returns:
+            0.0 when admitted, otherwise seconds until enough tokens are available
+        """
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (amount - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Keeps one token bucket per (identity, route) pair with O(1) accounting per request"""
+
+    def __init__(self, rate: float = 50.0, burst: float = 200.0,
+                 route_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+                 max_buckets: int = 10000):
+        """
+        Args:
+            rate: Default refill rate (requests per second)
+            burst: Default bucket capacity
+            route_limits: Optional {path prefix: (rate, burst)} overrides
+            max_buckets: Bucket count above which idle (full) buckets are pruned
+        """
+        self.rate = rate
+        self.burst = burst
+        self.route_limits = dict(route_limits or {})
+        self.max_buckets = max_buckets
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self.rejected = 0
+        self.rejected_by_route: Dict[str, int] = {}
+
+    def _limits_for(self, route: str) -> Tuple[float, float]:
+        for prefix, limits in self.route_limits.items():
+            if route.startswith(prefix):
+                return limits
+        return self.rate, self.burst
+
+    def check(self, identity: str, route: str, now: float = None) -> float:
+        """
+        Account one request for `identity` on `route`
+
+        Returns:
+            0.0 when admitted, otherwise the suggested Retry-After in seconds
+        """
+        now = time.monotonic() if now is None else now
+        key = (identity, route)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_buckets:
+                self._prune(now)
+            rate, burst = self._limits_for(route)
+            bucket = self._buckets[key] = TokenBucket(rate, burst, now)
+        retry_after = bucket.consume(now)
+        if retry_after:
+            self.rejected += 1
+            self.rejected_by_route[route] = self.rejected_by_route.get(route, 0) + 1
+        return retry_after
+
+    def _prune(self, now: float) -> None:
+        """Drop buckets that have refilled completely (they carry no state)"""
+        for key, bucket in list(self._buckets.items()):
+            if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.capacity:
+                del self._buckets[key]
+
+    def stats(self) -> dict:
+        return {
+            "buckets": len(self._buckets),
+            "rejected": self.rejected,
+            "rejected_by_route": dict(self.rejected_by_route),
+        }
+
+
+class AdmissionController:
+    """Sheds load when in-flight requests, the DB lock queue or the threadpool are saturated"""
+
+    def __init__(self, max_in_flight: int = 256, max_db_pending: int = 32,
+                 db_pending: Optional[Callable[[], int]] = None,
+                 threadpool_saturation: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            max_in_flight: Concurrent requests admitted before shedding
+            max_db_pending: Callers queued on the database lock before shedding
+            db_pending: Callable returning the number of callers queued on the DB lock
+            threadpool_saturation: Callable returning True when no worker threads are free
+        """
+        self.max_in_flight = max_in_flight
+        self.max_db_pending = max_db_pending
+        self.db_pending = db_pending
+        self.threadpool_saturation = threadpool_saturation or _anyio_threadpool_saturated
+        self.in_flight = 0
+        self.rejected = {"in_flight": 0, "db_queue": 0, "threadpool": 0}
+
+    def overloaded(self) -> Optional[str]:
+        """Return the saturated resource name, or None if the request may proceed"""
+        reason = None
+        if self.in_flight >= self.max_in_flight:
+            reason = "in_flight"
+        elif self.db_pending is not None and self.db_pending() >= self.max_db_pending:
+            reason = "db_queue"
+        elif self.threadpool_saturation():
+            reason = "threadpool"
+        if reason:
+            self.rejected[reason] += 1
+        return reason
+
+    def stats(self) -> dict:
+        return {"in_flight": self.in_flight, "rejected": dict(self.rejected)}
+
+
+def _anyio_threadpool_saturated() -> bool:
+    """True when every anyio worker thread is busy and others are already queued"""
+    try:
+        from anyio import to_thread
+        limiter = to_thread.current_default_thread_limiter()
+        return limiter.borrowed_tokens >= limiter.total_tokens and limiter.statistics().tasks_waiting > 0
+    except Exception:
+        return False
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying RateLimiter (429) and AdmissionController (503)"""
+
+    def __init__(self, app, limiter: RateLimiter, admission: Optional[AdmissionController] = None,
+                 exempt_paths: Tuple[str, ...] = ("/ping", "/healthz", "/metrics", "/ready"),
+                 long_poll_paths: Tuple[str, ...] = ("/clipboard/wait",),
+                 jwt_secret: Optional[Callable[[], Optional[str]]] = None):
+        """
+        Args:
+            exempt_paths: Never limited or shed
+            long_poll_paths: Limited and shed on arrival, but not counted in flight while held open
+            jwt_secret: Returns the HS256 secret access tokens are signed with; requests
+                with a validly signed token share their user's bucket, all others are
+                limited by client address. None limits everything by address.
+        """
+        self.app = app
+        self.limiter = limiter
+        self.admission = admission
+        self.exempt_paths = exempt_paths
+        self.long_poll_paths = long_poll_paths
+        self.jwt_secret = jwt_secret
+        self._secret = None
+        self._secret_read_at = -math.inf
+
+    async def _current_secret(self) -> Optional[bytes]:
+        """The JWT secret, re-read (off the event loop) every SECRET_TTL seconds"""
+        if self.jwt_secret is None:
+            return None
+        now = time.monotonic()
+        if now - self._secret_read_at >= SECRET_TTL:
+            self._secret_read_at = now
+            try:
+                secret = await run_in_threadpool(self.jwt_secret)
+            except Exception as e:
+                logger.error(f"Rate limiter could not read the JWT secret: {e}")
+                secret = None
+            self._secret = secret.encode("utf-8") if secret else None
+        return self._secret
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        route = _ID_SEGMENT.sub("/{id}", scope["path"])
+        retry_after = self.limiter.check(_identity(scope, await self._current_secret()), route)
+        if retry_after:
+            logger.warning(f"Rate limit exceeded on {route}")
+            await _reject(send, 429, "Too many requests", retry_after)
+            return
+
+        if self.admission is None:
+            await self.app(scope, receive, send)
+            return
+
+        reason = self.admission.overloaded()
+        if reason:
+            logger.warning(f"Shedding request to {route}: {reason} saturated")
+            await _reject(send, 503, "Server busy", 1.0)
+            return
+
+        if scope["path"] in self.long_poll_paths:
+            # Idle waiters hold no thread or DB work; counting them would shed everything else
+            await self.app(scope, receive, send)
+            return
+
+        self.admission.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.admission.in_flight -= 1
+
+
+def _b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _token_subject(authorization: bytes, secret: bytes) -> Optional[str]:
+    """`sub` claim of a Bearer JWT signed (HS256) with `secret`; None if absent, malformed or forged"""
+    scheme, _, token = authorization.partition(b" ")
+    if scheme.lower() != b"bearer":
+        return None
+    parts = token.split(b".")
+    if len(parts) != 3:
+        return None
+    try:
+        signature = _b64url_decode(parts[2])
+        expected = hmac.new(secret, parts[0] + b"." + parts[1], hashlib.sha256).digest()
+        if not hmac.compare_digest(signature, expected):
+            return None
+        claims = json.loads(_b64url_decode(parts[1]))
+    except (ValueError, TypeError):
+        return None
+    subject = claims.get("sub") if isinstance(claims, dict) else None
+    return subject if isinstance(subject, str) and subject else None
+
+
+def _identity(scope, secret: Optional[bytes] = None) -> str:
+    """
+    The user a request is signed in as (JWT `sub`, so every token of a user shares one bucket),
+    otherwise the client address
+
+    Only tokens signed with `secret` name a user: forged or unsigned ones
+    would let anyone drain another user's bucket, or dodge the per-address
+    limit with a new `sub` per request. Expiry isn't checked; an expired
+    token still comes from whoever was issued it.
+    """
+    for name, value in scope.get("headers", ()) if secret is not None else ():
+        if name == b"authorization":
+            subject = _token_subject(value, secret)
+            if subject is not None:
+                return f"user:{subject}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def limiter_from_env() -> RateLimiter:
+    """Build the default limiter (CLIPVAULT_RATE_LIMIT_RPS / CLIPVAULT_RATE_LIMIT_BURST)"""
+    rate = _env_float("CLIPVAULT_RATE_LIMIT_RPS", 50.0)
+    burst = _env_float("CLIPVAULT_RATE_LIMIT_BURST", 200.0)
+    auth_rate = _env_float("CLIPVAULT_AUTH_RATE_LIMIT_RPS", 10.0)
+    auth_burst = _env_float("CLIPVAULT_AUTH_RATE_LIMIT_BURST", 50.0)
+    return RateLimiter(rate, burst, route_limits={
+        "/login": (auth_rate, auth_burst),
+        "/register": (auth_rate, auth_burst),
+        "/token/": (auth_rate, auth_burst),
+        "/vault/unlock": (auth_rate, auth_burst),
+    })
+
+
+def admission_from_env(db_pending: Callable[[], int] = None) -> AdmissionController:
+    """Build the default admission controller (CLIPVAULT_MAX_IN_FLIGHT / CLIPVAULT_MAX_DB_PENDING)"""
+    return AdmissionController(
+        max_in_flight=int(_env_float("CLIPVAULT_MAX_IN_FLIGHT", 256)),
+        max_db_pending=int(_env_float("CLIPVAULT_MAX_DB_PENDING", 32)),
+        db_pending=db_pending,
+    )
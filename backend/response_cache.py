@@ -0,0 +1,255 @@
+"""
+Response Cache Module
+Versioned, byte-budgeted LRU cache of fully serialized API responses, plus ETag helpers
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import secrets
+import threading
+import logging
+import zlib
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Iterator, Optional, Tuple
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_REQUESTS = REGISTRY.counter(
+    "clipvault_response_cache_requests_total", "Response cache lookups by result", ("result",))
+NOT_MODIFIED_RESPONSES = REGISTRY.counter(
+    "clipvault_not_modified_total", "304 responses to If-None-Match by endpoint", ("endpoint",))
+RESPONSE_COMPRESSIONS = REGISTRY.counter(
+    "clipvault_response_compressions_total", "Response bodies compressed (cache misses for an encoding)",
+    ("encoding",))
+
+# Content codings we produce, in order of preference on equal q-values
+ENCODINGS = ("gzip", "deflate")
+
+# Version counters restart at 0 with the process; the boot id keeps tags from before a restart from matching
+BOOT_ID = secrets.token_hex(4)
+# Tags are keyed hashes so they don't reveal (or allow guessing) the content they cover
+_ETAG_KEY = secrets.token_bytes(16)
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag for the representation identified by `parts` (versions, params, user, content)"""
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode("utf-8"),
+                             key=_ETAG_KEY, digest_size=12).hexdigest()
+    return f'"{BOOT_ID}-{digest}"'
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """Tag of a content-coded variant (strong tags must differ per coding)"""
+    return f'{etag[:-1]}-{encoding}"' if encoding else etag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    If-None-Match evaluation (RFC 9110: weak comparison, "*" matches any current representation)
+
+    Tags of content-coded variants of `etag` match too. Returns the matching
+    tag (to echo in the 304), or None.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag or candidate in (encoded_etag(etag, encoding) for encoding in ENCODINGS):
+            return candidate
+    return None
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Best of ENCODINGS acceptable per an Accept-Encoding header, or None for identity"""
+    if not accept_encoding:
+        return None
+    qualities: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            qualities[coding] = q
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = qualities.get(encoding, qualities.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int = 6) -> bytes:
+    """gzip (mtime 0, so output is deterministic) or HTTP "deflate" (zlib format)"""
+    RESPONSE_COMPRESSIONS.inc(encoding)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    if encoding == "deflate":
+        return zlib.compress(body, level)
+    raise ValueError(f"Unsupported content coding: {encoding}")
+
+
+def serialize_json(content) -> bytes:
+    """Same bytes as Starlette's JSONResponse, so cached and uncached responses are identical"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None,
+                      separators=(",", ":")).encode("utf-8")
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, level: int = 6) -> Iterator[bytes]:
+    """Incrementally gzip/deflate a chunked body, flushing per chunk so the client can decode as it arrives"""
+    RESPONSE_COMPRESSIONS.inc(encoding)
+    # wbits: 16+ for a gzip container, plain for the zlib format HTTP calls "deflate"
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CachedResponse:
+    """A serialized response body and the compressed variants built for it so far"""
+
+    __slots__ = ("key", "body", "variants")
+
+    def __init__(self, body: bytes, key: Hashable = None):
+        self.key = key
+        self.body = body
+        self.variants: Dict[str, bytes] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.variants.values())
+
+
+class ResponseCache:
+    """
+    LRU of serialized responses for a single data version
+
+    Callers pass the current version (e.g. ClipboardDB.history_version) on
+    every lookup; the first lookup or store with a newer version drops all
+    entries, so writers only have to bump a counter. Read the version before
+    querying: a write racing the query then leaves an entry under the old
+    version, which is never served again.
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024, compress_min_bytes: int = 1024):
+        """
+        Args:
+            max_bytes: Budget for cached bodies and variants; least recently used entries are evicted (0 disables)
+            compress_min_bytes: Bodies smaller than this are always sent uncompressed
+        """
+        self.max_bytes = max_bytes
+        self.compress_min_bytes = compress_min_bytes
+        self.version = None
+        self.bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """
+        CLIPVAULT_RESPONSE_CACHE_BYTES budget (default 8 MiB, 0 disables)
+        CLIPVAULT_COMPRESS_MIN_BYTES compression threshold (default 1024)
+        """
+        try:
+            max_bytes = int(os.getenv("CLIPVAULT_RESPONSE_CACHE_BYTES", str(8 * 1024 * 1024)))
+        except ValueError:
+            max_bytes = 8 * 1024 * 1024
+        try:
+            compress_min_bytes = int(os.getenv("CLIPVAULT_COMPRESS_MIN_BYTES", "1024"))
+        except ValueError:
+            compress_min_bytes = 1024
+        return cls(max_bytes=max_bytes, compress_min_bytes=compress_min_bytes)
+
+    def _sync_version(self, version) -> None:
+        if version != self.version:
+            self._entries.clear()
+            self.bytes = 0
+            self.version = version
+
+    def get(self, key: Hashable, version) -> Optional[CachedResponse]:
+        with self._lock:
+            self._sync_version(version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        RESPONSE_CACHE_REQUESTS.inc("hit" if entry is not None else "miss")
+        return entry
+
+    def put(self, key: Hashable, version, body: bytes) -> CachedResponse:
+        """Store `body` for `key` at `version`; returns the entry (also when it was too big to cache)"""
+        entry = CachedResponse(body, key)
+        if entry.size > self.max_bytes:
+            return entry
+        with self._lock:
+            self._sync_version(version)
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.size
+            self._entries[key] = entry
+            self.bytes += entry.size
+            self._evict()
+        return entry
+
+    def _evict(self) -> None:
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= evicted.size
+            self.evictions += 1
+
+    def encode(self, entry: CachedResponse, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Body to send for `entry` given the request's Accept-Encoding
+
+        Returns:
+            (bytes, content coding or None for identity). Compressed variants
+            are kept on the entry (and count against the budget while it's
+            cached), so a hot page is compressed once per coding.
+        """
+        if len(entry.body) < self.compress_min_bytes:
+            return entry.body, None
+        encoding = negotiate_encoding(accept_encoding)
+        if encoding is None:
+            return entry.body, None
+        data = entry.variants.get(encoding)
+        if data is None:
+            data = compress(entry.body, encoding)
+            with self._lock:
+                if encoding not in entry.variants:
+                    entry.variants[encoding] = data
+                    if entry.key is not None and self._entries.get(entry.key) is entry:
+                        self.bytes += len(data)
+                        self._evict()
+        return data, encoding
+
+    def clear(self) -> None:
+        """Drop every entry (e.g. when the vault locks, so no plaintext stays cached)"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "version": self.version,
+            "hits": RESPONSE_CACHE_REQUESTS.value("hit"),
+            "misses": RESPONSE_CACHE_REQUESTS.value("miss"),
+        }
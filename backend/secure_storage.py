@@ -1,19 +1,170 @@
 """
 Secure Key Management Module
 Handles encryption keys using OS secure storage (Windows Credential Manager, macOS Keychain, Linux Secret Service)
+or an encrypted keystore file for headless hosts
 """
 
-import keyring
 import secrets
 import os
 import base64
+import json
+import mmap
+import stat
+import threading
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import logging
+from metrics import KEYRING_LATENCY, timed
+from startup import Lazy
 
 logger = logging.getLogger(__name__)
 
+# Where the clipboard vault key lives: the OS keyring, or wrapped under a master password (vault.py)
+UNLOCK_KEYRING = "keyring"
+UNLOCK_PASSWORD = "password"
+
+# OWASP recommended minimum for PBKDF2-HMAC-SHA256
+PBKDF2_ITERATIONS = 100000
+
+def unlock_mode() -> str:
+    """CLIPVAULT_UNLOCK_MODE: "keyring" (default) or "password" (master-password unlock)"""
+    mode = os.getenv("CLIPVAULT_UNLOCK_MODE", UNLOCK_KEYRING).lower()
+    if mode not in (UNLOCK_KEYRING, UNLOCK_PASSWORD):
+        raise ValueError(f"Unknown unlock mode: {mode}")
+    return mode
+
+def write_private_file(path: str, data: bytes) -> None:
+    """Atomically replace `path` with `data`, readable by the owner only (0600)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class EncryptedFileKeystore:
+    """
+    Keyring-compatible store keeping all secrets in one AES-256-GCM encrypted file
+
+    Same get_password/set_password/delete_password interface as the keyring
+    module, without D-Bus or a Secret Service. Files are created 0600;
+    writes go through a temp file + rename so a crash never leaves a torn
+    keystore. Reads are a single mmap of the (small) file.
+
+    The file key comes from CLIPVAULT_KEYSTORE_KEY (base64, 32 bytes) when
+    set, otherwise from a 0600 key file next to the keystore, created on
+    first use.
+    """
+
+    MAGIC = b"CVKS1"
+    NONCE_SIZE = 12
+
+    def __init__(self, path: str, key: bytes = None):
+        """
+        Args:
+            path: Keystore file
+            key: 32 byte file key; defaults to the environment or `<path>.key`
+        """
+        self.path = os.path.abspath(path)
+        self._write_lock = threading.Lock()
+        self._aead = AESGCM(key if key is not None else self._load_file_key())
+
+    def _load_file_key(self) -> bytes:
+        env_key = os.getenv("CLIPVAULT_KEYSTORE_KEY")
+        if env_key:
+            key = base64.b64decode(env_key)
+            if len(key) != 32:
+                raise ValueError("CLIPVAULT_KEYSTORE_KEY must be 32 base64 encoded bytes")
+            return key
+        key_path = self.path + ".key"
+        try:
+            fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            self._check_permissions(key_path)
+            with open(key_path, "rb") as f:
+                key = f.read()
+            if len(key) != 32:
+                raise ValueError(f"Keystore key file {key_path} is corrupt")
+            return key
+        key = os.urandom(32)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+            f.flush()
+            os.fsync(f.fileno())
+        logger.info(f"Created keystore key file {key_path}")
+        return key
+
+    @staticmethod
+    def _check_permissions(path: str) -> None:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+        if mode & 0o077:
+            logger.warning(f"{path} is accessible by other users (mode {oct(mode)}), expected 0600")
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return {}
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    if mapped[:len(self.MAGIC)] != self.MAGIC:
+                        raise ValueError(f"{self.path} is not a ClipVault keystore")
+                    header = len(self.MAGIC) + self.NONCE_SIZE
+                    plaintext = self._aead.decrypt(mapped[len(self.MAGIC):header], mapped[header:], self.MAGIC)
+        except FileNotFoundError:
+            return {}
+        except InvalidTag:
+            raise ValueError(f"Keystore {self.path} cannot be decrypted with the configured key")
+        return json.loads(plaintext)
+
+    def _write(self, entries: dict) -> None:
+        nonce = os.urandom(self.NONCE_SIZE)
+        ciphertext = self._aead.encrypt(nonce, json.dumps(entries).encode("utf-8"), self.MAGIC)
+        write_private_file(self.path, self.MAGIC + nonce + ciphertext)
+
+    def get_password(self, service: str, username: str):
+        return self._read().get(f"{service}/{username}")
+
+    def set_password(self, service: str, username: str, password: str) -> None:
+        with self._write_lock:
+            entries = self._read()
+            entries[f"{service}/{username}"] = password
+            self._write(entries)
+
+    def delete_password(self, service: str, username: str) -> None:
+        with self._write_lock:
+            entries = self._read()
+            if entries.pop(f"{service}/{username}", None) is not None:
+                self._write(entries)
+
+def keystore_from_env():
+    """
+    CLIPVAULT_KEYSTORE: "keyring" (default, OS secure storage) or "file"
+    (EncryptedFileKeystore at CLIPVAULT_KEYSTORE_FILE, default clipvault.keystore)
+    """
+    backend = os.getenv("CLIPVAULT_KEYSTORE", "keyring").lower()
+    if backend == "file":
+        store = EncryptedFileKeystore(os.getenv("CLIPVAULT_KEYSTORE_FILE", "clipvault.keystore"))
+        if os.path.exists(store.path):
+            EncryptedFileKeystore._check_permissions(store.path)
+        return store
+    if backend != "keyring":
+        raise ValueError(f"Unknown keystore backend: {backend}")
+    # Imported here so file-keystore deployments don't need keyring (or D-Bus) at all
+    import keyring
+    return keyring
+
 class SecureKeyManager:
     """Manages encryption keys using OS secure storage"""
     
@@ -22,15 +173,22 @@ class SecureKeyManager:
     JWT_SECRET_KEY_NAME = "jwt_secret_key"
     MASTER_PASSWORD_KEY_NAME = "master_password"
     
-    def __init__(self):
-        """Initialize the secure key manager"""
+    def __init__(self, store=None):
+        """
+        Initialize the secure key manager
+        
+        Args:
+            store: Object with keyring's get/set/delete_password interface;
+                defaults to the CLIPVAULT_KEYSTORE backend
+        """
+        self.store = store if store is not None else keystore_from_env()
         self._ensure_keys_exist()
     
     def _ensure_keys_exist(self):
         """Ensure all required keys exist in secure storage, create if not"""
         try:
-            # Check and create clipboard encryption key
-            if not self.get_clipboard_key():
+            # Check and create clipboard encryption key (password mode keeps it wrapped in the vault file)
+            if unlock_mode() == UNLOCK_KEYRING and not self.get_clipboard_key():
                 self._generate_clipboard_key()
                 logger.info("Generated new clipboard encryption key")
             
@@ -43,6 +201,7 @@ class SecureKeyManager:
             logger.error(f"Failed to ensure keys exist: {e}")
             raise
     
+    @timed(KEYRING_LATENCY, "set_clipboard_key")
     def _generate_clipboard_key(self) -> str:
         """Generate and store a new clipboard encryption key"""
         try:
@@ -51,13 +210,14 @@ class SecureKeyManager:
             key_str = key.decode('utf-8')
             
             # Store in OS secure storage
-            keyring.set_password(self.SERVICE_NAME, self.CLIPBOARD_KEY_NAME, key_str)
+            self.store.set_password(self.SERVICE_NAME, self.CLIPBOARD_KEY_NAME, key_str)
             
             return key_str
         except Exception as e:
             logger.error(f"Failed to generate clipboard key: {e}")
             raise
     
+    @timed(KEYRING_LATENCY, "set_jwt_secret")
     def _generate_jwt_secret(self) -> str:
         """Generate and store a new JWT secret key"""
         try:
@@ -65,26 +225,28 @@ class SecureKeyManager:
             jwt_secret = secrets.token_urlsafe(32)
             
             # Store in OS secure storage
-            keyring.set_password(self.SERVICE_NAME, self.JWT_SECRET_KEY_NAME, jwt_secret)
+            self.store.set_password(self.SERVICE_NAME, self.JWT_SECRET_KEY_NAME, jwt_secret)
             
             return jwt_secret
         except Exception as e:
             logger.error(f"Failed to generate JWT secret: {e}")
             raise
     
+    @timed(KEYRING_LATENCY, "get_clipboard_key")
     def get_clipboard_key(self) -> str:
         """Retrieve clipboard encryption key from secure storage"""
         try:
-            key = keyring.get_password(self.SERVICE_NAME, self.CLIPBOARD_KEY_NAME)
+            key = self.store.get_password(self.SERVICE_NAME, self.CLIPBOARD_KEY_NAME)
             return key
         except Exception as e:
             logger.error(f"Failed to retrieve clipboard key: {e}")
             return None
     
+    @timed(KEYRING_LATENCY, "get_jwt_secret")
     def get_jwt_secret(self) -> str:
         """Retrieve JWT secret key from secure storage"""
         try:
-            secret = keyring.get_password(self.SERVICE_NAME, self.JWT_SECRET_KEY_NAME)
+            secret = self.store.get_password(self.SERVICE_NAME, self.JWT_SECRET_KEY_NAME)
             return secret
         except Exception as e:
             logger.error(f"Failed to retrieve JWT secret: {e}")
@@ -114,7 +276,8 @@ class SecureKeyManager:
             logger.error(f"Failed to rotate JWT secret: {e}")
             raise
     
-    def derive_key_from_password(self, password: str, salt: bytes = None) -> tuple[bytes, bytes]:
+    def derive_key_from_password(self, password: str, salt: bytes = None,
+                                 iterations: int = PBKDF2_ITERATIONS) -> tuple[bytes, bytes]:
         """
         Derive an encryption key from a master password using PBKDF2
         Returns (key, salt) tuple
@@ -126,7 +289,7 @@ class SecureKeyManager:
             algorithm=hashes.SHA256(),
             length=32,
             salt=salt,
-            iterations=100000,  # OWASP recommended minimum
+            iterations=iterations,
         )
         key = kdf.derive(password.encode())
         return key, salt
@@ -134,8 +297,8 @@ class SecureKeyManager:
     def clear_all_keys(self):
         """Remove all keys from secure storage (use with caution!)"""
         try:
-            keyring.delete_password(self.SERVICE_NAME, self.CLIPBOARD_KEY_NAME)
-            keyring.delete_password(self.SERVICE_NAME, self.JWT_SECRET_KEY_NAME)
+            self.store.delete_password(self.SERVICE_NAME, self.CLIPBOARD_KEY_NAME)
+            self.store.delete_password(self.SERVICE_NAME, self.JWT_SECRET_KEY_NAME)
             logger.warning("All keys cleared from secure storage")
         except Exception as e:
             logger.error(f"Failed to clear keys: {e}")
@@ -146,9 +309,11 @@ class SecureKeyManager:
         info = {
             "clipboard_key_exists": bool(self.get_clipboard_key()),
             "jwt_secret_exists": bool(self.get_jwt_secret()),
+            "unlock_mode": unlock_mode(),
+            "keystore": "file" if isinstance(self.store, EncryptedFileKeystore) else "keyring",
             "service_name": self.SERVICE_NAME
         }
         return info
 
-# Global instance for the application
-key_manager = SecureKeyManager()
\ No newline at end of file
+# Global instance for the application; built on first use so keyring calls stay off the import path
+key_manager = Lazy("key_manager", SecureKeyManager)
\ No newline at end of file
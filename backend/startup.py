@@ -0,0 +1,155 @@
+"""
+Startup Module
+Lazy singletons, background warm-up and the cold-start timing report
+"""
+
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTracker:
+    """Records startup phases and per-component initialization state and timing"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.phases: Dict[str, float] = {}
+        self.components: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def mark(self, phase: str) -> None:
+        """Record when `phase` was first reached (seconds since startup)"""
+        with self._lock:
+            self.phases.setdefault(phase, round(self.elapsed(), 4))
+
+    def expect(self, *names: str) -> None:
+        """Declare components that must be ready before the service reports ready"""
+        with self._lock:
+            for name in names:
+                self.components.setdefault(name, {"state": "pending", "seconds": None, "error": None})
+
+    def track(self, name: str, fn: Callable):
+        """Run `fn` as the initialization of component `name`, recording its outcome"""
+        with self._lock:
+            entry = self.components.setdefault(name, {"state": "pending", "seconds": None, "error": None})
+            entry.update(state="warming", error=None, started=round(self.elapsed(), 4))
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except Exception as e:
+            with self._lock:
+                entry.update(state="failed", seconds=round(time.perf_counter() - start, 4), error=str(e))
+            raise
+        with self._lock:
+            entry.update(state="ready", seconds=round(time.perf_counter() - start, 4))
+        return result
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return bool(self.components) and all(c["state"] == "ready" for c in self.components.values())
+
+    def report(self) -> dict:
+        with self._lock:
+            components = {name: dict(entry) for name, entry in self.components.items()}
+            phases = dict(self.phases)
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at,
+            "uptime": round(self.elapsed(), 4),
+            "phases": phases,
+            "components": components,
+        }
+
+    def warm_up(self, tasks: Dict[str, Callable], then: Optional[Callable] = None,
+                max_workers: int = 3) -> threading.Thread:
+        """
+        Run the warm-up tasks in parallel on a background thread
+
+        Keyring/D-Bus calls, SQLite DDL and imports release the GIL often enough
+        for this to overlap. `then` runs once every task has finished (check
+        `ready` for the outcome).
+        """
+        self.expect(*tasks)
+
+        def run():
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="clipvault-warm") as pool:
+                futures = {name: pool.submit(self.track, name, task) for name, task in tasks.items()}
+            failed = [name for name, future in futures.items() if future.exception() is not None]
+            for name in failed:
+                logger.error(f"Warm-up of {name} failed: {futures[name].exception()}")
+            self.mark("warm_up_complete")
+            logger.info(f"Warm-up finished in {self.phases['warm_up_complete']:.3f}s"
+                        + (f" ({', '.join(failed)} failed)" if failed else ""))
+            if then is not None:
+                then()
+
+        thread = threading.Thread(target=run, name="clipvault-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+
+# Global tracker; created when the first backend module is imported
+startup = StartupTracker()
+
+
+class Lazy:
+    """
+    Stand-in for a module-level singleton, built on first attribute access
+
+    Call sites keep using the module global as before; construction (keyring
+    calls, DDL, key loading) moves off the import path and is recorded in
+    the startup report (of the global tracker unless `tracker` is given).
+    Construction is thread-safe and retried after a failure.
+    """
+
+    __slots__ = ("_lazy_name", "_lazy_factory", "_lazy_instance", "_lazy_lock", "_lazy_tracker")
+
+    def __init__(self, name: str, factory: Callable, tracker: StartupTracker = startup):
+        object.__setattr__(self, "_lazy_name", name)
+        object.__setattr__(self, "_lazy_factory", factory)
+        object.__setattr__(self, "_lazy_instance", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+        object.__setattr__(self, "_lazy_tracker", tracker)
+        tracker.expect(name)
+
+    def _lazy_get(self):
+        instance = self._lazy_instance
+        if instance is None:
+            with self._lazy_lock:
+                instance = self._lazy_instance
+                if instance is None:
+                    instance = self._lazy_tracker.track(self._lazy_name, self._lazy_factory)
+                    object.__setattr__(self, "_lazy_instance", instance)
+        return instance
+
+    def __getattr__(self, item):
+        return getattr(self._lazy_get(), item)
+
+    def __setattr__(self, item, value):
+        setattr(self._lazy_get(), item, value)
+
+    def __delattr__(self, item):
+        delattr(self._lazy_get(), item)
+
+    def __repr__(self) -> str:
+        state = "initialized" if self._lazy_instance is not None else "pending"
+        return f"<Lazy {self._lazy_name} ({state})>"
+
+
+def is_initialized(obj) -> bool:
+    """False for a Lazy singleton that hasn't been built yet (lets probes avoid forcing it)"""
+    return not isinstance(obj, Lazy) or obj._lazy_instance is not None
+
+
+def resolve(obj):
+    """The real object behind a Lazy singleton (building it if needed)"""
+    return obj._lazy_get() if isinstance(obj, Lazy) else obj
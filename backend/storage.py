@@ -0,0 +1,593 @@
+"""
+Storage Module
+Storage engines behind ClipboardDB: the SQLite default and a pure in-memory engine
+"""
+
+import bisect
+import math
+import os
+import sqlite3
+import time
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (id, encrypted content, ISO timestamp)
+Row = Tuple[int, str, str]
+
+
+class DuplicateEntryError(ValueError):
+    """An entry with the same fingerprint is already stored"""
+
+
+class UnsupportedOperation(NotImplementedError):
+    """The configured storage engine doesn't provide this feature"""
+
+
+class StorageEngine(ABC):
+    """
+    Interface for ClipboardDB storage engines
+
+    Engines store history content already encrypted and never see keys or
+    plaintext. ClipboardDB calls them under its own lock, one call at a
+    time, so they need no locking of their own; every call is durable (or
+    final, for volatile engines) when it returns.
+    """
+
+    name = ""
+
+    def init_schema(self) -> None:
+        """Create or migrate whatever the engine keeps; called once by ClipboardDB"""
+
+    def close(self) -> None:
+        """Release the engine's resources; it is unusable afterwards"""
+
+    # History
+
+    @abstractmethod
+    def append(self, content: str, timestamp: str, fingerprint: Optional[str]) -> int:
+        """Store one entry and return its id (ids only grow); DuplicateEntryError on a known fingerprint"""
+
+    @abstractmethod
+    def append_many(self, rows: List[Tuple[str, str, Optional[str]]]) -> List[int]:
+        """
+        Store (content, timestamp, fingerprint) rows in one write; returns the new ids
+
+        Rows whose fingerprint is already stored (or repeated in `rows`) are
+        skipped rather than failing the batch.
+        """
+
+    @abstractmethod
+    def page(self, limit: int) -> List[Row]:
+        """The `limit` newest entries by timestamp, newest first"""
+
+    @abstractmethod
+    def scan(self, after_id: int, upto_id: int, limit: int) -> List[Row]:
+        """Up to `limit` entries with after_id < id <= upto_id, by id (keyset pagination)"""
+
+    @abstractmethod
+    def max_id(self) -> int:
+        """Highest stored id (0 when empty)"""
+
+    @abstractmethod
+    def get(self, entry_ids: List[int]) -> List[Row]:
+        """Entries by id, oldest first; missing ids are skipped"""
+
+    @abstractmethod
+    def ids_in_range(self, before: Optional[str], after: Optional[str], limit: int) -> List[int]:
+        """Ids of up to `limit` entries with after < timestamp < before (None: unbounded), oldest first"""
+
+    @abstractmethod
+    def find_fingerprints(self, fingerprints: List[str]) -> Set[str]:
+        """Those of `fingerprints` that are already stored"""
+
+    @abstractmethod
+    def unfingerprinted(self, after_id: int, limit: int) -> List[Row]:
+        """Up to `limit` entries with id > after_id stored without a fingerprint, by id"""
+
+    @abstractmethod
+    def set_fingerprints(self, values: List[Tuple[str, int]]) -> None:
+        """Set (fingerprint, id) pairs; a fingerprint another entry already has is left unset"""
+
+    @abstractmethod
+    def delete(self, entry_ids: List[int]) -> List[int]:
+        """Delete entries by id; returns the ids that existed, in request order"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Delete every entry (ids are not reused)"""
+
+    # Users and preferences
+
+    @abstractmethod
+    def create_user(self, username: str, password_hash: str) -> None:
+        """Add a user with empty preferences; ValueError if the name is taken"""
+
+    @abstractmethod
+    def password_hash(self, username: str) -> Optional[str]:
+        """The user's stored password hash, or None for unknown users"""
+
+    @abstractmethod
+    def get_preferences(self, username: str) -> dict:
+        """Stored preferences ({} for unknown users)"""
+
+    @abstractmethod
+    def set_preferences(self, username: str, prefs: dict) -> None:
+        """Replace a user's preferences (no-op for unknown users)"""
+
+    # Refresh tokens
+
+    @abstractmethod
+    def store_refresh_token(self, token_hash: str, username: str, expires_at: float) -> None:
+        """Record an issued (hashed) refresh token for `username`"""
+
+    @abstractmethod
+    def get_refresh_token(self, token_hash: str) -> Optional[dict]:
+        """{"username", "expires_at", "revoked"} or None"""
+
+    @abstractmethod
+    def revoke_refresh_token(self, token_hash: str) -> bool:
+        """True if the token existed and was not yet revoked"""
+
+    @abstractmethod
+    def revoke_all_refresh_tokens(self) -> int:
+        """Drop revoked and expired tokens, revoke the rest; returns how many were revoked"""
+
+
+class SQLiteEngine(StorageEngine):
+    """
+    The original single-file layout: one shared connection in WAL mode
+
+    Also keeps the sync change log in the same transactions as the history
+    writes, which ClipboardDB's SQLite-only features (sync, replication)
+    read through `conn`.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = "clipboard_history.db"):
+        """
+        Args:
+            path: Database file (made absolute, for packaged apps), or ":memory:"
+        """
+        self.path = path if path == ":memory:" else os.path.abspath(path)
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        try:
+            c = self.conn.cursor()
+            c.execute("PRAGMA journal_mode=WAL;")
+            c.execute("PRAGMA synchronous=NORMAL;")
+            c.execute("PRAGMA busy_timeout=5000;")
+            c.execute("PRAGMA foreign_keys=ON;")
+            self.conn.commit()
+        except Exception:
+            pass
+
+    def init_schema(self) -> None:
+        conn = self.conn
+        c = conn.cursor()
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS clipboard_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content TEXT NOT NULL,
+                timestamp TEXT NOT NULL
+            )
+        ''')
+        # History pages and range deletes are ordered/filtered by timestamp
+        c.execute('CREATE INDEX IF NOT EXISTS idx_clipboard_history_timestamp ON clipboard_history(timestamp)')
+
+        # Keyed digest of content + timestamp (see ClipboardCrypto.fingerprint); imports skip duplicates by it
+        c.execute("PRAGMA table_info(clipboard_history)")
+        if 'fingerprint' not in [row[1] for row in c.fetchall()]:
+            c.execute("ALTER TABLE clipboard_history ADD COLUMN fingerprint TEXT")
+        c.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_clipboard_history_fingerprint '
+                  'ON clipboard_history(fingerprint)')
+
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password_hash TEXT NOT NULL,
+                preferences TEXT DEFAULT '{}'
+            )
+        ''')
+
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS refresh_tokens (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                token_hash TEXT UNIQUE NOT NULL,
+                username TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                revoked INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+
+        # Sync log: one row per insert, delete (tombstone) and clear, numbered by seq.
+        # Inserts point at their row; tombstones keep the fingerprint, the cross-device identity.
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'change_log'")
+        log_exists = c.fetchone() is not None
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                op TEXT NOT NULL,
+                entry_id INTEGER,
+                fingerprint TEXT,
+                created_at REAL NOT NULL
+            )
+        ''')
+        if not log_exists:
+            # Existing history is the log's starting point
+            c.execute("INSERT INTO change_log (op, entry_id, created_at) "
+                      "SELECT 'insert', id, ? FROM clipboard_history ORDER BY id", (time.time(),))
+
+        # Follower mode: primary log position this replica has applied up to
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS replica_state (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            )
+        ''')
+
+        c.execute("PRAGMA table_info(users)")
+        columns = [row[1] for row in c.fetchall()]
+        if 'preferences' not in columns:
+            c.execute("ALTER TABLE users ADD COLUMN preferences TEXT DEFAULT '{}'")
+
+        conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def append(self, content: str, timestamp: str, fingerprint: Optional[str]) -> int:
+        c = self.conn.cursor()
+        try:
+            c.execute('INSERT INTO clipboard_history (content, timestamp, fingerprint) VALUES (?, ?, ?)',
+                      (content, timestamp, fingerprint))
+        except sqlite3.IntegrityError as e:
+            self.conn.rollback()
+            raise DuplicateEntryError(f"Entry already stored: {e}")
+        entry_id = c.lastrowid
+        c.execute("INSERT INTO change_log (op, entry_id, created_at) VALUES ('insert', ?, ?)",
+                  (entry_id, time.time()))
+        self.conn.commit()
+        return entry_id
+
+    def append_many(self, rows: List[Tuple[str, str, Optional[str]]]) -> List[int]:
+        c = self.conn.cursor()
+        last_id = self.max_id()
+        # OR IGNORE: duplicates are skipped, not fatal
+        c.executemany('INSERT OR IGNORE INTO clipboard_history (content, timestamp, fingerprint) VALUES (?, ?, ?)',
+                      rows)
+        # Ids only grow and ClipboardDB holds its lock, so everything past last_id is this batch
+        c.execute('SELECT id FROM clipboard_history WHERE id > ? ORDER BY id', (last_id,))
+        entry_ids = [row[0] for row in c.fetchall()]
+        c.executemany("INSERT INTO change_log (op, entry_id, created_at) VALUES ('insert', ?, ?)",
+                      [(entry_id, time.time()) for entry_id in entry_ids])
+        self.conn.commit()
+        return entry_ids
+
+    def page(self, limit: int) -> List[Row]:
+        c = self.conn.cursor()
+        c.execute('SELECT id, content, timestamp FROM clipboard_history ORDER BY timestamp DESC LIMIT ?', (limit,))
+        return c.fetchall()
+
+    def scan(self, after_id: int, upto_id: int, limit: int) -> List[Row]:
+        c = self.conn.cursor()
+        c.execute('SELECT id, content, timestamp FROM clipboard_history WHERE id > ? AND id <= ? ORDER BY id LIMIT ?',
+                  (after_id, upto_id, limit))
+        return c.fetchall()
+
+    def max_id(self) -> int:
+        c = self.conn.cursor()
+        c.execute('SELECT COALESCE(MAX(id), 0) FROM clipboard_history')
+        return c.fetchone()[0]
+
+    def get(self, entry_ids: List[int]) -> List[Row]:
+        entry_ids = list(entry_ids)
+        rows = []
+        c = self.conn.cursor()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(entry_ids), 500):
+            chunk = entry_ids[start:start + 500]
+            c.execute(f'SELECT id, content, timestamp FROM clipboard_history WHERE id IN ({",".join("?" * len(chunk))})',
+                      chunk)
+            rows.extend(c.fetchall())
+        return sorted(set(rows))
+
+    def ids_in_range(self, before: Optional[str], after: Optional[str], limit: int) -> List[int]:
+        conditions, params = [], []
+        if before is not None:
+            conditions.append("timestamp < ?")
+            params.append(before)
+        if after is not None:
+            conditions.append("timestamp > ?")
+            params.append(after)
+        where = " AND ".join(conditions) or "1"
+        c = self.conn.cursor()
+        c.execute(f'SELECT id FROM clipboard_history WHERE {where} ORDER BY timestamp LIMIT ?', params + [limit])
+        return [row[0] for row in c.fetchall()]
+
+    def find_fingerprints(self, fingerprints: List[str]) -> Set[str]:
+        found = set()
+        c = self.conn.cursor()
+        for start in range(0, len(fingerprints), 500):
+            chunk = fingerprints[start:start + 500]
+            c.execute(f'SELECT fingerprint FROM clipboard_history WHERE fingerprint IN ({",".join("?" * len(chunk))})',
+                      chunk)
+            found.update(row[0] for row in c.fetchall())
+        return found
+
+    def unfingerprinted(self, after_id: int, limit: int) -> List[Row]:
+        c = self.conn.cursor()
+        c.execute('SELECT id, content, timestamp FROM clipboard_history '
+                  'WHERE fingerprint IS NULL AND id > ? ORDER BY id LIMIT ?', (after_id, limit))
+        return c.fetchall()
+
+    def set_fingerprints(self, values: List[Tuple[str, int]]) -> None:
+        # OR IGNORE: identical legacy rows keep a NULL fingerprint rather than failing the batch
+        self.conn.executemany('UPDATE OR IGNORE clipboard_history SET fingerprint = ? WHERE id = ?', values)
+        self.conn.commit()
+
+    def delete(self, entry_ids: List[int]) -> List[int]:
+        entry_ids = list(dict.fromkeys(entry_ids))
+        if not entry_ids:
+            return []
+        existing = {row[0] for row in self.get(entry_ids)}
+        deleted = [entry_id for entry_id in entry_ids if entry_id in existing]
+        c = self.conn.cursor()
+        # Tombstones first, while the fingerprints are still there (same transaction)
+        c.executemany("INSERT INTO change_log (op, entry_id, fingerprint, created_at) "
+                      "SELECT 'delete', id, fingerprint, ? FROM clipboard_history WHERE id = ?",
+                      [(time.time(), entry_id) for entry_id in deleted])
+        c.executemany('DELETE FROM clipboard_history WHERE id = ?', [(entry_id,) for entry_id in deleted])
+        self.conn.commit()
+        return deleted
+
+    def clear(self) -> None:
+        c = self.conn.cursor()
+        c.execute('DELETE FROM clipboard_history')
+        # A clear supersedes every earlier change; keep only its marker
+        c.execute('DELETE FROM change_log')
+        c.execute("INSERT INTO change_log (op, created_at) VALUES ('clear', ?)", (time.time(),))
+        self.conn.commit()
+
+    def create_user(self, username: str, password_hash: str) -> None:
+        c = self.conn.cursor()
+        try:
+            c.execute('INSERT INTO users (username, password_hash) VALUES (?, ?)', (username, password_hash))
+            self.conn.commit()
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE constraint failed" in str(e):
+                raise ValueError("Username already exists")
+            else:
+                raise ValueError(f"Database error: {e}")
+
+    def password_hash(self, username: str) -> Optional[str]:
+        c = self.conn.cursor()
+        c.execute('SELECT password_hash FROM users WHERE username = ?', (username,))
+        row = c.fetchone()
+        return row[0] if row else None
+
+    def get_preferences(self, username: str) -> dict:
+        c = self.conn.cursor()
+        c.execute("SELECT preferences FROM users WHERE username = ?", (username,))
+        row = c.fetchone()
+        if not row:
+            return {}
+        try:
+            return json.loads(row[0] or "{}")
+        except json.JSONDecodeError:
+            return {}
+
+    def set_preferences(self, username: str, prefs: dict) -> None:
+        c = self.conn.cursor()
+        c.execute("UPDATE users SET preferences = ? WHERE username = ?", (json.dumps(prefs), username))
+        self.conn.commit()
+
+    def store_refresh_token(self, token_hash: str, username: str, expires_at: float) -> None:
+        c = self.conn.cursor()
+        c.execute('INSERT INTO refresh_tokens (token_hash, username, expires_at) VALUES (?, ?, ?)',
+                  (token_hash, username, expires_at))
+        self.conn.commit()
+
+    def get_refresh_token(self, token_hash: str) -> Optional[dict]:
+        c = self.conn.cursor()
+        c.execute('SELECT username, expires_at, revoked FROM refresh_tokens WHERE token_hash = ?', (token_hash,))
+        row = c.fetchone()
+        if not row:
+            return None
+        return {"username": row[0], "expires_at": row[1], "revoked": bool(row[2])}
+
+    def revoke_refresh_token(self, token_hash: str) -> bool:
+        c = self.conn.cursor()
+        c.execute('UPDATE refresh_tokens SET revoked = 1 WHERE token_hash = ? AND revoked = 0', (token_hash,))
+        revoked = (c.rowcount or 0) > 0
+        self.conn.commit()
+        return revoked
+
+    def revoke_all_refresh_tokens(self) -> int:
+        c = self.conn.cursor()
+        c.execute('DELETE FROM refresh_tokens WHERE revoked = 1 OR expires_at < ?', (time.time(),))
+        c.execute('UPDATE refresh_tokens SET revoked = 1')
+        count = c.rowcount or 0
+        self.conn.commit()
+        return count
+
+
+class MemoryEngine(StorageEngine):
+    """
+    Everything in process memory: no I/O or SQL on any call, nothing survives a restart
+
+    For latency-critical or throwaway deployments. History is a dict by id
+    plus a (timestamp, id) list kept sorted, so appends in time order and
+    newest-first pages are cheap. There is no change log, so sync and
+    follower mode need the SQLite engine.
+    """
+
+    name = "memory"
+
+    def __init__(self):
+        self._rows: Dict[int, Tuple[str, str, Optional[str]]] = {}
+        # Sorted (timestamp, id) for pages; sorted ids for scans
+        self._by_time: List[Tuple[str, int]] = []
+        self._ids: List[int] = []
+        self._fingerprints: Dict[str, int] = {}
+        self._last_id = 0
+        self._users: Dict[str, dict] = {}
+        self._tokens: Dict[str, dict] = {}
+
+    def append(self, content: str, timestamp: str, fingerprint: Optional[str]) -> int:
+        if fingerprint is not None and fingerprint in self._fingerprints:
+            raise DuplicateEntryError("Entry already stored")
+        self._last_id += 1
+        entry_id = self._last_id
+        self._rows[entry_id] = (content, timestamp, fingerprint)
+        self._ids.append(entry_id)
+        bisect.insort(self._by_time, (timestamp, entry_id))
+        if fingerprint is not None:
+            self._fingerprints[fingerprint] = entry_id
+        return entry_id
+
+    def append_many(self, rows: List[Tuple[str, str, Optional[str]]]) -> List[int]:
+        entry_ids = []
+        for content, timestamp, fingerprint in rows:
+            if fingerprint is None or fingerprint not in self._fingerprints:
+                entry_ids.append(self.append(content, timestamp, fingerprint))
+        return entry_ids
+
+    def _row(self, entry_id: int) -> Row:
+        content, timestamp, _ = self._rows[entry_id]
+        return entry_id, content, timestamp
+
+    def page(self, limit: int) -> List[Row]:
+        # As SQLite's LIMIT: negative means no limit
+        newest = self._by_time if limit < 0 else self._by_time[max(0, len(self._by_time) - limit):]
+        return [self._row(entry_id) for _, entry_id in reversed(newest)]
+
+    def scan(self, after_id: int, upto_id: int, limit: int) -> List[Row]:
+        start = bisect.bisect_right(self._ids, after_id)
+        end = bisect.bisect_right(self._ids, upto_id, lo=start)
+        if limit >= 0:
+            end = min(end, start + limit)
+        return [self._row(entry_id) for entry_id in self._ids[start:end]]
+
+    def max_id(self) -> int:
+        return self._ids[-1] if self._ids else 0
+
+    def get(self, entry_ids: Iterable[int]) -> List[Row]:
+        return [self._row(entry_id) for entry_id in sorted(set(entry_ids)) if entry_id in self._rows]
+
+    def ids_in_range(self, before: Optional[str], after: Optional[str], limit: int) -> List[int]:
+        # (after, inf) sorts after every entry at `after`; (before,) before every entry at `before`
+        start = 0 if after is None else bisect.bisect_right(self._by_time, (after, math.inf))
+        end = len(self._by_time) if before is None else bisect.bisect_left(self._by_time, (before,), lo=start)
+        if limit >= 0:
+            end = min(end, start + limit)
+        return [entry_id for _, entry_id in self._by_time[start:end]]
+
+    def find_fingerprints(self, fingerprints: List[str]) -> Set[str]:
+        return {fingerprint for fingerprint in fingerprints if fingerprint in self._fingerprints}
+
+    def unfingerprinted(self, after_id: int, limit: int) -> List[Row]:
+        rows = []
+        for entry_id in self._ids[bisect.bisect_right(self._ids, after_id):]:
+            if len(rows) == limit:
+                break
+            if self._rows[entry_id][2] is None:
+                rows.append(self._row(entry_id))
+        return rows
+
+    def set_fingerprints(self, values: List[Tuple[str, int]]) -> None:
+        for fingerprint, entry_id in values:
+            row = self._rows.get(entry_id)
+            if row is None or fingerprint in self._fingerprints:
+                continue
+            content, timestamp, old = row
+            if old is not None:
+                self._fingerprints.pop(old, None)
+            self._rows[entry_id] = (content, timestamp, fingerprint)
+            self._fingerprints[fingerprint] = entry_id
+
+    def delete(self, entry_ids: List[int]) -> List[int]:
+        deleted = []
+        for entry_id in dict.fromkeys(entry_ids):
+            row = self._rows.pop(entry_id, None)
+            if row is None:
+                continue
+            _, timestamp, fingerprint = row
+            del self._by_time[bisect.bisect_left(self._by_time, (timestamp, entry_id))]
+            del self._ids[bisect.bisect_left(self._ids, entry_id)]
+            if fingerprint is not None:
+                self._fingerprints.pop(fingerprint, None)
+            deleted.append(entry_id)
+        return deleted
+
+    def clear(self) -> None:
+        self._rows.clear()
+        self._by_time.clear()
+        self._ids.clear()
+        self._fingerprints.clear()
+
+    def create_user(self, username: str, password_hash: str) -> None:
+        if username in self._users:
+            raise ValueError("Username already exists")
+        self._users[username] = {"password_hash": password_hash, "preferences": "{}"}
+
+    def password_hash(self, username: str) -> Optional[str]:
+        user = self._users.get(username)
+        return user["password_hash"] if user else None
+
+    def get_preferences(self, username: str) -> dict:
+        user = self._users.get(username)
+        # Stored serialized, so callers never share (or mutate) the stored object
+        return json.loads(user["preferences"]) if user else {}
+
+    def set_preferences(self, username: str, prefs: dict) -> None:
+        user = self._users.get(username)
+        if user is not None:
+            user["preferences"] = json.dumps(prefs)
+
+    def store_refresh_token(self, token_hash: str, username: str, expires_at: float) -> None:
+        if token_hash in self._tokens:
+            raise ValueError("Refresh token already stored")
+        self._tokens[token_hash] = {"username": username, "expires_at": expires_at, "revoked": False}
+
+    def get_refresh_token(self, token_hash: str) -> Optional[dict]:
+        token = self._tokens.get(token_hash)
+        return dict(token) if token else None
+
+    def revoke_refresh_token(self, token_hash: str) -> bool:
+        token = self._tokens.get(token_hash)
+        if token is None or token["revoked"]:
+            return False
+        token["revoked"] = True
+        return True
+
+    def revoke_all_refresh_tokens(self) -> int:
+        now = time.time()
+        self._tokens = {token_hash: token for token_hash, token in self._tokens.items()
+                        if not token["revoked"] and token["expires_at"] >= now}
+        for token in self._tokens.values():
+            token["revoked"] = True
+        return len(self._tokens)
+
+
+STORAGE_ENGINES = {SQLiteEngine.name: SQLiteEngine, MemoryEngine.name: MemoryEngine}
+
+
+def engine_from_env(db_path: str, memory: bool = False) -> StorageEngine:
+    """
+    Build the engine named by CLIPVAULT_STORAGE (default "sqlite")
+
+    Args:
+        db_path: SQLite database file
+        memory: Keep the SQLite database in memory (test mode)
+    """
+    name = os.getenv("CLIPVAULT_STORAGE", SQLiteEngine.name).lower()
+    if name not in STORAGE_ENGINES:
+        raise ValueError(f"Unknown storage engine: {name}")
+    if name == SQLiteEngine.name:
+        return SQLiteEngine(":memory:" if memory else db_path)
+    return STORAGE_ENGINES[name]()
@@ -0,0 +1,195 @@
+"""
+Structured Logging Module
+Queue-based logging: request threads only enqueue records, a listener thread formats (JSON) and writes them
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from metrics import REGISTRY
+from rate_limit import TokenBucket
+
+# LogRecord attributes that are not user-supplied `extra` fields
+_STANDARD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "clipvault_log_records_dropped_total", "Log records dropped by sampling, rate limiting or a full queue",
+    ("logger", "reason"))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra={...}` fields are included as top-level keys"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class LogThrottleFilter(logging.Filter):
+    """
+    Per-logger sampling and token-bucket rate limiting for records below WARNING
+
+    Warnings and errors always pass. Decisions are made before the record is
+    queued, so dropped records cost a dict lookup on the calling thread.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, Tuple[float, float]]] = None,
+                 samples: Optional[Dict[str, float]] = None,
+                 default_rate: Optional[Tuple[float, float]] = None):
+        """
+        Args:
+            rates: {logger name prefix: (records per second, burst)}
+            samples: {logger name prefix: fraction of records kept (0..1)}
+            default_rate: (rate, burst) for loggers without a specific rate
+        """
+        super().__init__()
+        self.rates = dict(rates or {})
+        self.samples = dict(samples or {})
+        self.default_rate = default_rate
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._sample_cache: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _match(name: str, table: dict):
+        """Most specific prefix match on dotted logger names"""
+        while True:
+            if name in table:
+                return table[name]
+            if "." not in name:
+                return table.get("")
+            name = name.rsplit(".", 1)[0]
+
+    def _bucket(self, name: str) -> Optional[TokenBucket]:
+        try:
+            return self._buckets[name]
+        except KeyError:
+            limits = self._match(name, self.rates) or self.default_rate
+            bucket = TokenBucket(limits[0], limits[1], time.monotonic()) if limits else None
+            self._buckets[name] = bucket
+            return bucket
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        name = record.name
+        fraction = self._sample_cache.get(name)
+        if fraction is None:
+            fraction = self._match(name, self.samples)
+            fraction = self._sample_cache[name] = 1.0 if fraction is None else fraction
+        if fraction < 1.0 and random.random() >= fraction:
+            LOG_RECORDS_DROPPED.inc(name, "sampled")
+            return False
+        bucket = self._bucket(name)
+        if bucket is not None:
+            with self._lock:
+                admitted = bucket.consume(time.monotonic()) == 0.0
+            if not admitted:
+                LOG_RECORDS_DROPPED.inc(name, "rate_limited")
+                return False
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never formats or blocks on the calling thread
+
+    The listener runs in-process, so records are queued as-is (the stock
+    prepare() formats the message here). When the queue is full the record
+    is dropped and counted rather than stalling the request.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(record.name, "queue_full")
+
+
+def _parse_table(value: str, parse):
+    """Parse "logger=value,other=value" ("*" or "root" = every logger)"""
+    table = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, spec = item.partition("=")
+        name = name.strip()
+        try:
+            table["" if name in ("*", "root") else name] = parse(spec.strip())
+        except ValueError:
+            continue
+    return table
+
+
+def _parse_rate(spec: str) -> Tuple[float, float]:
+    rate, _, burst = spec.partition(":")
+    return float(rate), float(burst or rate)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging() -> logging.handlers.QueueListener:
+    """
+    Route the root logger through a bounded queue to a listener thread (idempotent)
+
+    CLIPVAULT_LOG_LEVEL: root level (default INFO)
+    CLIPVAULT_LOG_FORMAT: "json" (default) or "text"
+    CLIPVAULT_LOG_RATE: per-logger limits below WARNING, "logger=rate:burst,..." (default "*=200:1000")
+    CLIPVAULT_LOG_SAMPLE: per-logger kept fraction below WARNING, "logger=0.1,..."
+    CLIPVAULT_LOG_QUEUE: queue capacity (default 10000)
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if os.getenv("CLIPVAULT_LOG_FORMAT", "json").lower() == "text":
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    else:
+        formatter = JsonFormatter()
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(formatter)
+
+    try:
+        capacity = int(os.getenv("CLIPVAULT_LOG_QUEUE", "10000"))
+    except ValueError:
+        capacity = 10000
+    log_queue = queue.Queue(maxsize=capacity)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(LogThrottleFilter(
+        rates=_parse_table(os.getenv("CLIPVAULT_LOG_RATE", "*=200:1000"), _parse_rate),
+        samples=_parse_table(os.getenv("CLIPVAULT_LOG_SAMPLE", ""), float),
+    ))
+
+    root = logging.getLogger()
+    root.setLevel(os.getenv("CLIPVAULT_LOG_LEVEL", "INFO").upper())
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # Flush whatever is still queued on interpreter exit
+    atexit.register(_listener.stop)
+    return _listener
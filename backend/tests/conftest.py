@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# Hermetic key storage: an encrypted keystore in a throwaway directory instead of the OS keyring.
+# Set before any backend module is imported (key_manager is created at import time).
+_keystore_dir = tempfile.mkdtemp(prefix="clipvault-test-keystore-")
+os.environ.setdefault("CLIPVAULT_KEYSTORE", "file")
+os.environ.setdefault("CLIPVAULT_KEYSTORE_FILE", os.path.join(_keystore_dir, "clipvault.keystore"))
+
+# The app-wide limiter's auth buckets would outlast the session and 429 later logins;
+# the limiter itself is covered by test_rate_limit.py on apps of its own.
+os.environ.setdefault("CLIPVAULT_RATE_LIMIT", "0")
@@ -93,3 +93,50 @@ def test_jwt_rotation_invalidates_tokens():
     # Old token should now be invalid
     denied = client.get("/clipboard/history", headers=auth)
     assert denied.status_code == 401
+
+
+def test_refresh_token_issues_new_access_token():
+    client = TestClient(app)
+    username = f"refresh_{int(time.time())}"
+    password = "pw1234"
+    _register(client, username, password)
+    login = _login(client, username, password)
+    refresh_token = login.json()["refresh_token"]
+
+    r = client.post("/token/refresh", json={"refresh_token": refresh_token})
+    assert r.status_code == 200
+    token = r.json()["access_token"]
+    h = client.get("/clipboard/history", headers={"Authorization": f"Bearer {token}"})
+    assert h.status_code == 200
+
+    bad = client.post("/token/refresh", json={"refresh_token": "not-a-real-token"})
+    assert bad.status_code == 401
+
+
+def test_refresh_token_revocation():
+    client = TestClient(app)
+    username = f"revoke_{int(time.time())}"
+    password = "pw1234"
+    _register(client, username, password)
+    body = _login(client, username, password).json()
+    auth = {"Authorization": f"Bearer {body['access_token']}"}
+
+    r = client.post("/token/revoke", json={"refresh_token": body["refresh_token"]}, headers=auth)
+    assert r.status_code == 200
+    assert r.json()["revoked"] is True
+    denied = client.post("/token/refresh", json={"refresh_token": body["refresh_token"]})
+    assert denied.status_code == 401
+
+
+def test_jwt_rotation_revokes_refresh_tokens():
+    client = TestClient(app)
+    username = f"rotref_{int(time.time())}"
+    password = "pw1234"
+    _register(client, username, password)
+    body = _login(client, username, password).json()
+    auth = {"Authorization": f"Bearer {body['access_token']}"}
+
+    rot = client.post("/admin/rotate-jwt-secret", headers=auth)
+    assert rot.status_code == 200
+    denied = client.post("/token/refresh", json={"refresh_token": body["refresh_token"]})
+    assert denied.status_code == 401
@@ -0,0 +1,60 @@
+import sys, os, time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from main import app, db, clipboard
+
+
+class TestBatchEndpoint:
+    """Test POST /batch"""
+
+    def setup_method(self):
+        self.client = TestClient(app)
+        username = f"batchuser_{int(time.time() * 1000)}"
+        password = "BatchPass123!"
+        self.client.post("/register", data={"username": username, "password": password},
+                         headers={"Content-Type": "application/x-www-form-urlencoded"})
+        login = self.client.post("/login", data={"username": username, "password": password},
+                                 headers={"Content-Type": "application/x-www-form-urlencoded"})
+        self.headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    def _batch(self, ops):
+        return self.client.post("/batch", json={"ops": ops}, headers=self.headers)
+
+    def test_startup_bundle_matches_individual_endpoints(self, monkeypatch):
+        monkeypatch.setattr(clipboard, "get_clipboard_content", lambda: "on the clipboard")
+        self.client.post("/preferences", json={"darkMode": True}, headers=self.headers)
+        db.add_entry("batched history entry")
+
+        response = self._batch([
+            {"op": "health"},
+            {"op": "preferences", "id": "prefs"},
+            {"op": "history", "id": "hist", "params": {"limit": 5}},
+            {"op": "current"},
+        ])
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["id"] for r in results] == [0, "prefs", "hist", 3]
+        assert all(r["status"] == 200 for r in results)
+        assert results[0]["body"]["status"] == "ok"
+        assert results[1]["body"] == self.client.get("/preferences", headers=self.headers).json()
+        history = self.client.get("/clipboard/history?limit=5", headers={**self.headers, "Accept-Encoding": "identity"})
+        assert results[2]["body"] == history.json()
+        assert results[2]["etag"] == history.headers["etag"]
+        assert results[3]["body"]["content"] == "on the clipboard"
+
+    def test_conditional_and_failing_ops(self, monkeypatch):
+        first = self._batch([{"op": "preferences"}, {"op": "history"}]).json()["results"]
+        again = self._batch([
+            {"op": "preferences", "if_none_match": first[0]["etag"]},
+            {"op": "history", "if_none_match": first[1]["etag"]},
+            {"op": "history", "params": {"limit": "many"}},
+        ]).json()["results"]
+        assert [r["status"] for r in again] == [304, 304, 400]
+        assert again[0]["body"] is None and again[0]["etag"] == first[0]["etag"]
+
+    def test_validation(self):
+        assert self.client.post("/batch", json={"ops": [{"op": "health"}]}).status_code == 401
+        assert self._batch([{"op": "rotate-keys"}]).status_code == 422
+        assert self._batch([{"op": "health"}] * 21).status_code == 422
+        assert self._batch([]).json() == {"results": []}
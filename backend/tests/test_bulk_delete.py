@@ -0,0 +1,85 @@
+import sys, os, time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from fastapi.testclient import TestClient
+from main import app, db
+
+
+def _ids_of(*contents):
+    history = db.get_history(limit=1000)
+    return [entry["id"] for entry in history if entry["content"] in contents]
+
+
+def _stamp():
+    time.sleep(0.002)
+    stamp = datetime.now().isoformat()
+    time.sleep(0.002)
+    return stamp
+
+
+class TestBulkDelete:
+    """Test batch and time-range deletes"""
+
+    def setup_method(self):
+        self.client = TestClient(app)
+        username = f"bulkuser_{int(time.time() * 1000)}"
+        password = "BulkPass123!"
+        self.client.post("/register", data={"username": username, "password": password},
+                         headers={"Content-Type": "application/x-www-form-urlencoded"})
+        login = self.client.post("/login", data={"username": username, "password": password},
+                                 headers={"Content-Type": "application/x-www-form-urlencoded"})
+        self.headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    def test_delete_batch(self):
+        for i in range(5):
+            db.add_entry(f"batch item {i}")
+        ids = _ids_of(*(f"batch item {i}" for i in range(5)))
+        version = db.history_version
+
+        response = self.client.post("/clipboard/history/delete-batch",
+                                    json={"ids": ids[:3] + [ids[0], 999999999]}, headers=self.headers)
+        assert response.status_code == 200
+        body = response.json()
+        assert body["deleted"] == 3 and sorted(body["ids"]) == sorted(ids[:3])
+        assert body["missing"] == [999999999]
+        assert sorted(_ids_of(*(f"batch item {i}" for i in range(5)))) == sorted(ids[3:])
+        # Long-poll clients see the individual deletes
+        assert sorted(db.changes_since(version)[2]) == sorted(ids[:3])
+
+    def test_delete_batch_validation(self):
+        assert self.client.post("/clipboard/history/delete-batch", json={"ids": [1]}).status_code == 401
+        assert self.client.post("/clipboard/history/delete-batch", json={"ids": ["x"]},
+                                headers=self.headers).status_code == 422
+        assert self.client.post("/clipboard/history/delete-batch", json={"ids": list(range(10001))},
+                                headers=self.headers).status_code == 422
+
+    def test_delete_range(self):
+        db.add_entry("range before")
+        start = _stamp()
+        db.add_entry("range inside one")
+        db.add_entry("range inside two")
+        end = _stamp()
+        db.add_entry("range after")
+
+        response = self.client.delete(f"/clipboard/history?after={start}&before={end}", headers=self.headers)
+        assert response.status_code == 200 and response.json()["deleted"] == 2
+        remaining = [e["content"] for e in db.get_history(limit=1000)]
+        assert "range before" in remaining and "range after" in remaining
+        assert "range inside one" not in remaining and "range inside two" not in remaining
+
+    def test_delete_range_in_chunks(self):
+        start = _stamp()
+        for i in range(7):
+            db.add_entry(f"chunked {i}")
+        version = db.history_version
+        assert db.delete_range(after=start, chunk_size=3) == 7
+        assert db.history_version == version + 7
+        assert _ids_of(*(f"chunked {i}" for i in range(7))) == []
+
+    def test_delete_range_validation(self):
+        assert self.client.delete("/clipboard/history", headers=self.headers).status_code == 422
+        assert self.client.delete("/clipboard/history?before=yesterday", headers=self.headers).status_code == 422
+        # Timezone-aware bounds are converted to the stored local time
+        future = self.client.delete("/clipboard/history?after=2999-01-01T00:00:00%2B00:00", headers=self.headers)
+        assert future.status_code == 200 and future.json()["deleted"] == 0
@@ -4,7 +4,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import pytest
 from fastapi.testclient import TestClient
 from main import app
-from clipboard_crypto import clipboard_crypto, ClipboardCrypto
+from clipboard_crypto import (clipboard_crypto, ClipboardCrypto, ScrubScheduler, SecureBuffer, VaultLockedError,
+                              ENVELOPE_VERSION, ALG_AES_256_GCM)
+from database import ClipboardDB
+from cryptography.fernet import Fernet
+import base64
 from secure_storage import key_manager
 import secrets
 import string
@@ -211,4 +215,176 @@ class TestCryptographicThroughput:
         
         # Should handle at least 1 operation per second
         assert encryption_ops_per_sec >= 1.0
-        assert decryption_ops_per_sec >= 1.0
\ No newline at end of file
+        assert decryption_ops_per_sec >= 1.0
+
+class TestScrubScheduler:
+    """Test batching of SecureMemory collection requests"""
+
+    def test_requests_are_batched_in_background(self):
+        scheduler = ScrubScheduler(interval=0.05)
+        for _ in range(100):
+            scheduler.request()
+        # Requests return immediately; the background thread coalesces them
+        deadline = time.time() + 2.0
+        while scheduler.collections == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        assert scheduler.requests == 100
+        assert 1 <= scheduler.collections < 100
+
+    def test_immediate_mode_and_collect_now(self):
+        scheduler = ScrubScheduler(immediate=True)
+        scheduler.request()
+        scheduler.request()
+        assert scheduler.collections == 2
+        scheduler.collect_now()
+        assert scheduler.collections == 3
+        assert scheduler.stats()["requests"] == 2
+
+
+class TestSecureBuffer:
+    """Test the mlock'd secure buffer and the buffer-based crypto paths"""
+
+    def test_buffer_zeroed_on_release(self):
+        buf = SecureBuffer.from_str("top secret")
+        view = buf.view()
+        assert bytes(view) == b"top secret"
+        buf.release()
+        # The outstanding view now sees zeros instead of the secret
+        assert bytes(view) == b"\x00" * len(b"top secret")
+        assert buf.released
+        with pytest.raises(ValueError):
+            buf.view()
+
+    def test_encrypt_from_and_decrypt_into_buffer(self):
+        with SecureBuffer.from_str("Unicode: 你好世界 🚀") as plain:
+            encrypted = clipboard_crypto.encrypt_buffer(plain)
+        with clipboard_crypto.decrypt_to_buffer(encrypted) as decrypted:
+            assert decrypted.decode() == "Unicode: 你好世界 🚀"
+        assert clipboard_crypto.decrypt_content(encrypted) == "Unicode: 你好世界 🚀"
+
+    def test_fernet_compatibility(self):
+        fernet = Fernet(key_manager.get_clipboard_key().encode())
+        # Rows written by the previous Fernet-based implementation still decrypt
+        legacy = base64.b64encode(fernet.encrypt(b"legacy row")).decode()
+        assert clipboard_crypto.decrypt_content(legacy) == "legacy row"
+        # ...and new rows are valid Fernet tokens
+        encrypted = clipboard_crypto.encrypt_content("new row")
+        assert fernet.decrypt(base64.b64decode(encrypted)) == b"new row"
+
+    def test_tampered_ciphertext_rejected(self):
+        encrypted = bytearray(base64.b64decode(clipboard_crypto.encrypt_content("integrity")))
+        encrypted[-5] ^= 0x01
+        with pytest.raises(Exception):
+            clipboard_crypto.decrypt_content(base64.b64encode(bytes(encrypted)).decode())
+
+    def test_database_accepts_secure_buffer(self):
+        db = ClipboardDB("test_clipboard.db")
+        with SecureBuffer.from_str("buffered entry") as buf:
+            db.add_entry(buf)
+        assert db.get_history(limit=1)[0]["content"] == "buffered entry"
+
+
+class TestCipherEngines:
+    """Test the AES-GCM engine and the versioned envelope"""
+
+    def test_aes_gcm_round_trip_and_envelope(self):
+        gcm = ClipboardCrypto(cipher="aes-gcm")
+        encrypted = gcm.encrypt_content("GCM content 🚀")
+        raw = base64.b64decode(encrypted)
+        assert raw[0] == ENVELOPE_VERSION and raw[1] == ALG_AES_256_GCM
+        assert gcm.decrypt_content(encrypted) == "GCM content 🚀"
+        # Smaller than the double-base64 Fernet format
+        assert len(encrypted) < len(ClipboardCrypto(cipher="fernet").encrypt_content("GCM content 🚀"))
+
+    def test_engines_read_each_others_rows(self):
+        fernet = ClipboardCrypto(cipher="fernet")
+        gcm = ClipboardCrypto(cipher="aes-gcm")
+        assert gcm.decrypt_content(fernet.encrypt_content("old row")) == "old row"
+        assert fernet.decrypt_content(gcm.encrypt_content("new row")) == "new row"
+
+    def test_aes_gcm_rejects_tampering(self):
+        gcm = ClipboardCrypto(cipher="aes-gcm")
+        raw = bytearray(base64.b64decode(gcm.encrypt_content("authenticated")))
+        for index in (1, len(raw) - 1, 20):
+            tampered = bytearray(raw)
+            tampered[index] ^= 0x01
+            with pytest.raises(Exception):
+                gcm.decrypt_content(base64.b64encode(bytes(tampered)).decode())
+
+    def test_lock_waits_for_calls_using_the_key(self):
+        for cipher in ("fernet", "aes-gcm"):
+            crypto = ClipboardCrypto(cipher=cipher)
+            with crypto._using_keys() as keys:
+                # The vault locks while another thread is mid-seal: its key must stay intact
+                crypto.unload_key()
+                assert crypto.locked and not keys.key.released
+                sealed = keys.engine(cipher).seal(b"sealed while locking")
+            assert keys.key.released
+            with pytest.raises(VaultLockedError):
+                crypto.encrypt_content("after lock")
+            crypto.load_key()
+            assert crypto.decrypt_content(sealed) == "sealed while locking"
+            # Without users a retired key is zeroed at once
+            keys = crypto._keys
+            crypto.unload_key()
+            assert keys.key.released
+
+    def test_unknown_cipher_rejected(self):
+        with pytest.raises(ValueError):
+            ClipboardCrypto(cipher="rot13")
+
+
+class TestBatchCrypto:
+    """Test encrypt_many / decrypt_many"""
+
+    def test_batch_round_trip_preserves_order(self):
+        items = ["short", "", "x" * 10000, "unicode 🚀", "tail"]
+        for cipher in ("fernet", "aes-gcm"):
+            crypto = ClipboardCrypto(cipher=cipher)
+            encrypted = [result.value for result in crypto.encrypt_many(items)]
+            assert encrypted[1] == ""
+            decrypted = [result.value for result in crypto.decrypt_many(encrypted)]
+            assert decrypted == items
+
+    def test_errors_are_reported_per_item(self):
+        encrypted = [result.value for result in clipboard_crypto.encrypt_many(["first", "third"])]
+        tampered = base64.b64encode(b"\x01\x01" + b"\x00" * 40).decode()
+        results = list(clipboard_crypto.decrypt_many([encrypted[0], tampered, encrypted[1]]))
+        assert [r.ok for r in results] == [True, False, True]
+        assert results[0].value == "first" and results[2].value == "third"
+        assert results[1].value is None
+
+    def test_buffers_and_inputs(self):
+        with SecureBuffer.from_str("from buffer") as buf:
+            encrypted = [r.value for r in clipboard_crypto.encrypt_many([buf, b"raw bytes"])]
+        buffers = [r.value for r in clipboard_crypto.decrypt_many(encrypted, as_buffer=True)]
+        assert [b.decode() for b in buffers] == ["from buffer", "raw bytes"]
+        for b in buffers:
+            b.release()
+
+    def test_scratch_buffer_reset_and_capacity(self):
+        buf = SecureBuffer.from_bytes(b"secret")
+        buf.truncate(2)
+        buf.reset()
+        assert len(buf) == buf.capacity == 6
+        assert bytes(buf.view()) == b"\x00" * 6
+        buf.release()
+
+    def test_reset_zeroes_only_the_used_length(self, monkeypatch):
+        import clipboard_crypto as crypto_module
+        buf = SecureBuffer(1024 * 1024)
+        buf.reset()
+        buf.writable()[:5] = b"small"
+        buf.truncate(5)
+        sizes = []
+        memset = crypto_module.ctypes.memset
+
+        def counting_memset(address, value, size):
+            sizes.append(size)
+            return memset(address, value, size)
+
+        monkeypatch.setattr(crypto_module.ctypes, "memset", counting_memset)
+        buf.reset()
+        assert sizes == [5]
+        assert bytes(buf.view()) == b"\x00" * buf.capacity
+        buf.release()
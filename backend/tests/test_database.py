@@ -1,4 +1,4 @@
-import sys, os
+import sys, os, threading
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database import ClipboardDB
@@ -20,4 +20,20 @@ def test_database_operations():
     # 1. At least one entry exists
     assert len(history) > 0
     # 2. The content matches what we stored
-    assert history[0]["content"] == test_content
\ No newline at end of file
+    assert history[0]["content"] == test_content
+
+
+def test_lock_waiter_count_settles_under_contention():
+    db = ClipboardDB()
+
+    def hammer():
+        for _ in range(200):
+            with db.snapshot():
+                pass
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert db.pending_operations == 0
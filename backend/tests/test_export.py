@@ -0,0 +1,62 @@
+import sys, os, time, json
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+from fastapi.testclient import TestClient
+from main import app, db
+from database import ClipboardDB
+
+
+class TestExport:
+    """Test the streaming NDJSON export"""
+
+    def setup_method(self):
+        self.client = TestClient(app)
+        username = f"exportuser_{int(time.time() * 1000)}"
+        password = "ExportPass123!"
+        self.client.post("/register", data={"username": username, "password": password},
+                         headers={"Content-Type": "application/x-www-form-urlencoded"})
+        login = self.client.post("/login", data={"username": username, "password": password},
+                                 headers={"Content-Type": "application/x-www-form-urlencoded"})
+        self.headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    def _export(self, **headers):
+        response = self.client.get("/clipboard/export", headers={**self.headers, **headers})
+        assert response.status_code == 200
+        return response, [json.loads(line) for line in response.text.splitlines()]
+
+    def test_streams_every_entry_oldest_first(self, monkeypatch):
+        monkeypatch.setattr(main, "EXPORT_BATCH_SIZE", 7)
+        contents = [f"export {i} ✓" for i in range(30)]
+        for content in contents:
+            db.add_entry(content)
+
+        response, entries = self._export()
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "attachment" in response.headers["content-disposition"]
+        ids = [entry["id"] for entry in entries]
+        assert ids == sorted(ids) and len(set(ids)) == len(ids)
+        assert [e["content"] for e in entries if e["content"].startswith("export ")][-30:] == contents
+        assert len(entries) == len(db.get_history(limit=100000))
+
+    def test_batches_are_bounded_and_snapshot_at_start(self):
+        fresh = ClipboardDB()
+        for i in range(12):
+            fresh.add_entry(f"batched {i}")
+        batches = fresh.iter_history(batch_size=5)
+        first = next(batches)
+        assert [e["content"] for e in first] == [f"batched {i}" for i in range(5)]
+        # Rows written mid-export are left for the next export
+        fresh.add_entry("written during export")
+        rest = list(batches)
+        assert [len(batch) for batch in rest] == [5, 2]
+        assert "written during export" not in [e["content"] for batch in rest for e in batch]
+
+    def test_gzip_stream(self):
+        db.add_entry("compressed export")
+        response, entries = self._export(**{"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert entries[-1]["content"] == "compressed export"
+
+    def test_requires_auth(self):
+        assert self.client.get("/clipboard/export").status_code == 401
@@ -0,0 +1,167 @@
+import sys, os, time, threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from main import app, db
+from database import ClipboardDB
+from follower import Follower, ReadOnlyMiddleware
+
+
+def _rows(database):
+    """Every stored row (encrypted content, timestamp, fingerprint) by id"""
+    _, last_id = database.sync_position()
+    return {row["id"]: row for batch in database.iter_raw_history(last_id) for row in batch}
+
+
+class TestFollower:
+    """Test replicating the primary's history through /sync/snapshot and /sync/changes"""
+
+    def setup_method(self):
+        self.client = TestClient(app)
+        self.username = f"followuser_{int(time.time() * 1000)}"
+        self.password = "FollowPass123!"
+        self.client.post("/register", data={"username": self.username, "password": self.password},
+                         headers={"Content-Type": "application/x-www-form-urlencoded"})
+
+    def _follower(self, replica):
+        return Follower("http://testserver", replica, username=self.username, password=self.password,
+                        batch_size=2, client=self.client)
+
+    def test_snapshot_then_changes(self):
+        db.add_entry("replicated before start")
+        replica = ClipboardDB()
+        follower = self._follower(replica)
+        follower.sync()
+        assert follower.snapshots == 1
+        assert _rows(replica) == _rows(db)
+
+        for i in range(3):
+            db.add_entry(f"replicated {i}")
+        first = max(_rows(db))
+        db.delete_entry(first)
+        follower.sync()
+        assert follower.snapshots == 1
+        assert _rows(replica) == _rows(db)
+        assert first not in _rows(replica)
+
+        status = follower.status()
+        assert status["applied_seq"] == status["primary_seq"] == db.sync_position()[0]
+        assert status["seq_lag"] == 0 and status["lag_seconds"] is not None
+        # Replicated rows decrypt on the replica with the shared key
+        assert "replicated 1" in [entry["content"] for entry in replica.get_history(limit=10)]
+
+    def test_clear_and_resume(self):
+        replica = ClipboardDB()
+        self._follower(replica).sync()
+        db.clear_history()
+        db.add_entry("after primary clear")
+
+        # A new follower on the same replica resumes from the stored position, no snapshot
+        follower = self._follower(replica)
+        follower.sync()
+        assert follower.snapshots == 0
+        assert _rows(replica) == _rows(db)
+        assert [entry["content"] for entry in replica.get_history(limit=10)] == ["after primary clear"]
+
+    def test_position_ahead_of_primary_reloads(self):
+        replica = ClipboardDB()
+        db.add_entry("reload me")
+        replica.apply_changes([], db.sync_position()[0] + 1000)
+        follower = self._follower(replica)
+        while follower.poll():
+            pass
+        assert follower.snapshots == 1
+        assert _rows(replica) == _rows(db)
+        assert replica.replica_position() <= db.sync_position()[0]
+
+    def test_snapshot_load_does_not_block_readers(self):
+        replica = ClipboardDB()
+        replica.load_snapshot([[{"id": 1, "content": "old", "timestamp": "2024-01-01T00:00:00",
+                                 "fingerprint": "f-old"}]], 5)
+        seen = []
+
+        def batches():
+            yield [{"id": 7, "content": "new", "timestamp": "2024-01-02T00:00:00", "fingerprint": "f-new"}]
+            # Mid-download: another thread gets the lock at once and still sees the old state
+            result = {}
+            reader = threading.Thread(target=lambda: result.update(rows=replica.engine.page(10)))
+            reader.start()
+            reader.join(timeout=2)
+            seen.append(result.get("rows"))
+            raise ConnectionError("primary went away")
+
+        with pytest.raises(ConnectionError):
+            replica.load_snapshot(batches(), 9)
+        assert [row[0] for row in seen[0]] == [1]
+        # The interrupted load changed nothing
+        assert [row[0] for row in replica.engine.page(10)] == [1] and replica.replica_position() == 5
+
+        replica.load_snapshot(iter([[{"id": 7, "content": "new", "timestamp": "2024-01-02T00:00:00",
+                                      "fingerprint": "f-new"}]]), 9)
+        assert [row[0] for row in replica.engine.page(10)] == [7] and replica.replica_position() == 9
+
+    def test_replica_status_on_primary(self):
+        login = self.client.post("/login", data={"username": self.username, "password": self.password},
+                                 headers={"Content-Type": "application/x-www-form-urlencoded"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        assert self.client.get("/replica/status", headers=headers).status_code == 404
+        snapshot = self.client.get("/sync/snapshot", headers=headers)
+        assert snapshot.status_code == 200
+        assert snapshot.text.splitlines()[0] == f'{{"seq":{db.sync_position()[0]}}}'
+
+
+class TestReadOnlyMiddleware:
+    """Test that a follower refuses writes and sync but serves reads"""
+
+    def test_refuses_writes(self):
+        replica_app = FastAPI()
+
+        @replica_app.get("/clipboard/history")
+        async def history():
+            return []
+
+        @replica_app.post("/batch")
+        async def batch():
+            return {"results": []}
+
+        @replica_app.post("/vault/unlock")
+        async def unlock():
+            return {"locked": False}
+
+        @replica_app.get("/sync/changes")
+        async def changes():
+            return {}
+
+        @replica_app.get("/preferences")
+        async def preferences():
+            return {}
+
+        replica_app.add_middleware(ReadOnlyMiddleware, primary_url="http://primary:8000")
+        client = TestClient(replica_app)
+        assert client.get("/clipboard/history").status_code == 200
+        assert client.post("/batch").status_code == 200
+        # A password-mode follower starts locked and must still be unlockable
+        assert client.post("/vault/unlock").status_code == 200
+        refused = client.post("/clipboard/set", content="x")
+        assert refused.status_code == 403 and refused.json()["primary"] == "http://primary:8000"
+        assert client.delete("/clipboard/history/1").status_code == 403
+        assert client.get("/sync/changes").status_code == 403
+        # Users and preferences aren't replicated: the replica would answer {}
+        assert client.get("/preferences").status_code == 403
+
+    def test_batch_refuses_preferences_on_follower(self, monkeypatch):
+        import main
+        client = TestClient(app)
+        username = f"followbatch_{int(time.time() * 1000)}"
+        client.post("/register", data={"username": username, "password": "FollowPass123!"},
+                    headers={"Content-Type": "application/x-www-form-urlencoded"})
+        login = client.post("/login", data={"username": username, "password": "FollowPass123!"},
+                            headers={"Content-Type": "application/x-www-form-urlencoded"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        monkeypatch.setattr(main, "follower", Follower("http://primary:8000", db))
+        results = client.post("/batch", json={"ops": [{"op": "preferences"}, {"op": "health"}]},
+                              headers=headers).json()["results"]
+        assert [r["status"] for r in results] == [403, 200]
+        assert results[0]["body"]["primary"] == "http://primary:8000"
@@ -0,0 +1,58 @@
+import sys, os, time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from main import app, health_prober
+from health import HealthProber
+
+
+class TestHealthProber:
+    """Test the cached background health snapshot"""
+
+    def test_snapshot_is_cached_until_stale(self):
+        calls = []
+        prober = HealthProber(lambda: calls.append(1) or {"fine": True}, interval=60)
+        snapshot, checked_at, age = prober.snapshot()
+        assert snapshot == {"ok": True, "details": {"fine": True}}
+        assert checked_at <= time.time() and age < 1
+        for _ in range(10):
+            prober.snapshot()
+        assert len(calls) == 1
+        # Without the background thread a stale snapshot is refreshed on read
+        prober.interval = 0
+        prober.snapshot()
+        assert len(calls) == 2
+
+    def test_background_thread_and_failures(self):
+        results = iter([{"n": 1}])
+
+        def check():
+            return next(results)
+
+        prober = HealthProber(check, interval=0.05)
+        prober.start()
+        try:
+            deadline = time.time() + 5
+            while prober.failures == 0 and time.time() < deadline:
+                time.sleep(0.02)
+        finally:
+            prober.stop()
+        assert prober.probes >= 2
+        snapshot, _, _ = prober.snapshot()
+        assert snapshot["ok"] is False
+        assert prober.stats()["running"] is False
+
+
+def test_health_endpoint_serves_cached_snapshot():
+    client = TestClient(app)
+    first = client.get("/health")
+    assert first.status_code == 200
+    probes = health_prober.probes
+    second = client.get("/health").json()
+    assert health_prober.probes == probes
+    assert second["age"] >= 0 and second["checked_at"] == first.json()["checked_at"]
+    assert second["security"]["encryption_working"] is True
+
+    deep = client.get("/health?deep=1").json()
+    assert health_prober.probes == probes + 1
+    assert deep["age"] == 0.0
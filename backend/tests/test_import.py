@@ -0,0 +1,114 @@
+import sys, os, time, json, asyncio
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app, db
+from importer import ImportJob, ImportStreamError, parse_line, run_import
+
+
+def _ndjson(*records):
+    return "".join((r if isinstance(r, str) else json.dumps(r)) + "\n" for r in records).encode("utf-8")
+
+
+class TestImportParsing:
+    """Test NDJSON parsing and batching"""
+
+    def test_parse_line(self):
+        assert parse_line(b'{"content": " hi ", "timestamp": "2023-05-01T10:00:00"}') == ("hi", "2023-05-01T10:00:00")
+        assert parse_line(b'{"content": "x", "timestamp": "2023-05-01"}')[1] == "2023-05-01T00:00:00"
+        assert parse_line(b"   ") is None
+        assert parse_line(b'{"content": "   "}') is None
+        for bad in (b"not json", b'["content"]', b'{"content": 5}', b'{"content": "x", "timestamp": "soon"}'):
+            with pytest.raises(ValueError):
+                parse_line(bad)
+
+    def test_batches_across_chunk_boundaries(self):
+        body = _ndjson(*({"content": f"item {i}", "timestamp": f"2023-01-01T00:00:{i:02d}"} for i in range(5)),
+                       "garbage")
+        batches = []
+
+        async def chunks():
+            for start in range(0, len(body), 7):
+                yield body[start:start + 7]
+
+        async def store(batch):
+            batches.append(batch)
+            return len(batch), 0, 0
+
+        job = asyncio.run(run_import(ImportJob("t", "u"), chunks(), store, batch_size=2))
+        assert [len(b) for b in batches] == [2, 2, 1]
+        assert [content for b in batches for content, _ in b] == [f"item {i}" for i in range(5)]
+        assert job.lines == 6 and job.imported == 5 and job.invalid == 1
+        assert job.errors[0]["line"] == 6
+
+    def test_overlong_line_aborts(self):
+        async def chunks():
+            for _ in range(10):
+                yield b"x" * 100
+
+        async def store(batch):
+            return len(batch), 0, 0
+
+        with pytest.raises(ImportStreamError):
+            asyncio.run(run_import(ImportJob("t", "u"), chunks(), store, max_line_bytes=500))
+
+
+class TestImportEndpoint:
+    """Test POST /clipboard/import"""
+
+    def setup_method(self):
+        self.client = TestClient(app)
+        username = f"importuser_{int(time.time() * 1000)}"
+        password = "ImportPass123!"
+        self.client.post("/register", data={"username": username, "password": password},
+                         headers={"Content-Type": "application/x-www-form-urlencoded"})
+        login = self.client.post("/login", data={"username": username, "password": password},
+                                 headers={"Content-Type": "application/x-www-form-urlencoded"})
+        self.headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    def _import(self, body, **params):
+        def stream():
+            for start in range(0, len(body), 64):
+                yield body[start:start + 64]
+        return self.client.post("/clipboard/import", params=params, content=stream(),
+                                headers={**self.headers, "Content-Type": "application/x-ndjson"})
+
+    def test_import_keeps_timestamps_and_skips_duplicates(self):
+        marker = f"imported {time.time()}"
+        body = _ndjson(
+            {"content": f"{marker} a", "timestamp": "2021-03-04T05:06:07"},
+            {"content": f"{marker} b", "timestamp": "2021-03-04T05:06:08"},
+            {"content": f"{marker} a", "timestamp": "2021-03-04T05:06:07"},
+            "",
+            "{broken",
+            {"content": f"{marker} a", "timestamp": "2022-01-01T00:00:00"},
+        )
+        response = self._import(body, job_id=f"job{int(time.time() * 1000)}")
+        assert response.status_code == 200
+        result = response.json()
+        assert result["state"] == "done" and result["lines"] == 6
+        assert (result["imported"], result["duplicates"], result["invalid"]) == (3, 1, 1)
+        assert result["errors"][0]["line"] == 5
+
+        stored = {(e["content"], e["timestamp"]) for e in db.get_history(limit=100000) if e["content"].startswith(marker)}
+        assert stored == {(f"{marker} a", "2021-03-04T05:06:07"), (f"{marker} b", "2021-03-04T05:06:08"),
+                          (f"{marker} a", "2022-01-01T00:00:00")}
+
+        again = self._import(body).json()
+        assert again["imported"] == 0 and again["duplicates"] == 4
+
+        status = self.client.get(f"/clipboard/import/{result['job_id']}", headers=self.headers)
+        assert status.status_code == 200 and status.json()["imported"] == 3
+
+    def test_export_round_trip_is_all_duplicates(self):
+        db.add_entry("round trip entry")
+        exported = self.client.get("/clipboard/export", headers=self.headers).content
+        lines = exported.count(b"\n")
+        result = self._import(exported).json()
+        assert result["imported"] == 0 and result["duplicates"] == lines
+
+    def test_job_lookup_and_validation(self):
+        assert self.client.get("/clipboard/import/nope", headers=self.headers).status_code == 404
+        assert self._import(b"", job_id="bad id!").status_code == 422
+        assert self.client.post("/clipboard/import", content=b"").status_code == 401
@@ -0,0 +1,60 @@
+import sys, os, json, logging, queue
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: F401  (installs the queue-based logging)
+from structured_logging import JsonFormatter, LogThrottleFilter, NonBlockingQueueHandler, LOG_RECORDS_DROPPED
+
+
+def _record(name="clipvault.test", level=logging.INFO, msg="hello", **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonFormatter:
+    """Test structured log output"""
+
+    def test_fields_extra_and_exception(self):
+        formatter = JsonFormatter()
+        entry = json.loads(formatter.format(_record(msg="saved", fields=["theme"])))
+        assert entry["message"] == "saved" and entry["level"] == "INFO"
+        assert entry["logger"] == "clipvault.test" and entry["fields"] == ["theme"]
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = _record(level=logging.ERROR)
+            record.exc_info = sys.exc_info()
+        assert "ValueError: boom" in json.loads(formatter.format(record))["exc"]
+
+
+class TestLogThrottleFilter:
+    """Test per-logger sampling and rate limiting"""
+
+    def test_sampling_never_drops_warnings(self):
+        throttle = LogThrottleFilter(samples={"noisy": 0.0})
+        assert throttle.filter(_record("noisy.child")) is False
+        assert throttle.filter(_record("noisy", level=logging.WARNING)) is True
+        assert throttle.filter(_record("quiet")) is True
+        assert LOG_RECORDS_DROPPED.value("noisy.child", "sampled") >= 1
+
+    def test_rate_limit_per_logger(self):
+        throttle = LogThrottleFilter(rates={"chatty": (0.001, 3)}, default_rate=(1000, 1000))
+        passed = [throttle.filter(_record("chatty")) for _ in range(10)]
+        assert passed.count(True) == 3
+        # Other loggers have their own buckets
+        assert throttle.filter(_record("other")) is True
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    before = LOG_RECORDS_DROPPED.value("clipvault.full", "queue_full")
+    handler.handle(_record("clipvault.full"))
+    handler.handle(_record("clipvault.full"))
+    assert handler.queue.qsize() == 1
+    assert LOG_RECORDS_DROPPED.value("clipvault.full", "queue_full") == before + 1
+    # Records are queued unformatted; the listener thread does the formatting
+    assert handler.queue.get_nowait().msg == "hello"
+
+
+def test_root_logger_uses_queue_handler():
+    assert any(isinstance(h, NonBlockingQueueHandler) for h in logging.getLogger().handlers)
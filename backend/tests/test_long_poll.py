@@ -0,0 +1,106 @@
+import sys, os, time, asyncio, threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from main import app, db, history_notifier, _version_token
+from response_cache import BOOT_ID
+from long_poll import ChangeNotifier
+
+
+class TestChangeNotifier:
+    """Test waking waiters on a version counter"""
+
+    def test_one_notification_wakes_every_waiter(self):
+        notifier = ChangeNotifier()
+        state = {"version": 0}
+
+        async def scenario():
+            waiters = [asyncio.ensure_future(notifier.wait(lambda: state["version"], 0, 5.0))
+                       for _ in range(500)]
+            await asyncio.sleep(0.05)
+            assert notifier.waiting == 500
+
+            def writer():
+                state["version"] = 1
+                notifier.notify(1)
+
+            threading.Thread(target=writer).start()
+            return await asyncio.gather(*waiters)
+
+        start = time.perf_counter()
+        assert all(asyncio.run(scenario()))
+        assert time.perf_counter() - start < 2.0
+        assert notifier.waiting == 0 and notifier.notifications == 1
+
+    def test_timeout_and_already_passed(self):
+        notifier = ChangeNotifier()
+        assert asyncio.run(notifier.wait(lambda: 3, 2, 5.0)) is True
+        start = time.perf_counter()
+        assert asyncio.run(notifier.wait(lambda: 3, 3, 0.1)) is False
+        assert time.perf_counter() - start < 1.0
+
+
+class TestHistoryDelta:
+    """Test ClipboardDB.changes_since"""
+
+    def test_delta_of_adds_and_deletes(self):
+        since = db.history_version
+        db.add_entry("delta one")
+        db.add_entry("delta two")
+        version, added, deleted = db.changes_since(since)
+        assert version == since + 2 and len(added) == 2 and deleted == []
+        assert [e["content"] for e in db.get_entries(added)] == ["delta one", "delta two"]
+
+        db.delete_entry(added[0])
+        _, added_now, deleted_now = db.changes_since(since)
+        assert added_now == added[1:] and deleted_now == []
+        _, _, deleted_later = db.changes_since(version)
+        assert deleted_later == [added[0]]
+        assert db.changes_since(db.history_version)[1:] == ([], [])
+
+    def test_clear_requires_reload(self):
+        since = db.history_version
+        db.add_entry("before clear")
+        db.clear_history()
+        assert db.changes_since(since) is None
+
+
+class TestWaitEndpoint:
+    """Test /clipboard/wait long-polling"""
+
+    def setup_method(self):
+        self.client = TestClient(app)
+        username = f"waituser_{int(time.time() * 1000)}"
+        password = "WaitPass123!"
+        self.client.post("/register", data={"username": username, "password": password},
+                         headers={"Content-Type": "application/x-www-form-urlencoded"})
+        login = self.client.post("/login", data={"username": username, "password": password},
+                                 headers={"Content-Type": "application/x-www-form-urlencoded"})
+        self.headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    def test_wakes_with_only_the_new_entry(self):
+        db.add_entry("already seen")
+        since = _version_token(db.history_version)
+        timer = threading.Timer(0.2, db.add_entry, args=("arrived while waiting",))
+        timer.start()
+        start = time.perf_counter()
+        response = self.client.get(f"/clipboard/wait?since={since}&timeout=10", headers=self.headers)
+        timer.join()
+        assert time.perf_counter() - start < 5.0
+        body = response.json()
+        assert response.status_code == 200 and not body["timed_out"] and not body["reset"]
+        assert [e["content"] for e in body["entries"]] == ["arrived while waiting"]
+        assert body["version"] == _version_token(db.history_version)
+        assert history_notifier.waiting == 0
+
+    def test_timeout_and_reset(self):
+        version = _version_token(db.history_version)
+        timed_out = self.client.get(f"/clipboard/wait?since={version}&timeout=0.1", headers=self.headers).json()
+        assert timed_out["timed_out"] and timed_out["entries"] == [] and timed_out["version"] == version
+        # A token from before a restart can't be diffed against, even when its number is still valid here
+        for stale in ("0", f"previousboot:{db.history_version}", f"{BOOT_ID}:{db.history_version + 1000}"):
+            reset = self.client.get(f"/clipboard/wait?since={stale}", headers=self.headers).json()
+            assert reset["reset"] and not reset["timed_out"] and reset["version"] == version
+
+    def test_requires_auth(self):
+        assert self.client.get("/clipboard/wait?since=0").status_code == 401
@@ -0,0 +1,59 @@
+import sys, os, time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from main import app
+from metrics import MetricsRegistry
+
+
+class TestMetricPrimitives:
+    """Test counters, histograms and text rendering"""
+
+    def test_counter_and_histogram_rendering(self):
+        registry = MetricsRegistry()
+        requests = registry.counter("test_requests_total", "Requests", ("route",))
+        latency = registry.histogram("test_latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+        requests.inc("/a")
+        requests.inc("/a", amount=2)
+        latency.observe(0.05, "/a")
+        latency.observe(0.5, "/a")
+        latency.observe(5.0, "/a")
+
+        text = registry.render()
+        assert "# TYPE test_requests_total counter" in text
+        assert 'test_requests_total{route="/a"} 3.0' in text
+        assert 'test_latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+        assert 'test_latency_seconds_bucket{route="/a",le="1.0"} 2' in text
+        assert 'test_latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+        assert 'test_latency_seconds_count{route="/a"} 3' in text
+
+    def test_registering_twice_returns_same_metric(self):
+        registry = MetricsRegistry()
+        first = registry.counter("dup_total", "Dup")
+        assert registry.counter("dup_total", "Dup") is first
+
+
+def test_metrics_endpoint_reports_all_layers():
+    client = TestClient(app)
+    username = f"metrics_{int(time.time())}"
+    password = "Metrics123!"
+    client.post("/register", data={"username": username, "password": password},
+                headers={"Content-Type": "application/x-www-form-urlencoded"})
+    login = client.post("/login", data={"username": username, "password": password},
+                        headers={"Content-Type": "application/x-www-form-urlencoded"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    client.post("/clipboard/set", content="metrics content",
+                headers={**headers, "Content-Type": "text/plain; charset=utf-8"})
+    client.get("/clipboard/history", headers=headers)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    assert 'clipvault_http_requests_total{method="GET",route="/clipboard/history",status="200"}' in text
+    assert 'clipvault_db_operation_seconds_count{operation="add_entry"}' in text
+    assert 'clipvault_db_operation_seconds_count{operation="get_history"}' in text
+    assert "clipvault_db_lock_wait_seconds_count" in text
+    assert 'clipvault_crypto_bytes_total{operation="encrypt"}' in text
+    assert 'clipvault_keyring_call_seconds_count{operation="get_jwt_secret"}' in text
+    assert "clipvault_rate_limit_rejections_total" in text
@@ -0,0 +1,58 @@
+import sys, os, time, pstats
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from main import app
+from profiling import RequestProfiler, ProfilingMiddleware
+
+
+def _profiled_app(profiler):
+    test_app = FastAPI()
+    test_app.add_middleware(ProfilingMiddleware, profiler=profiler)
+
+    @test_app.get("/work")
+    async def work():
+        return {"total": sum(range(1000))}
+
+    return test_app
+
+
+class TestRequestProfiler:
+    """Test request selection, output format and rotation"""
+
+    def test_header_selected_profile_is_valid_pstats(self, tmp_path):
+        profiler = RequestProfiler(str(tmp_path))
+        client = TestClient(_profiled_app(profiler))
+
+        assert client.get("/work").status_code == 200
+        assert profiler.list_profiles() == []
+
+        assert client.get("/work", headers={"X-ClipVault-Profile": "1"}).status_code == 200
+        profiles = profiler.list_profiles()
+        assert len(profiles) == 1
+        stats = pstats.Stats(profiler.latest_profile())
+        assert stats.total_calls > 0
+
+    def test_sampling_and_rotation(self, tmp_path):
+        profiler = RequestProfiler(str(tmp_path), sample_every=2, keep=2)
+        client = TestClient(_profiled_app(profiler))
+        for _ in range(8):
+            assert client.get("/work").status_code == 200
+        # 4 of 8 requests sampled, only the newest 2 kept
+        assert len(profiler.list_profiles()) == 2
+
+
+def test_profile_endpoints_disabled_by_default():
+    client = TestClient(app)
+    username = f"profiling_{int(time.time())}"
+    password = "Profiling123!"
+    client.post("/register", data={"username": username, "password": password},
+                headers={"Content-Type": "application/x-www-form-urlencoded"})
+    login = client.post("/login", data={"username": username, "password": password},
+                        headers={"Content-Type": "application/x-www-form-urlencoded"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    assert client.get("/admin/profiles", headers=headers).status_code == 404
+    assert client.get("/admin/profiles/latest", headers=headers).status_code == 404
+    assert client.get("/admin/profiles").status_code == 401
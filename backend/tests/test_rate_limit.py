@@ -0,0 +1,143 @@
+import sys, os, time, base64, hashlib, hmac, json
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from main import app
+from rate_limit import TokenBucket, RateLimiter, AdmissionController, RateLimitMiddleware, _identity
+
+
+SECRET = "test-jwt-secret"
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _jwt(subject, issued=0, secret=SECRET):
+    """HS256 token for `subject` signed with `secret`"""
+    signing_input = f"{_b64(json.dumps({'alg': 'HS256', 'typ': 'JWT'}).encode())}." \
+                    f"{_b64(json.dumps({'sub': subject, 'iat': issued}).encode())}"
+    signature = hmac.new(secret.encode(), signing_input.encode(), hashlib.sha256).digest()
+    return f"{signing_input}.{_b64(signature)}"
+
+
+def _limited_app(limiter, admission=None):
+    test_app = FastAPI()
+    test_app.add_middleware(RateLimitMiddleware, limiter=limiter, admission=admission, jwt_secret=lambda: SECRET)
+
+    @test_app.get("/items/{item_id}")
+    async def item(item_id: int):
+        return {"id": item_id}
+
+    @test_app.post("/login")
+    async def login():
+        return {"ok": True}
+
+    @test_app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return test_app
+
+
+class TestTokenBucket:
+    """Test token bucket accounting"""
+
+    def test_burst_then_refill(self):
+        bucket = TokenBucket(rate=2.0, capacity=3.0, now=0.0)
+        assert [bucket.consume(0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+        assert bucket.consume(0.0) == 0.5
+        # Half a second later one token has been refilled
+        assert bucket.consume(0.5) == 0.0
+
+    def test_route_overrides_and_counters(self):
+        limiter = RateLimiter(rate=100, burst=100, route_limits={"/login": (1, 1)})
+        assert limiter.check("ip:a", "/login", now=0.0) == 0.0
+        assert limiter.check("ip:a", "/login", now=0.0) > 0
+        # Other identities and routes have their own buckets
+        assert limiter.check("ip:b", "/login", now=0.0) == 0.0
+        assert limiter.check("ip:a", "/clipboard/history", now=0.0) == 0.0
+        stats = limiter.stats()
+        assert stats["rejected"] == 1
+        assert stats["rejected_by_route"] == {"/login": 1}
+
+
+class TestRateLimitMiddleware:
+    """Test 429/503 responses from the middleware"""
+
+    def test_rejects_with_retry_after(self):
+        limiter = RateLimiter(rate=0.1, burst=2)
+        client = TestClient(_limited_app(limiter))
+        headers = {"Authorization": f"Bearer {_jwt('alice')}"}
+        assert client.get("/items/1", headers=headers).status_code == 200
+        # Numeric ids share one per-route bucket
+        assert client.get("/items/2", headers=headers).status_code == 200
+        response = client.get("/items/3", headers=headers)
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
+        # A fresh token for the same user gets no fresh bucket
+        assert client.get("/items/1", headers={"Authorization": f"Bearer {_jwt('alice', 1)}"}).status_code == 429
+        # Another user is unaffected, exempt paths are never limited
+        assert client.get("/items/1", headers={"Authorization": f"Bearer {_jwt('bob')}"}).status_code == 200
+        assert client.get("/ping", headers=headers).status_code == 200
+
+    def test_identity_falls_back_to_client_address(self):
+        secret = SECRET.encode()
+        scope = {"headers": [(b"authorization", b"Bearer not-a-jwt")], "client": ("10.0.0.1", 1234)}
+        assert _identity(scope, secret) == "ip:10.0.0.1"
+        assert _identity({"headers": [], "client": ("10.0.0.2", 1)}, secret) == "ip:10.0.0.2"
+        scope = {"headers": [(b"authorization", f"Bearer {_jwt('carol')}".encode())], "client": ("10.0.0.1", 1)}
+        assert _identity(scope, secret) == "user:carol"
+        # Without a secret to check against, tokens name nobody
+        assert _identity(scope) == "ip:10.0.0.1"
+
+    def test_forged_tokens_are_limited_by_address(self):
+        limiter = RateLimiter(rate=0.1, burst=2)
+        client = TestClient(_limited_app(limiter))
+        # Neither a forged token for alice nor a new `sub` per request escapes the address bucket
+        assert client.get("/items/1", headers={"Authorization": f"Bearer {_jwt('alice', secret='guess')}"}).status_code == 200
+        assert client.get("/items/1", headers={"Authorization": f"Bearer {_jwt('x1', secret='guess')}"}).status_code == 200
+        assert client.get("/items/1", headers={"Authorization": f"Bearer {_jwt('x2', secret='guess')}"}).status_code == 429
+        # ...and alice's own bucket is untouched
+        assert client.get("/items/1", headers={"Authorization": f"Bearer {_jwt('alice')}"}).status_code == 200
+
+    def test_auth_routes_have_their_own_bucket(self):
+        limiter = RateLimiter(rate=100, burst=100, route_limits={"/login": (0.1, 2)})
+        client = TestClient(_limited_app(limiter))
+        assert client.post("/login").status_code == 200
+        assert client.post("/login").status_code == 200
+        assert client.post("/login").status_code == 429
+        # Other routes keep the default allowance
+        assert client.get("/items/1").status_code == 200
+        assert limiter.stats()["rejected_by_route"]["/login"] == 1
+
+    def test_sheds_load_when_db_queue_saturated(self):
+        pending = {"n": 0}
+        admission = AdmissionController(max_db_pending=5, db_pending=lambda: pending["n"],
+                                        threadpool_saturation=lambda: False)
+        client = TestClient(_limited_app(RateLimiter(), admission))
+        assert client.get("/items/1").status_code == 200
+        pending["n"] = 5
+        response = client.get("/items/1")
+        assert response.status_code == 503
+        assert "retry-after" in response.headers
+        assert admission.stats()["rejected"]["db_queue"] == 1
+
+
+def test_rate_limit_stats_endpoint():
+    client = TestClient(app)
+    username = f"ratelimit_{int(time.time())}"
+    password = "RateLimit123!"
+    client.post("/register", data={"username": username, "password": password},
+                headers={"Content-Type": "application/x-www-form-urlencoded"})
+    login = client.post("/login", data={"username": username, "password": password},
+                        headers={"Content-Type": "application/x-www-form-urlencoded"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    response = client.get("/admin/rate-limits", headers=headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert "rejected" in body["rate_limiter"]
+    assert "rejected" in body["admission"]
+    assert body["db_pending"] >= 0
@@ -0,0 +1,199 @@
+import sys, os, time, gzip, zlib
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app, db, clipboard, response_cache
+from response_cache import (
+    ResponseCache, RESPONSE_COMPRESSIONS, BOOT_ID, etag_matches, make_etag, negotiate_encoding, serialize_json,
+)
+
+
+class TestResponseCache:
+    """Test the versioned LRU response cache"""
+
+    def test_hit_and_version_invalidation(self):
+        cache = ResponseCache(max_bytes=1024)
+        assert cache.get("page", 1) is None
+        cache.put("page", 1, b"v1 body")
+        assert cache.get("page", 1).body == b"v1 body"
+        # A newer version drops everything cached for the old one
+        assert cache.get("page", 2) is None
+        assert cache.stats()["entries"] == 0 and cache.bytes == 0
+
+    def test_lru_eviction_within_byte_budget(self):
+        cache = ResponseCache(max_bytes=30)
+        cache.put("a", 1, b"x" * 10)
+        cache.put("b", 1, b"x" * 10)
+        cache.put("c", 1, b"x" * 10)
+        cache.get("a", 1)  # a is now most recently used
+        cache.put("d", 1, b"x" * 10)
+        assert cache.get("b", 1) is None
+        assert cache.get("a", 1) is not None and cache.get("d", 1) is not None
+        assert cache.bytes <= 30 and cache.evictions == 1
+        # Bodies over the budget are returned but never stored
+        assert cache.put("huge", 1, b"x" * 100).body == b"x" * 100
+        assert cache.get("huge", 1) is None
+
+    def test_serialization_matches_json_response(self):
+        from fastapi.responses import JSONResponse
+        content = {"history": [{"id": 1, "content": "é 🚀", "timestamp": "t"}], "user": "u"}
+        assert serialize_json(content) == JSONResponse(content).body
+
+
+class TestHistoryCaching:
+    """Test /clipboard/history served through the cache"""
+
+    def setup_method(self):
+        self.client = TestClient(app)
+        username = f"cacheuser_{int(time.time() * 1000)}"
+        password = "CachePass123!"
+        self.client.post("/register", data={"username": username, "password": password},
+                         headers={"Content-Type": "application/x-www-form-urlencoded"})
+        login = self.client.post("/login", data={"username": username, "password": password},
+                                 headers={"Content-Type": "application/x-www-form-urlencoded"})
+        self.headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    def test_writes_invalidate_cached_pages(self):
+        db.add_entry("cached entry one")
+        first = self.client.get("/clipboard/history?limit=5", headers=self.headers)
+        assert first.status_code == 200
+        hits = response_cache.stats()["hits"]
+        second = self.client.get("/clipboard/history?limit=5", headers=self.headers)
+        assert second.content == first.content
+        assert response_cache.stats()["hits"] == hits + 1
+
+        version = db.history_version
+        db.add_entry("cached entry two")
+        assert db.history_version == version + 1
+        third = self.client.get("/clipboard/history?limit=5", headers=self.headers).json()
+        assert third["history"][0]["content"] == "cached entry two"
+
+        entry_id = third["history"][0]["id"]
+        assert self.client.delete(f"/clipboard/history/{entry_id}", headers=self.headers).status_code == 200
+        contents = [e["content"] for e in self.client.get("/clipboard/history?limit=5", headers=self.headers).json()["history"]]
+        assert "cached entry two" not in contents
+
+
+class TestConditionalRequests:
+    """Test ETag / If-None-Match handling"""
+
+    def setup_method(self):
+        self.client = TestClient(app)
+        username = f"etaguser_{int(time.time() * 1000)}"
+        password = "EtagPass123!"
+        self.client.post("/register", data={"username": username, "password": password},
+                         headers={"Content-Type": "application/x-www-form-urlencoded"})
+        login = self.client.post("/login", data={"username": username, "password": password},
+                                 headers={"Content-Type": "application/x-www-form-urlencoded"})
+        self.headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    def _get(self, path, etag=None):
+        headers = dict(self.headers)
+        if etag:
+            headers["If-None-Match"] = etag
+        return self.client.get(path, headers=headers)
+
+    def test_etag_matching(self):
+        etag = make_etag("x", 1)
+        assert etag.startswith(f'"{BOOT_ID}-') and etag != make_etag("x", 2)
+        assert etag_matches(etag, etag)
+        assert etag_matches(f'"other", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches(None, etag) and not etag_matches('"other"', etag)
+
+    def test_history_not_modified_until_write(self, monkeypatch):
+        db.add_entry("etag entry one")
+        first = self._get("/clipboard/history?limit=5")
+        etag = first.headers["etag"]
+        # A 304 must not touch the database or decrypt anything
+        monkeypatch.setattr(db, "get_history", lambda *a, **k: pytest.fail("history was queried"))
+        monkeypatch.setattr(response_cache, "get", lambda *a, **k: pytest.fail("cache was consulted"))
+        second = self._get("/clipboard/history?limit=5", etag)
+        assert second.status_code == 304 and second.content == b""
+        assert second.headers["etag"] == etag
+        monkeypatch.undo()
+
+        assert self._get("/clipboard/history?limit=4", etag).status_code == 200
+        db.add_entry("etag entry two")
+        third = self._get("/clipboard/history?limit=5", etag)
+        assert third.status_code == 200 and third.headers["etag"] != etag
+        assert third.json()["history"][0]["content"] == "etag entry two"
+
+    def test_preferences_not_modified_until_update(self, monkeypatch):
+        first = self._get("/preferences")
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        monkeypatch.setattr(db, "get_user_preferences", lambda *a, **k: pytest.fail("preferences were queried"))
+        assert self._get("/preferences", etag).status_code == 304
+        monkeypatch.undo()
+
+        self.client.post("/preferences", json={"theme": "dark"}, headers=self.headers)
+        updated = self._get("/preferences", etag)
+        assert updated.status_code == 200 and updated.json()["theme"] == "dark"
+
+    def test_current_clipboard_tag_follows_content(self, monkeypatch):
+        monkeypatch.setattr(clipboard, "get_clipboard_content", lambda: "first copy")
+        first = self._get("/clipboard/current")
+        assert first.json()["content"] == "first copy"
+        assert self._get("/clipboard/current", first.headers["etag"]).status_code == 304
+        monkeypatch.setattr(clipboard, "get_clipboard_content", lambda: "second copy")
+        changed = self._get("/clipboard/current", first.headers["etag"])
+        assert changed.status_code == 200 and changed.json()["content"] == "second copy"
+
+
+class TestCompression:
+    """Test Accept-Encoding negotiation and cached compressed variants"""
+
+    def test_negotiation(self):
+        assert negotiate_encoding(None) is None
+        assert negotiate_encoding("gzip, deflate, br") == "gzip"
+        assert negotiate_encoding("deflate") == "deflate"
+        assert negotiate_encoding("gzip;q=0.5, deflate;q=0.8") == "deflate"
+        assert negotiate_encoding("gzip;q=0, *") == "deflate"
+        assert negotiate_encoding("br, identity") is None
+
+    def test_variants_are_cached_and_budgeted(self):
+        cache = ResponseCache(max_bytes=1 << 20, compress_min_bytes=100)
+        body = serialize_json({"history": [{"content": "def f(x):\n    return x\n"}] * 200})
+        entry = cache.put("page", 1, body)
+        compressions = RESPONSE_COMPRESSIONS.value("gzip")
+        data, encoding = cache.encode(entry, "gzip, deflate")
+        assert encoding == "gzip" and gzip.decompress(data) == body
+        assert cache.bytes == len(body) + len(data)
+        again, _ = cache.encode(cache.get("page", 1), "gzip")
+        assert again is data and RESPONSE_COMPRESSIONS.value("gzip") == compressions + 1
+        deflated, encoding = cache.encode(entry, "deflate")
+        assert encoding == "deflate" and zlib.decompress(deflated) == body
+        # Small bodies and clients without gzip/deflate get identity
+        small = cache.put("small", 1, b'{"history":[]}')
+        assert cache.encode(small, "gzip") == (small.body, None)
+        assert cache.encode(entry, None) == (body, None)
+
+    def test_history_endpoint_compresses_large_pages(self):
+        client = TestClient(app)
+        username = f"gzipuser_{int(time.time() * 1000)}"
+        password = "GzipPass123!"
+        client.post("/register", data={"username": username, "password": password},
+                    headers={"Content-Type": "application/x-www-form-urlencoded"})
+        login = client.post("/login", data={"username": username, "password": password},
+                            headers={"Content-Type": "application/x-www-form-urlencoded"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        for i in range(20):
+            db.add_entry(f"snippet {i}: " + "SELECT * FROM clipboard_history; " * 20)
+
+        gzipped = client.get("/clipboard/history?limit=20", headers={**headers, "Accept-Encoding": "gzip"})
+        assert gzipped.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in gzipped.headers["vary"]
+        assert gzipped.headers["etag"].endswith('-gzip"')
+        assert len(gzipped.json()["history"]) == 20
+        plain = client.get("/clipboard/history?limit=20", headers={**headers, "Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.json() == gzipped.json()
+        # The compressed variant's tag revalidates too
+        revalidated = client.get("/clipboard/history?limit=20",
+                                 headers={**headers, "If-None-Match": gzipped.headers["etag"]})
+        assert revalidated.status_code == 304
+
+        raw = client.get("/admin/raw-history?limit=20", headers={**headers, "Accept-Encoding": "deflate"})
+        assert raw.headers["content-encoding"] == "deflate" and len(raw.json()["raw_history"]) == 20
@@ -0,0 +1,40 @@
+import sys, os, stat
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from secure_storage import key_manager, EncryptedFileKeystore, SecureKeyManager
+
+
+class TestEncryptedFileKeystore:
+    """Test the encrypted file keystore backend"""
+
+    def test_round_trip_permissions_and_encryption(self, tmp_path):
+        path = str(tmp_path / "keys.keystore")
+        store = EncryptedFileKeystore(path)
+        assert store.get_password("ClipVault", "missing") is None
+        store.set_password("ClipVault", "jwt_secret_key", "super-secret-value")
+        assert store.get_password("ClipVault", "jwt_secret_key") == "super-secret-value"
+        for file_path in (path, path + ".key"):
+            assert stat.S_IMODE(os.stat(file_path).st_mode) == 0o600
+        with open(path, "rb") as f:
+            assert b"super-secret-value" not in f.read()
+        # A new instance picks up the same key file
+        assert EncryptedFileKeystore(path).get_password("ClipVault", "jwt_secret_key") == "super-secret-value"
+        store.delete_password("ClipVault", "jwt_secret_key")
+        assert store.get_password("ClipVault", "jwt_secret_key") is None
+
+    def test_wrong_key_rejected(self, tmp_path):
+        path = str(tmp_path / "keys.keystore")
+        EncryptedFileKeystore(path).set_password("ClipVault", "name", "value")
+        with pytest.raises(ValueError):
+            EncryptedFileKeystore(path, key=os.urandom(32)).get_password("ClipVault", "name")
+
+    def test_key_manager_on_file_store(self, tmp_path):
+        manager = SecureKeyManager(store=EncryptedFileKeystore(str(tmp_path / "manager.keystore")))
+        assert manager.get_clipboard_key() and manager.get_jwt_secret()
+        old_secret = manager.get_jwt_secret()
+        manager.rotate_jwt_secret()
+        assert manager.get_jwt_secret() != old_secret
+        assert manager.get_key_info()["keystore"] == "file"
+        # The app under test runs on the file keystore (tests/conftest.py)
+        assert key_manager.get_key_info()["keystore"] == "file"
@@ -0,0 +1,76 @@
+import sys, os, threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from startup import StartupTracker, Lazy, is_initialized, resolve
+
+
+class Widget:
+    def __init__(self):
+        self.value = 1
+
+
+class TestLazy:
+    """Test lazily built singletons"""
+
+    def test_built_once_on_first_use(self):
+        built = []
+
+        def factory():
+            built.append(1)
+            return Widget()
+
+        tracker = StartupTracker()
+        widget = Lazy("test_widget", factory, tracker=tracker)
+        assert not is_initialized(widget) and built == []
+        threads = [threading.Thread(target=lambda: widget.value) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert built == [1] and is_initialized(widget)
+        assert tracker.report()["components"]["test_widget"]["state"] == "ready"
+        widget.value = 5
+        assert resolve(widget).value == 5
+
+    def test_failed_construction_is_retried(self):
+        attempts = []
+
+        def factory():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("keyring unavailable")
+            return Widget()
+
+        widget = Lazy("test_flaky", factory, tracker=StartupTracker())
+        with pytest.raises(RuntimeError):
+            widget.value
+        assert widget.value == 1 and len(attempts) == 2
+
+
+class TestStartupTracker:
+    """Test warm-up tracking and the timing report"""
+
+    def test_warm_up_reports_progress_and_failures(self):
+        tracker = StartupTracker()
+        finished = []
+        tracker.warm_up({"fast": lambda: None, "broken": lambda: 1 / 0}, then=lambda: finished.append(1)).join()
+        report = tracker.report()
+        assert finished == [1] and report["ready"] is False
+        assert report["components"]["fast"]["state"] == "ready"
+        assert report["components"]["broken"]["state"] == "failed"
+        assert "division" in report["components"]["broken"]["error"]
+        assert "warm_up_complete" in report["phases"]
+
+
+def test_ping_ready_and_startup_endpoints():
+    client = TestClient(app)
+    assert client.get("/ping").status_code == 204
+    report = client.get("/startup").json()
+    assert "imports_done" in report["phases"]
+    assert "db" in report["components"]
+    ready = client.get("/ready")
+    assert ready.status_code in (200, 503)
+    assert ready.json()["ready"] == (ready.status_code == 200)
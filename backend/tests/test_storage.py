@@ -0,0 +1,206 @@
+import sys, os, time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from database import ClipboardDB
+from storage import (STORAGE_ENGINES, DuplicateEntryError, MemoryEngine, SQLiteEngine,
+                     UnsupportedOperation, engine_from_env)
+
+
+def _new_engine(name):
+    engine = SQLiteEngine(":memory:") if name == SQLiteEngine.name else STORAGE_ENGINES[name]()
+    engine.init_schema()
+    return engine
+
+
+@pytest.fixture(params=sorted(STORAGE_ENGINES))
+def engine(request):
+    """A fresh, empty instance of every registered engine"""
+    engine = _new_engine(request.param)
+    yield engine
+    engine.close()
+
+
+class TestEngineConformance:
+    """Behaviour every storage engine must share (same calls, same results)"""
+
+    def test_append_page_and_get(self, engine):
+        first = engine.append("c1", "2024-01-02T00:00:00", "f1")
+        second = engine.append("c2", "2024-01-01T00:00:00", "f2")
+        third = engine.append("c3", "2024-01-03T00:00:00", None)
+        assert first < second < third
+        assert engine.max_id() == third
+        # Pages are newest first by timestamp, not by insertion order
+        assert engine.page(10) == [(third, "c3", "2024-01-03T00:00:00"), (first, "c1", "2024-01-02T00:00:00"),
+                                   (second, "c2", "2024-01-01T00:00:00")]
+        assert [row[0] for row in engine.page(2)] == [third, first]
+        assert engine.get([third, 999, first, first]) == [(first, "c1", "2024-01-02T00:00:00"),
+                                                          (third, "c3", "2024-01-03T00:00:00")]
+        assert engine.get([]) == []
+
+    def test_scan_is_keyset_paginated(self, engine):
+        ids = [engine.append(f"c{i}", f"2024-01-01T00:00:{i:02d}", f"f{i}") for i in range(7)]
+        engine.delete([ids[2]])
+        scanned, after_id = [], 0
+        while True:
+            rows = engine.scan(after_id, ids[5], 2)
+            if not rows:
+                break
+            scanned.extend(row[0] for row in rows)
+            after_id = rows[-1][0]
+        assert scanned == [ids[0], ids[1], ids[3], ids[4], ids[5]]
+
+    def test_delete(self, engine):
+        ids = [engine.append(f"c{i}", f"2024-01-01T00:00:0{i}", f"f{i}") for i in range(4)]
+        assert engine.delete([ids[2], 999, ids[0], ids[2]]) == [ids[2], ids[0]]
+        assert engine.delete([ids[0]]) == []
+        assert [row[0] for row in engine.page(10)] == [ids[3], ids[1]]
+        assert engine.get(ids) == [(ids[1], "c1", "2024-01-01T00:00:01"), (ids[3], "c3", "2024-01-01T00:00:03")]
+        # A deleted entry's fingerprint can be stored again
+        engine.append("c0", "2024-01-01T00:00:00", "f0")
+
+    def test_duplicate_fingerprint(self, engine):
+        engine.append("c", "2024-01-01T00:00:00", "same")
+        with pytest.raises(DuplicateEntryError):
+            engine.append("c", "2024-01-01T00:00:00", "same")
+        # Rows without a fingerprint (legacy) never collide
+        engine.append("x", "2024-01-01T00:00:00", None)
+        engine.append("x", "2024-01-01T00:00:00", None)
+        assert len(engine.page(-1)) == 3
+
+    def test_clear_keeps_ids_growing(self, engine):
+        last = engine.append("c", "2024-01-01T00:00:00", "f")
+        engine.clear()
+        assert engine.page(10) == [] and engine.max_id() == 0
+        assert engine.append("c", "2024-01-01T00:00:00", "f") > last
+
+    def test_append_many_skips_known_fingerprints(self, engine):
+        first = engine.append("c0", "2024-01-01T00:00:00", "f0")
+        ids = engine.append_many([("c1", "2024-01-01T00:00:01", "f1"), ("dup", "2024-01-01T00:00:00", "f0"),
+                                  ("c2", "2024-01-01T00:00:02", None), ("again", "2024-01-01T00:00:01", "f1")])
+        assert len(ids) == 2 and first < ids[0] < ids[1]
+        assert [row[1] for row in engine.get(ids)] == ["c1", "c2"]
+        assert engine.find_fingerprints(["f0", "f1", "f9"]) == {"f0", "f1"}
+        assert engine.append_many([]) == []
+
+    def test_ids_in_range(self, engine):
+        ids = [engine.append(f"c{i}", f"2024-01-0{i + 1}T00:00:00", f"f{i}") for i in range(5)]
+        assert engine.ids_in_range("2024-01-04T00:00:00", "2024-01-01T00:00:00", 10) == ids[1:3]
+        assert engine.ids_in_range("2024-01-03T00:00:00", None, 10) == ids[:2]
+        assert engine.ids_in_range(None, "2024-01-03T00:00:00", 10) == ids[3:]
+        assert engine.ids_in_range(None, None, 2) == ids[:2]
+
+    def test_fingerprint_backfill(self, engine):
+        legacy = [engine.append(f"c{i}", "2024-01-01T00:00:00", None) for i in range(3)]
+        engine.append("c", "2024-01-01T00:00:00", "taken")
+        assert [row[0] for row in engine.unfingerprinted(0, 2)] == legacy[:2]
+        assert [row[0] for row in engine.unfingerprinted(legacy[0], 10)] == legacy[1:]
+        engine.set_fingerprints([("new", legacy[0]), ("taken", legacy[1])])
+        # A fingerprint already stored elsewhere is left unset
+        assert [row[0] for row in engine.unfingerprinted(0, 10)] == legacy[1:]
+        assert engine.find_fingerprints(["new"]) == {"new"}
+
+    def test_users_and_preferences(self, engine):
+        engine.create_user("alice", "hash-a")
+        with pytest.raises(ValueError):
+            engine.create_user("alice", "hash-b")
+        assert engine.password_hash("alice") == "hash-a"
+        assert engine.password_hash("nobody") is None
+
+        assert engine.get_preferences("alice") == {}
+        engine.set_preferences("alice", {"theme": "dark", "limit": 20})
+        prefs = engine.get_preferences("alice")
+        assert prefs == {"theme": "dark", "limit": 20}
+        prefs["theme"] = "changed"
+        assert engine.get_preferences("alice")["theme"] == "dark"
+        engine.set_preferences("nobody", {"theme": "dark"})
+        assert engine.get_preferences("nobody") == {}
+
+    def test_refresh_tokens(self, engine):
+        engine.store_refresh_token("t1", "alice", time.time() + 60)
+        engine.store_refresh_token("t2", "alice", time.time() + 60)
+        engine.store_refresh_token("expired", "alice", time.time() - 60)
+        assert engine.get_refresh_token("t1")["username"] == "alice"
+        assert engine.get_refresh_token("missing") is None
+        assert engine.revoke_refresh_token("t1") is True
+        assert engine.revoke_refresh_token("t1") is False
+        assert engine.get_refresh_token("t1")["revoked"] is True
+        # Revoked and expired tokens are dropped, the rest revoked
+        assert engine.revoke_all_refresh_tokens() == 1
+        assert engine.get_refresh_token("t1") is None and engine.get_refresh_token("expired") is None
+        assert engine.get_refresh_token("t2")["revoked"] is True
+
+
+class TestClipboardDBEngines:
+    """ClipboardDB behaves the same on every engine"""
+
+    def test_history_round_trip(self, engine):
+        db = ClipboardDB(engine=engine)
+        db.add_entry("  engine one ")
+        db.add_entry("engine two")
+        version = db.history_version
+        assert [e["content"] for e in db.get_history(limit=10)] == ["engine two", "engine one"]
+        first = db.get_history(limit=10)[1]["id"]
+        assert [e["content"] for e in db.get_entries([first])] == ["engine one"]
+        assert [len(batch) for batch in db.iter_history(batch_size=1)] == [1, 1]
+        assert db.delete_entries([first, 999]) == [first]
+        assert db.delete_entry(first) is False
+        assert db.history_version > version
+        db.clear_history()
+        assert db.get_history(limit=10) == []
+
+    def test_import_and_range_delete(self, engine):
+        db = ClipboardDB(engine=engine)
+        entries = [("imported a", "2021-01-01T00:00:00"), ("imported b", "2021-01-02T00:00:00"),
+                   ("imported a", "2021-01-01T00:00:00"), ("imported c", "2021-01-03T00:00:00")]
+        assert db.import_entries(entries) == (3, 1, 0)
+        assert db.import_entries(entries[:1]) == (0, 1, 0)
+        assert db.backfill_fingerprints() == 0
+        assert db.delete_range(before="2021-01-03T00:00:00", after="2021-01-01T00:00:00") == 1
+        assert db.delete_range(before="2021-01-02T00:00:00", chunk_size=1) == 1
+        assert [e["content"] for e in db.get_history(limit=10)] == ["imported c"]
+
+    def test_users(self, engine):
+        db = ClipboardDB(engine=engine)
+        db.create_user("engine_user", "EnginePass123!")
+        assert db.verify_user("engine_user", "EnginePass123!")
+        assert not db.verify_user("engine_user", "wrong")
+        db.update_user_preferences("engine_user", {"theme": "light"})
+        assert db.get_user_preferences("engine_user") == {"theme": "light"}
+
+    def test_sqlite_only_features(self):
+        db = ClipboardDB(engine=MemoryEngine())
+        with pytest.raises(UnsupportedOperation):
+            db.get_changes(0)
+
+    def test_sync_endpoints_return_501(self, monkeypatch):
+        import main
+        from fastapi.testclient import TestClient
+        client = TestClient(main.app)
+        username = f"engineapi_{int(time.time() * 1000)}"
+        client.post("/register", data={"username": username, "password": "EnginePass123!"},
+                    headers={"Content-Type": "application/x-www-form-urlencoded"})
+        login = client.post("/login", data={"username": username, "password": "EnginePass123!"},
+                            headers={"Content-Type": "application/x-www-form-urlencoded"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        monkeypatch.setattr(main, "db", ClipboardDB(engine=MemoryEngine()))
+        responses = [client.get("/sync/changes", headers=headers), client.get("/sync/snapshot", headers=headers)]
+        assert [r.status_code for r in responses] == [501, 501]
+        assert all("memory" in r.json()["detail"] for r in responses)
+        # Import and range delete work on any engine
+        imported = client.post("/clipboard/import", content=b'{"content": "x", "timestamp": "2024-01-01T00:00:00"}\n',
+                               headers=headers)
+        assert imported.status_code == 200 and imported.json()["imported"] == 1
+        deleted = client.delete("/clipboard/history", params={"before": "2024-01-02T00:00:00"}, headers=headers)
+        assert deleted.status_code == 200 and deleted.json()["deleted"] == 1
+
+    def test_engine_from_env(self, monkeypatch):
+        monkeypatch.setenv("CLIPVAULT_STORAGE", "memory")
+        assert isinstance(engine_from_env("unused.db"), MemoryEngine)
+        monkeypatch.setenv("CLIPVAULT_STORAGE", "sqlite")
+        engine = engine_from_env("unused.db", memory=True)
+        assert isinstance(engine, SQLiteEngine) and engine.path == ":memory:"
+        engine.close()
+        monkeypatch.setenv("CLIPVAULT_STORAGE", "nope")
+        with pytest.raises(ValueError):
+            engine_from_env("unused.db")
@@ -0,0 +1,92 @@
+import sys, os, time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from main import app, db
+from database import ClipboardDB
+from clipboard_crypto import clipboard_crypto
+
+
+def _pull(database, since, limit=500):
+    """Follow `next` until caught up, like a syncing device would"""
+    changes = []
+    while True:
+        page = database.get_changes(since, limit)
+        changes.extend(page["changes"])
+        since = page["next"]
+        if not page["more"]:
+            return changes, since
+
+
+class TestChangeLog:
+    """Test the sync change log and tombstones"""
+
+    def test_inserts_deletes_and_clear(self):
+        store = ClipboardDB()
+        store.add_entry("sync one")
+        store.add_entry("sync two")
+        store.import_entries([("sync imported", "2020-02-02T02:02:02")])
+        changes, cursor = _pull(store, 0, limit=2)
+        assert [c["op"] for c in changes] == ["insert"] * 3
+        assert [c["seq"] for c in changes] == sorted(c["seq"] for c in changes)
+        assert clipboard_crypto.decrypt_content(changes[2]["content"]) == "sync imported"
+        assert changes[2]["timestamp"] == "2020-02-02T02:02:02"
+
+        # An unchanged device gets an empty page straight away
+        page = store.get_changes(cursor)
+        assert page["changes"] == [] and page["next"] == cursor and not page["more"]
+
+        first = changes[0]
+        store.delete_entry(first["id"])
+        tombstones, cursor = _pull(store, cursor)
+        assert tombstones == [{"seq": tombstones[0]["seq"], "op": "delete", "id": first["id"],
+                               "fingerprint": first["fingerprint"]}]
+        # Deleted rows drop out of a full resync; only their tombstone remains
+        full, _ = _pull(store, 0)
+        assert [c["op"] for c in full] == ["insert", "insert", "delete"]
+
+        store.clear_history()
+        after_clear, cursor = _pull(store, cursor)
+        assert [c["op"] for c in after_clear] == ["clear"]
+        assert [c["op"] for c in _pull(store, 0)[0]] == ["clear"]
+        store.add_entry("after clear")
+        assert [c["op"] for c in _pull(store, cursor)[0]] == ["insert"]
+
+    def test_batch_and_range_deletes_leave_tombstones(self):
+        store = ClipboardDB()
+        for i in range(4):
+            store.add_entry(f"bulk {i}")
+        inserts, cursor = _pull(store, 0)
+        store.delete_entries([inserts[0]["id"], inserts[1]["id"]])
+        store.delete_range(after="2000-01-01T00:00:00")
+        tombstones, _ = _pull(store, cursor)
+        assert sorted(c["id"] for c in tombstones) == sorted(c["id"] for c in inserts)
+        assert all(c["op"] == "delete" and c["fingerprint"] for c in tombstones)
+
+    def test_ahead_of_log_requests_reset(self):
+        store = ClipboardDB()
+        store.add_entry("only entry")
+        page = store.get_changes(1000)
+        assert page["reset"] and page["next"] == page["latest"]
+
+
+class TestSyncEndpoint:
+    """Test GET /sync/changes"""
+
+    def test_pull_changes(self):
+        client = TestClient(app)
+        username = f"syncuser_{int(time.time() * 1000)}"
+        password = "SyncPass123!"
+        client.post("/register", data={"username": username, "password": password},
+                    headers={"Content-Type": "application/x-www-form-urlencoded"})
+        login = client.post("/login", data={"username": username, "password": password},
+                            headers={"Content-Type": "application/x-www-form-urlencoded"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        latest = client.get("/sync/changes?since=0&limit=1", headers=headers).json()["latest"]
+        db.add_entry("synced over http")
+        page = client.get(f"/sync/changes?since={latest}", headers=headers).json()
+        assert [c["op"] for c in page["changes"]] == ["insert"]
+        assert clipboard_crypto.decrypt_content(page["changes"][0]["content"]) == "synced over http"
+        assert page["next"] == page["latest"] and not page["more"]
+        assert client.get("/sync/changes").status_code == 401
@@ -0,0 +1,93 @@
+import sys, os, time, stat
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from clipboard_crypto import ClipboardCrypto, VaultLockedError
+from secure_storage import key_manager
+from vault import VaultLock, InvalidPasswordError
+
+
+@pytest.fixture
+def vault(tmp_path):
+    crypto = ClipboardCrypto(locked=True)
+    lock = VaultLock(crypto, str(tmp_path / "vault.key"), idle_timeout=0, iterations=1000)
+    yield lock
+    lock.lock()
+
+
+class TestVaultLock:
+    """Test master-password unlock, locking and re-wrapping"""
+
+    def test_first_unlock_creates_private_vault_file(self, vault):
+        assert vault.locked and not vault.initialized
+        with pytest.raises(VaultLockedError):
+            vault.crypto.encrypt_content("too early")
+        vault.unlock("correct horse")
+        assert vault.initialized
+        assert stat.S_IMODE(os.stat(vault.path).st_mode) == 0o600
+        encrypted = vault.crypto.encrypt_content("vaulted")
+        assert vault.crypto.decrypt_content(encrypted) == "vaulted"
+
+        vault.lock()
+        assert vault.crypto.locked
+        with pytest.raises(VaultLockedError):
+            vault.crypto.decrypt_content(encrypted)
+        with pytest.raises(InvalidPasswordError):
+            vault.unlock("wrong horse")
+        vault.unlock("correct horse")
+        assert vault.crypto.decrypt_content(encrypted) == "vaulted"
+
+    def test_unlock_when_unlocked_checks_password(self, vault):
+        vault.unlock("correct horse")
+        with pytest.raises(InvalidPasswordError):
+            vault.unlock("wrong horse")
+        assert not vault.locked
+        vault.unlock("correct horse")
+        assert vault.crypto.decrypt_content(vault.crypto.encrypt_content("still open")) == "still open"
+
+    def test_kdf_runs_once_per_session(self, vault, monkeypatch):
+        calls = []
+        derive = key_manager.derive_key_from_password
+
+        def counting_derive(*args, **kwargs):
+            calls.append(1)
+            return derive(*args, **kwargs)
+
+        monkeypatch.setattr(key_manager, "derive_key_from_password", counting_derive)
+        vault.unlock("session password")
+        for i in range(20):
+            assert vault.crypto.decrypt_content(vault.crypto.encrypt_content(f"item {i}")) == f"item {i}"
+        # Rotation re-wraps with the held derived key
+        vault.crypto.rotate_key()
+        encrypted = vault.crypto.encrypt_content("after rotation")
+        assert len(calls) == 1
+
+        vault.lock()
+        vault.unlock("session password")
+        assert vault.crypto.decrypt_content(encrypted) == "after rotation"
+        assert len(calls) == 2
+
+    def test_auto_lock_after_inactivity(self, tmp_path):
+        crypto = ClipboardCrypto(locked=True)
+        vault = VaultLock(crypto, str(tmp_path / "vault.key"), idle_timeout=0.2, iterations=1000)
+        vault.unlock("idle password")
+        deadline = time.time() + 5
+        while not vault.locked and time.time() < deadline:
+            time.sleep(0.05)
+        assert vault.locked and crypto.locked
+        assert vault.status()["auto_locks"] == 1
+
+
+def test_vault_endpoints_disabled_in_keyring_mode():
+    client = TestClient(app)
+    username = f"vault_{int(time.time())}"
+    password = "VaultMode123!"
+    client.post("/register", data={"username": username, "password": password},
+                headers={"Content-Type": "application/x-www-form-urlencoded"})
+    login = client.post("/login", data={"username": username, "password": password},
+                        headers={"Content-Type": "application/x-www-form-urlencoded"})
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+    assert client.get("/vault/status", headers=headers).status_code == 404
+    assert client.get("/health").json()["security"]["vault_locked"] is False
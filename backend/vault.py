@@ -0,0 +1,255 @@
+"""
+Vault Unlock Module
+Master-password unlock for the clipboard vault key, for hosts without an OS keyring
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+import logging
+from typing import Optional, Tuple
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from clipboard_crypto import ClipboardCrypto, SecureBuffer, SecureMemory, VaultLockedError, clipboard_crypto
+from secure_storage import key_manager, unlock_mode, write_private_file, PBKDF2_ITERATIONS, UNLOCK_PASSWORD
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidPasswordError(ValueError):
+    """The master password does not unwrap the vault key"""
+
+
+class VaultLock:
+    """
+    Keeps the vault key wrapped (AES-256-GCM) under a PBKDF2 key derived from a master password
+
+    The KDF runs once per unlock. The derived key and the unwrapped vault
+    key are then held in SecureBuffers for the session, so requests only
+    pay for the cipher, and key rotation re-wraps without asking for the
+    password again. After `idle_timeout` seconds without crypto activity a
+    background thread locks the vault, zeroing both keys.
+    """
+
+    FILE_VERSION = 1
+    _AAD = b"clipvault vault key v1"
+
+    def __init__(self, crypto: ClipboardCrypto, path: str, idle_timeout: float = 900.0,
+                 iterations: int = PBKDF2_ITERATIONS):
+        """
+        Args:
+            crypto: ClipboardCrypto whose key is supplied (and dropped) by this vault
+            path: Wrapped key file
+            idle_timeout: Seconds of inactivity before auto-lock (0 = never)
+            iterations: PBKDF2 iterations for newly created vault files
+        """
+        self.crypto = crypto
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.iterations = iterations
+        self.auto_locks = 0
+        self.unlocked_at: Optional[float] = None
+        self._derived: Optional[SecureBuffer] = None
+        self._vault_key: Optional[SecureBuffer] = None
+        self._salt: Optional[bytes] = None
+        self._file_iterations = iterations
+        self._last_activity = time.monotonic()
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._thread = None
+        # Called after every lock, e.g. to drop caches holding decrypted data
+        self.lock_listeners = []
+        crypto.key_source = self
+
+    @classmethod
+    def from_env(cls, crypto: ClipboardCrypto) -> "VaultLock":
+        """CLIPVAULT_VAULT_FILE (default vault.key), CLIPVAULT_AUTO_LOCK seconds (default 900)"""
+        try:
+            idle_timeout = float(os.getenv("CLIPVAULT_AUTO_LOCK", "900"))
+        except ValueError:
+            idle_timeout = 900.0
+        return cls(crypto, os.getenv("CLIPVAULT_VAULT_FILE", "vault.key"), idle_timeout=idle_timeout)
+
+    @property
+    def initialized(self) -> bool:
+        return os.path.exists(self.path)
+
+    @property
+    def locked(self) -> bool:
+        return self._vault_key is None
+
+    def touch(self) -> None:
+        self._last_activity = time.monotonic()
+
+    def idle_seconds(self) -> float:
+        return time.monotonic() - max(self._last_activity, self.crypto.last_used)
+
+    def unlock(self, password: str) -> None:
+        """
+        Derive the wrapping key and unwrap the vault key; the first unlock creates the vault
+
+        Raises:
+            InvalidPasswordError: The password does not match the vault file
+        """
+        with self._lock:
+            if not self.locked:
+                # Still check the password: a wrong one must not be answered as a successful unlock
+                derived, vault_key = self._unwrap(password, self._read_record())
+                derived.release()
+                SecureMemory.clear_bytes(vault_key)
+                self.touch()
+                return
+            if self.initialized:
+                self._open(password)
+            else:
+                self._create(password)
+            self.unlocked_at = time.time()
+            self.touch()
+            self.crypto.load_key()
+            self._start_watcher()
+        logger.info("Vault unlocked")
+
+    def lock(self) -> None:
+        """Zero the vault key, the derived key and the crypto engines"""
+        with self._lock:
+            if self.locked:
+                return
+            self.crypto.unload_key()
+            self._vault_key.release()
+            self._derived.release()
+            self._vault_key = self._derived = None
+            self.unlocked_at = None
+            self._wake.set()
+        for listener in self.lock_listeners:
+            listener()
+        logger.info("Vault locked")
+
+    def _derive(self, password: str, salt: Optional[bytes], iterations: int) -> SecureBuffer:
+        derived, salt = key_manager.derive_key_from_password(password, salt, iterations)
+        self._salt = salt
+        self._file_iterations = iterations
+        try:
+            return SecureBuffer.from_bytes(derived)
+        finally:
+            SecureMemory.clear_bytes(derived)
+
+    def _read_record(self) -> dict:
+        with open(self.path, "r", encoding="utf-8") as f:
+            record = json.load(f)
+        if record.get("version") != self.FILE_VERSION:
+            raise ValueError(f"Unsupported vault file version: {record.get('version')}")
+        return record
+
+    def _unwrap(self, password: str, record: dict) -> Tuple[SecureBuffer, bytes]:
+        """(derived key, vault key) for `password` from a vault file record; InvalidPasswordError on mismatch"""
+        derived, _ = key_manager.derive_key_from_password(
+            password, base64.b64decode(record["salt"]), int(record["iterations"]))
+        try:
+            derived_buffer = SecureBuffer.from_bytes(derived)
+        finally:
+            SecureMemory.clear_bytes(derived)
+        try:
+            vault_key = AESGCM(derived_buffer.view()).decrypt(
+                base64.b64decode(record["nonce"]), base64.b64decode(record["wrapped_key"]), self._AAD)
+        except InvalidTag:
+            derived_buffer.release()
+            raise InvalidPasswordError("Invalid master password")
+        return derived_buffer, vault_key
+
+    def _open(self, password: str) -> None:
+        record = self._read_record()
+        derived, vault_key = self._unwrap(password, record)
+        self._salt = base64.b64decode(record["salt"])
+        self._file_iterations = int(record["iterations"])
+        self._derived = derived
+        self._vault_key = SecureBuffer.from_bytes(vault_key)
+        SecureMemory.clear_bytes(vault_key)
+
+    def _create(self, password: str) -> None:
+        # Keep an existing keyring key so rows encrypted before switching modes stay readable
+        existing = key_manager.get_clipboard_key()
+        vault_key = existing.encode("ascii") if existing else Fernet.generate_key()
+        if existing:
+            logger.warning("Wrapped the existing keyring clipboard key; it can now be removed from the keyring")
+        self._derived = self._derive(password, None, self.iterations)
+        self._vault_key = SecureBuffer.from_bytes(vault_key)
+        SecureMemory.clear_bytes(vault_key)
+        self._write()
+        logger.info(f"Created vault file {self.path}")
+
+    def _write(self) -> None:
+        """Wrap the current vault key with the held derived key (no KDF) and persist it"""
+        nonce = os.urandom(12)
+        wrapped = AESGCM(self._derived.view()).encrypt(nonce, self._vault_key.view(), self._AAD)
+        record = {
+            "version": self.FILE_VERSION,
+            "kdf": "pbkdf2-sha256",
+            "iterations": self._file_iterations,
+            "salt": base64.b64encode(self._salt).decode("ascii"),
+            "nonce": base64.b64encode(nonce).decode("ascii"),
+            "wrapped_key": base64.b64encode(wrapped).decode("ascii"),
+        }
+        write_private_file(self.path, json.dumps(record).encode("utf-8"))
+
+    # Key source interface used by ClipboardCrypto (same shape as SecureKeyManager)
+
+    def get_clipboard_key(self) -> str:
+        with self._lock:
+            if self.locked:
+                raise VaultLockedError("Vault is locked")
+            self.touch()
+            return self._vault_key.decode("ascii")
+
+    def rotate_clipboard_key(self) -> None:
+        with self._lock:
+            if self.locked:
+                raise VaultLockedError("Vault is locked")
+            new_key = Fernet.generate_key()
+            old_key, self._vault_key = self._vault_key, SecureBuffer.from_bytes(new_key)
+            SecureMemory.clear_bytes(new_key)
+            self._write()
+            old_key.release()
+            logger.info("Clipboard encryption key rotated and re-wrapped")
+
+    def _start_watcher(self) -> None:
+        if self.idle_timeout <= 0 or self._thread is not None:
+            return
+        self._wake.clear()
+        self._thread = threading.Thread(target=self._run, name="clipvault-vault-lock", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if self.locked:
+                    self._thread = None
+                    return
+                remaining = self.idle_timeout - self.idle_seconds()
+                if remaining <= 0:
+                    logger.info(f"Vault idle for {self.idle_timeout:.0f}s, locking")
+                    self.auto_locks += 1
+                    self.lock()
+                    self._thread = None
+                    return
+                self._wake.clear()
+            self._wake.wait(remaining)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "initialized": self.initialized,
+                "locked": self.locked,
+                "unlocked_at": self.unlocked_at,
+                "idle_seconds": None if self.locked else round(self.idle_seconds(), 1),
+                "auto_lock_after": self.idle_timeout,
+                "auto_locks": self.auto_locks,
+            }
+
+
+# Global instance; None unless CLIPVAULT_UNLOCK_MODE=password
+vault_lock = VaultLock.from_env(clipboard_crypto) if unlock_mode() == UNLOCK_PASSWORD else None
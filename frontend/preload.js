@@ -35,6 +35,21 @@ async function handleResponse(response) {
     return response.json();
 }
 
+// POST /batch; a plain function because contextBridge doesn't bind `this` on exposed methods
+async function runBatch(ops) {
+    try {
+        const response = await fetch(`${API_URL}/batch`, {
+            method: 'POST',
+            headers: getAuthHeaders(),
+            body: JSON.stringify({ ops })
+        });
+        return await handleResponse(response); // { results: [{ id, op, status, etag, body }] }
+    } catch (error) {
+        console.error('Batch request failed:', error);
+        throw error;
+    }
+}
+
 // Expose protected methods that allow the renderer process to use
 // the backend API through a "backend" global object
 contextBridge.exposeInMainWorld(
@@ -78,6 +93,38 @@ contextBridge.exposeInMainWorld(
             }
         },
 
+        // Delete several history entries in one request
+        async deleteHistoryEntries(entryIds) {
+            try {
+                const response = await fetch(`${API_URL}/clipboard/history/delete-batch`, {
+                    method: 'POST',
+                    headers: getAuthHeaders(),
+                    body: JSON.stringify({ ids: entryIds })
+                });
+                return await handleResponse(response);
+            } catch (error) {
+                console.error('Delete history entries failed:', error);
+                throw error;
+            }
+        },
+
+        // Delete history entries between two ISO timestamps (either bound optional)
+        async deleteHistoryRange({ before, after } = {}) {
+            try {
+                const params = new URLSearchParams();
+                if (before) params.set('before', before);
+                if (after) params.set('after', after);
+                const response = await fetch(`${API_URL}/clipboard/history?${params}`, {
+                    method: 'DELETE',
+                    headers: getAuthHeaders()
+                });
+                return await handleResponse(response);
+            } catch (error) {
+                console.error('Delete history range failed:', error);
+                throw error;
+            }
+        },
+
         // Get clipboard content (requires authentication)
         async getClipboard() {
             try {
@@ -206,6 +253,24 @@ contextBridge.exposeInMainWorld(
         sendAuthToken(token) {
             ipcRenderer.send('auth-token', token)
         },
+        // Run several read operations (health, preferences, history, current) in one request
+        batch: runBatch,
+
+        // Everything a window needs on open, in a single round-trip
+        async loadStartupState(historyLimit = 20) {
+            const { results } = await runBatch([
+                { id: 'health', op: 'health' },
+                { id: 'preferences', op: 'preferences' },
+                { id: 'history', op: 'history', params: { limit: historyLimit } },
+                { id: 'current', op: 'current' }
+            ]);
+            const state = {};
+            for (const result of results) {
+                state[result.id] = result.status === 200 ? result.body : null;
+            }
+            return state;
+        },
+
         // Get user preferences
         async getPreferences() {
             try {